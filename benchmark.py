@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmark.py - 各流水线阶段的基准测试（实时率 / 峰值内存 / CPU 利用率），结果存 JSON，可与基线对比
+
+固定素材:
+    ttsVideo/sample/4.MOV            抽音频、说话人预处理、TTS 参考音、烧录
+    makeSubtitle/outputs/a_audio.wav 中文转写、转写+翻译
+另外按 --long-seconds 生成类语音的长音频与对应时长的合成字幕，测试长视频下的转写 / 翻译 / 字幕生成。
+翻译用本地替身后端（--translate-latency 模拟每次请求的网络延迟），翻译记忆库放在临时目录，不影响正式数据。
+
+用法:
+    python benchmark.py                                   # 全部阶段
+    python benchmark.py --stages extract_audio,srt_ass    # 只跑指定阶段
+    python benchmark.py --baseline benchmark_results/base.json --tolerance 0.15
+    python benchmark.py --list
+比 --baseline 慢 / 占内存多超过 tolerance 的阶段会被标为回归，进程以状态码 1 退出。
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "makeSubtitle"))
+sys.path.insert(0, str(ROOT / "ttsVideo"))
+
+from mediakit.bench import (compare, format_table, load_results, measure, run_meta, save_results,
+                            synthetic_speech, wav_seconds)
+
+SAMPLE_VIDEO = ROOT / "ttsVideo" / "sample" / "4.MOV"
+SAMPLE_AUDIO = ROOT / "makeSubtitle" / "outputs" / "a_audio.wav"
+TTS_TEXT = "你好，这是一段用于基准测试的合成语音。我们会记录合成耗时与实时率，用来比较不同版本的性能。"
+
+STAGES = ("extract_audio", "model_load", "transcribe_zh", "transcribe_translate", "transcribe_long",
+          "translate_cold", "translate_warm", "srt_ass", "speaker_prep", "tts", "burn")
+
+
+def synthetic_lines(count: int, seed: int = 0):
+    """合成中文字幕行：约三成是重复的口播 / 片头句，其余随机组合"""
+    rng = random.Random(seed)
+    words = ["我们", "今天", "来看", "这个", "视频", "里面", "的", "问题", "其实", "非常", "简单",
+             "首先", "然后", "最后", "大家", "可以", "注意", "一下", "参数", "设置", "效果", "怎么样"]
+    stock = ["欢迎来到我的频道", "记得点赞订阅", "我们下期再见", "好的，那我们开始吧"]
+    return [rng.choice(stock) if rng.random() < 0.3 else "".join(rng.choices(words, k=rng.randint(4, 12)))
+            for _ in range(count)]
+
+
+class Bench:
+    def __init__(self, args, work: Path):
+        self.args = args
+        self.work = work
+        self._mb = None
+        self._processor = None
+        self.long_wav = None
+
+    # -------------------------
+    # 延迟导入：缺少某些依赖（如 TTS / torch）时只影响对应阶段
+    # -------------------------
+    @property
+    def mb(self):
+        if self._mb is None:
+            import make_bisubtitle as mb
+            from mediakit.translation import LocalBackend
+
+            # 翻译记忆库放在临时目录，替身后端按行反转文本并模拟请求延迟
+            mb.TM_PATH = self.work / "translations.db"
+            mb.LEGACY_CACHE_FILE = self.work / "missing.json"
+            mb._TM = None
+            latency = self.args.translate_latency / 1000
+
+            def fake_translate(line: str) -> str:
+                return line[::-1]
+
+            class DelayedBackend(LocalBackend):
+                def translate_text(self, text: str) -> str:
+                    time.sleep(latency)
+                    return super().translate_text(text)
+
+            mb.set_translation_backend(DelayedBackend(fake_translate))
+            self._mb = mb
+        return self._mb
+
+    @property
+    def processor(self):
+        if self._processor is None:
+            from core.processor import MediaProcessor
+
+            self._processor = MediaProcessor(
+                ffmpeg_path=self.mb.CONFIG["ffmpeg_path"],
+                tts_model_dir=self.args.tts_model_dir,
+                asr_model_dir=self.mb.CONFIG["model_dir"],
+                device=self.args.device,
+            )
+        return self._processor
+
+    def video_seconds(self) -> float:
+        from mediakit.parallel_burn import ffprobe_for, probe_duration
+
+        return probe_duration(ffprobe_for(self.mb.CONFIG["ffmpeg_path"]), str(SAMPLE_VIDEO))
+
+    def long_audio(self) -> str:
+        if self.long_wav is None:
+            self.long_wav = synthetic_speech(str(self.work / "long.wav"), self.args.long_seconds)
+        return self.long_wav
+
+    def synthetic_srts(self, seconds: float, prefix: str):
+        """按每 3 秒一条生成中英两份 SRT"""
+        from mediakit.subtitles import Cues, write_srt
+
+        count = max(1, int(seconds // 3))
+        lines = synthetic_lines(count)
+        cues = Cues([i * 3000 for i in range(count)], [i * 3000 + 2500 for i in range(count)], lines)
+        cn, en = self.work / f"{prefix}_cn.srt", self.work / f"{prefix}_en.srt"
+        write_srt(str(cn), cues)
+        write_srt(str(en), cues.with_texts([t[::-1] for t in lines]))
+        return str(cn), str(en)
+
+    # -------------------------
+    # 各阶段：返回 (待计时的函数, 媒体时长)；准备工作不计入耗时
+    # -------------------------
+    def stage_extract_audio(self):
+        out = str(self.work / "extract.wav")
+        return lambda: self.mb.extract_audio(str(SAMPLE_VIDEO), out), self.video_seconds()
+
+    def stage_model_load(self):
+        from mediakit.whisper_pool import WhisperModelPool
+
+        return lambda: WhisperModelPool(max_models=1).get(self.mb.CONFIG["model_dir"], device="cpu"), None
+
+    def stage_transcribe_zh(self):
+        out = str(self.work / "zh.srt")
+        self.mb.get_whisper_model(self.mb.CONFIG["model_dir"], device="cpu")  # 预热，不计加载时间
+        return lambda: self.mb.generate_cn_srt(str(SAMPLE_AUDIO), out), wav_seconds(str(SAMPLE_AUDIO))
+
+    def stage_transcribe_translate(self):
+        from mediakit.asr import transcribe
+
+        def run():
+            segments, _ = transcribe(str(SAMPLE_AUDIO), self.mb.CONFIG["model_dir"], task="translate",
+                                     language="zh")
+            for _ in segments:
+                pass
+
+        self.mb.get_whisper_model(self.mb.CONFIG["model_dir"], device="cpu")
+        return run, wav_seconds(str(SAMPLE_AUDIO))
+
+    def stage_transcribe_long(self):
+        out = str(self.work / "long_zh.srt")
+        audio = self.long_audio()
+        self.mb.get_whisper_model(self.mb.CONFIG["model_dir"], device="cpu")
+        return lambda: self.mb.generate_cn_srt(audio, out), wav_seconds(audio)
+
+    def stage_translate_cold(self):
+        lines = synthetic_lines(max(1, int(self.args.long_seconds // 3)))
+        return lambda: self.mb.translate_many(lines), self.args.long_seconds
+
+    def stage_translate_warm(self):
+        # 与 translate_cold 同一批句子：全部命中翻译记忆库
+        lines = synthetic_lines(max(1, int(self.args.long_seconds // 3)))
+        self.mb.translate_many(lines)
+        return lambda: self.mb.translate_many(lines), self.args.long_seconds
+
+    def stage_srt_ass(self):
+        from mediakit.subtitles import read_srt, write_srt
+
+        cn, en = self.synthetic_srts(self.args.long_seconds, "long")
+        ass = str(self.work / "long.ass")
+
+        def run():
+            write_srt(str(self.work / "roundtrip.srt"), read_srt(cn))
+            self.mb.generate_ass_from_srts(cn, en, ass)
+
+        return run, self.args.long_seconds
+
+    def stage_speaker_prep(self):
+        from mediakit.speaker_prep import preprocess_speaker
+
+        cache_dir = str(self.work / "speakers")
+        return lambda: preprocess_speaker(self.mb.CONFIG["ffmpeg_path"], str(SAMPLE_VIDEO),
+                                          cache_dir=cache_dir), self.video_seconds()
+
+    def stage_tts(self):
+        out = str(self.work / "tts" / "speech.wav")
+        processor = self.processor
+        processor.speaker_cache.cache_dir = self.work / "latents"
+        processor.load_model()
+        processor.set_speaker(str(SAMPLE_VIDEO))
+
+        def run():
+            processor.speak(TTS_TEXT, out)
+            return wav_seconds(out)  # 媒体时长取合成结果的时长
+
+        return run, None
+
+    def stage_burn(self):
+        seconds = self.video_seconds()
+        cn, en = self.synthetic_srts(seconds, "burn")
+        ass = str(self.work / "burn.ass")
+        self.mb.generate_ass_from_srts(cn, en, ass)
+        out = str(self.work / "burn.mp4")
+        return lambda: self.mb.burn_subtitles(str(SAMPLE_VIDEO), ass, out, preset=self.args.preset), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stages", default=",".join(STAGES), help="逗号分隔的阶段名")
+    parser.add_argument("--list", action="store_true", help="列出所有阶段")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径（默认 benchmark_results/<主机>_<时间>.json）")
+    parser.add_argument("--baseline", default=None, help="与之对比的基线结果 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="变慢 / 内存增加超过该比例记为回归")
+    parser.add_argument("--long-seconds", type=float, default=600, help="合成长音频 / 长字幕的时长（秒）")
+    parser.add_argument("--translate-latency", type=float, default=50, help="替身翻译后端每次请求的延迟（毫秒）")
+    parser.add_argument("--preset", default="balanced", help="烧录阶段使用的编码预设")
+    parser.add_argument("--tts-model-dir", default=r"F:\media\models\XTTS-v2", help="XTTS 模型目录")
+    parser.add_argument("--device", default="cuda", help="TTS 设备")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(STAGES))
+        return
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"❌ 未知阶段: {', '.join(unknown)}（可用: {', '.join(STAGES)}）")
+        sys.exit(1)
+
+    work = Path(tempfile.mkdtemp(prefix="mediabench_"))
+    bench = Bench(args, work)
+    results = []
+    try:
+        for name in stages:
+            print(f"⏱️ {name} ...")
+            try:
+                fn, media_seconds = getattr(bench, f"stage_{name}")()
+            except Exception as e:
+                results.append({"stage": name, "error": f"setup: {type(e).__name__}: {e}"})
+                continue
+            results.append(measure(name, fn, media_seconds))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print("\n" + format_table(results))
+    meta = run_meta({"long_seconds": args.long_seconds, "translate_latency_ms": args.translate_latency,
+                     "preset": args.preset})
+    out = args.out or str(ROOT / "benchmark_results" / f"{meta['host']}_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    save_results(out, results, meta)
+    print(f"\n💾 结果已保存: {out}")
+
+    if args.baseline:
+        # 显式指定 --stages 时，未选中的基线阶段不算缺失
+        selected = None if args.stages == ",".join(STAGES) else stages
+        rows = compare(load_results(args.baseline), {"results": results}, tolerance=args.tolerance,
+                       stages=selected)
+        regressions = [r for r in rows if r["regression"]]
+        print(f"\n📊 对比基线 {args.baseline}:")
+        for r in rows:
+            if r["change"] is None:
+                # 本次报错 / 缺失的阶段
+                print(f"🔴 {r['stage']:<22}{r['metric']:<13}{r['current']}")
+                continue
+            flag = "🔴" if r["regression"] else ("🟢" if r["change"] < -args.tolerance else "  ")
+            print(f"{flag} {r['stage']:<22}{r['metric']:<13}{r['baseline']:>10} → {r['current']:<10} ({r['change']:+.1%})")
+        if regressions:
+            print(f"⚠️ {len(regressions)} 项回归（阈值 {args.tolerance:.0%}）")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""
+cog/mediakit - 仓库根目录 mediakit 中 Cog 预测器用到的模块副本
+
+Cog 以 cog/ 为构建上下文，容器里没有仓库根目录的 mediakit，这里放一份原样拷贝:
+    hashing.py / batch_worker.py / speaker_cache.py / speaker_prep.py
+
+修改时请改根目录下的原文件，再复制过来（tests/test_cog_vendor.py 会检查两边一致）:
+    cp mediakit/{hashing,batch_worker,speaker_cache,speaker_prep}.py cog/mediakit/
+"""
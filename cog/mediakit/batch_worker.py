@@ -0,0 +1,85 @@
+"""
+batch_worker.py - 单模型工作线程 + 异步微批队列
+
+模型（XTTS / Whisper）不是线程安全的，也没必要多份常驻显存。前端可以并发接请求，
+但真正用模型的只有一个工作线程: 它从队列里取出第一个任务后，再在 max_wait 秒内
+尽量多取几个（最多 max_batch 个）一起交给 process_batch，减少调度开销，
+同一批里还能按说话人等键排序以复用缓存。
+
+用法:
+    worker = BatchWorker(lambda jobs: [synth(job) for job in jobs])
+    result = await worker.submit(job)
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+
+class BatchWorker:
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], max_batch: int = 8,
+                 max_wait: float = 0.02, max_queue: int = 0):
+        """
+        process_batch: 在模型线程中执行，输入任务列表，按顺序返回结果列表；
+                       某一项的结果为 Exception 时，对应 submit() 会抛出该异常
+        max_queue:     队列上限，0 表示不限
+        """
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-worker")
+
+    def _ensure_started(self):
+        # 必须在事件循环内创建队列和后台任务
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    async def submit(self, job: Any) -> Any:
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            jobs = [job for job, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.process_batch, jobs)
+            except Exception as e:
+                results = [e] * len(jobs)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
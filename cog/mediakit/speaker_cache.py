@@ -0,0 +1,137 @@
+"""
+speaker_cache.py - XTTS 说话人条件向量缓存
+
+tts_to_file(speaker_wav=...) 每次调用都会从参考音频重新计算 gpt_cond_latent 和
+speaker_embedding。同一个声音合成几百句时这是每句都要付的固定开销。
+这里按（模型指纹, 参考 WAV 的内容哈希）缓存这两个张量:
+  - 内存中按 LRU 保留最近使用的若干个声音
+  - 同时以 <模型指纹>-<hash>.pt 持久化到磁盘（默认放在 speakers/latents/），下次启动直接读取
+  - 模型指纹取自 checkpoint 路径 + 大小 + mtime 和模型配置，换了 checkpoint 不会误用旧的向量
+
+用法:
+    cache = SpeakerLatentCache("speakers/latents")
+    gpt_cond_latent, speaker_embedding = cache.get(xtts, "speakers/clean_speaker.wav")
+    out = xtts.inference(text, "zh", gpt_cond_latent, speaker_embedding)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+
+from mediakit.hashing import file_sha256
+
+
+def get_xtts(tts):
+    """TTS.api.TTS -> 底层 Xtts 模型；传入的已经是 Xtts 时原样返回"""
+    synthesizer = getattr(tts, "synthesizer", None)
+    return synthesizer.tts_model if synthesizer is not None else tts
+
+
+def model_fingerprint(tts) -> str:
+    """XTTS 模型指纹：checkpoint 路径 + 大小 + mtime，再加上模型配置的哈希"""
+    synthesizer = getattr(tts, "synthesizer", None)
+    parts = []
+    checkpoint = getattr(synthesizer, "tts_checkpoint", None) or getattr(synthesizer, "model_dir", None)
+    if checkpoint:
+        path = Path(checkpoint)
+        if path.is_dir():
+            path = path / "model.pth"
+        try:
+            st = path.stat()
+            parts.append(f"{path.resolve()}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(str(path))
+    config = getattr(get_xtts(tts), "config", None)
+    if config is not None:
+        data = config.to_dict() if hasattr(config, "to_dict") else vars(config)
+        parts.append(json.dumps(data, sort_keys=True, default=str))
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class SpeakerLatentCache:
+    def __init__(self, cache_dir: str | None = None, max_items: int = 8):
+        """cache_dir 为 None 时只做内存缓存"""
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_items = max_items
+        self._items: "OrderedDict[str, Tuple]" = OrderedDict()
+        self._fingerprints = weakref.WeakKeyDictionary()  # 模型 -> 指纹，每个模型只算一次
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key: str) -> Path | None:
+        return self.cache_dir / f"{key}.pt" if self.cache_dir else None
+
+    def _remember(self, key: str, latents: Tuple):
+        with self._lock:
+            self._items[key] = latents
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def _model_key(self, tts) -> str:
+        fingerprint = self._fingerprints.get(tts)
+        if fingerprint is None:
+            fingerprint = self._fingerprints[tts] = model_fingerprint(tts)
+        return fingerprint
+
+    def get(self, tts, speaker_wav: str) -> Tuple:
+        """返回 (gpt_cond_latent, speaker_embedding)，按需计算并缓存"""
+        import torch
+
+        xtts = get_xtts(tts)
+        key = f"{self._model_key(tts)}-{file_sha256(speaker_wav)}"
+
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+
+        disk_path = self._disk_path(key)
+        device = next(xtts.parameters()).device
+        if disk_path is not None and disk_path.exists():
+            data = torch.load(disk_path, map_location=device)
+            latents = (data["gpt_cond_latent"], data["speaker_embedding"])
+            self._remember(key, latents)
+            return latents
+
+        print(f"🎛️ Computing speaker latents: {speaker_wav}")
+        config = xtts.config
+        latents = xtts.get_conditioning_latents(
+            audio_path=[speaker_wav],
+            gpt_cond_len=config.gpt_cond_len,
+            max_ref_length=config.max_ref_len,
+            sound_norm_refs=config.sound_norm_refs,
+        )
+        if disk_path is not None:
+            os.makedirs(disk_path.parent, exist_ok=True)
+            tmp_path = disk_path.with_suffix(f".{os.getpid()}.tmp")
+            torch.save({"gpt_cond_latent": latents[0].cpu(), "speaker_embedding": latents[1].cpu()}, tmp_path)
+            os.replace(tmp_path, disk_path)
+        self._remember(key, latents)
+        return latents
+
+
+def xtts_synthesize(tts, text: str, language: str, latents: Tuple):
+    """用缓存的条件向量合成，返回 float 波形（numpy）"""
+    xtts = get_xtts(tts)
+    config = xtts.config
+    out = xtts.inference(
+        text,
+        language,
+        latents[0],
+        latents[1],
+        temperature=config.temperature,
+        length_penalty=config.length_penalty,
+        repetition_penalty=config.repetition_penalty,
+        top_k=config.top_k,
+        top_p=config.top_p,
+        enable_text_splitting=True,
+    )
+    wav = out["wav"]
+    if hasattr(wav, "cpu"):
+        wav = wav.cpu().numpy()
+    return wav
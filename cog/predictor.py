@@ -1,16 +1,61 @@
 # Prediction interface for Cog
 from cog import BasePredictor, Input, Path
+import asyncio
 import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path as _Path
 from TTS.api import TTS
 
+# cog/mediakit is a vendored copy of the shared modules (the container only sees cog/)
+from mediakit.batch_worker import BatchWorker
+from mediakit.speaker_cache import SpeakerLatentCache, xtts_synthesize
+from mediakit.speaker_prep import preprocess_speaker
+
+FFMPEG_PATH = r"F:\media\external_libs\ffmpeg\bin\ffmpeg.exe"
+SCRATCH_DIR = "/tmp/predictions"
+# ffmpeg preprocessing is CPU bound and runs outside the model worker
+PREPROCESS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Synthesis jobs pulled from the queue per model-worker iteration
+MAX_BATCH = 4
+# Cog uploads a returned file after predict() returns, so the newest scratch dirs are kept
+# for a while (twice the concurrency limit) and older ones are removed
+KEEP_OUTPUTS = 16
+
+
 class Predictor(BasePredictor):
     
     def setup(self) -> None:
         """Load the model into memory to make running multiple predictions efficient"""
         os.environ["COQUI_TOS_AGREED"] = "1"
         self.model = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to('cuda')
+        # Speaker conditioning latents keyed by the content hash of the cleaned speaker wav
+        self.speaker_cache = SpeakerLatentCache(str(_Path(__file__).resolve().parent / "speakers" / "latents"))
+        self.preprocess_pool = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS, thread_name_prefix="ffmpeg")
+        # A single model worker serves all concurrent requests in micro-batches
+        self.synth_worker = BatchWorker(self._synthesize_batch, max_batch=MAX_BATCH)
+        os.makedirs(SCRATCH_DIR, exist_ok=True)
+        self.finished_dirs = deque()
 
-    def predict(
+    def _synthesize_batch(self, jobs):
+        """Runs on the model worker thread; jobs are (text, language, speaker_wav, output_path)"""
+        results = [None] * len(jobs)
+        # group by speaker so each voice's latents are looked up once per batch
+        order = sorted(range(len(jobs)), key=lambda i: jobs[i][2])
+        for i in order:
+            text, language, speaker_wav, output_path = jobs[i]
+            try:
+                latents = self.speaker_cache.get(self.model, speaker_wav)
+                wav = xtts_synthesize(self.model, text, language, latents)
+                self.model.synthesizer.save_wav(wav=wav, path=output_path)
+                results[i] = output_path
+            except Exception as e:
+                results[i] = e
+        return results
+
+    async def predict(
         self,
         text: str = Input(
             description="Text to synthesize",
@@ -28,21 +73,27 @@ class Predictor(BasePredictor):
         ),
     ) -> Path:
         """Run a single prediction on the model"""
-        FFMPEG_PATH=r"F:\media\external_libs\ffmpeg\bin\ffmpeg.exe"
-        speaker_wav = "/tmp/speaker.wav"
-        filter = "highpass=75,lowpass=8000,"
-        trim_silence = "areverse,silenceremove=start_periods=1:start_silence=0:start_threshold=0.02,areverse,silenceremove=start_periods=1:start_silence=0:start_threshold=0.02"
-        # ffmpeg convert to wav and apply afftn denoise filter. y to overwrite and avoid caching
-        if cleanup_voice:
-            os.system(f"{FFMPEG_PATH} -i {speaker} -af {filter}{trim_silence} -y {speaker_wav}")
-        else:
-            os.system(f"{FFMPEG_PATH} -i {speaker} -y {speaker_wav}")
-
-        path = self.model.tts_to_file(
-            text=text, 
-            file_path = "/tmp/output.wav",
-            speaker_wav = speaker_wav,
-            language = language
-        )
-
-        return Path(path)
\ No newline at end of file
+        # Each request writes into its own scratch directory
+        workdir = tempfile.mkdtemp(prefix="predict-", dir=SCRATCH_DIR)
+        returned = False
+        try:
+            loop = asyncio.get_running_loop()
+
+            # ffmpeg convert to wav and apply the cleanup filters; results are cached by input content + filter
+            speaker_wav = await loop.run_in_executor(
+                self.preprocess_pool,
+                preprocess_speaker, FFMPEG_PATH, str(speaker), cleanup_voice, "/tmp/speaker_cache"
+            )
+
+            output_path = os.path.join(workdir, "output.wav")
+            await self.synth_worker.submit((text, language, speaker_wav, output_path))
+            returned = True
+            return Path(output_path)
+        finally:
+            # A failed request has nothing to upload; a returned one is removed once newer outputs push it out
+            if returned:
+                self.finished_dirs.append(workdir)
+            else:
+                shutil.rmtree(workdir, ignore_errors=True)
+            while len(self.finished_dirs) > KEEP_OUTPUTS:
+                shutil.rmtree(self.finished_dirs.popleft(), ignore_errors=True)
@@ -1,6 +1,7 @@
 import collections
 import os
-import tempfile
+import sys
+from pathlib import Path
 
 import torch
 from TTS.api import TTS
@@ -9,11 +10,19 @@ from TTS.tts.configs.xtts_config import XttsConfig
 from TTS.tts.models.xtts import XttsArgs, XttsAudioConfig
 from TTS.utils.radam import RAdam
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 共享模块 mediakit
+from mediakit.speaker_cache import SpeakerLatentCache, xtts_synthesize
+from mediakit.speaker_prep import preprocess_speaker
+from mediakit.tts_longform import synthesize_long
+
 # --- Configuration ---
 INPUT_TEXT_FILE = "input.txt"
 SPEAKER_FILE = "4.MOV"
 OUTPUT_WAV_FILE = "outputs/result.wav"
 LANGUAGE = "zh" 
+MAX_CHARS = 120      # 每批合成的最大字数
+GAP_MS = 150         # 批次之间的静音（毫秒）
+CROSSFADE_MS = 0     # > 0 时批次之间交叉淡化，代替静音
 FFMPEG_PATH = r"F:\media\external_libs\ffmpeg\bin\ffmpeg.exe"
 
 def main():
@@ -49,25 +58,23 @@ def main():
     
     print(f"Input text: {text}")
 
-    # Create temporary files for speaker and output wav
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_speaker_wav:
-        speaker_wav_path = temp_speaker_wav.name
-
-    print(f"Converting speaker file to wav: {speaker_wav_path}")
-    os.system(f"{FFMPEG_PATH} -i {SPEAKER_FILE} -y {speaker_wav_path}")
+    # Convert the speaker file to wav (cached by content, reused across runs)
+    speaker_wav_path = preprocess_speaker(FFMPEG_PATH, SPEAKER_FILE, cleanup_voice=False, cache_dir="speakers/cache")
+    print(f"Speaker wav: {speaker_wav_path}")
 
-    # Run the TTS model
+    # Run the TTS model sentence by sentence, writing the wav incrementally
     print("Synthesizing speech...")
-    model.tts_to_file(
-        text=text,
-        file_path=OUTPUT_WAV_FILE,
-        speaker_wav=speaker_wav_path,
-        language=LANGUAGE
+    latents = SpeakerLatentCache("speakers/latents").get(model, speaker_wav_path)
+    synthesize_long(
+        lambda s: xtts_synthesize(model, s, LANGUAGE, latents),
+        text,
+        OUTPUT_WAV_FILE,
+        sample_rate=model.synthesizer.output_sample_rate,
+        max_chars=MAX_CHARS,
+        gap_ms=GAP_MS,
+        crossfade_ms=CROSSFADE_MS
     )
 
-    # Clean up temporary file
-    os.remove(speaker_wav_path)
-
     print(f"✅ Speech synthesized successfully: {OUTPUT_WAV_FILE}")
 
 if __name__ == "__main__":
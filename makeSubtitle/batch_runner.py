@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+batch_runner.py - 批量生成中英字幕（多视频流水线）
+
+make_bisubtitle.py 一次处理一个视频，各阶段串行。这里把 抽音频 → 转写 → 翻译(+ASS) → 烧录
+拆成流水线的四个阶段，各有独立线程池和有界队列：视频 N 转写时，N+1 在抽音频、
+N-1 在翻译、N-2 在烧录，总耗时取决于最慢的阶段而不是各阶段之和。
+整批共用一个常驻的 WhisperModel；每个视频仍按 manifest 跳过未变化的阶段，中断后重跑只补做剩余部分。
+
+用法:
+    python batch_runner.py videos/                 # 目录下所有视频
+    python batch_runner.py list.txt --burn         # 清单文件，每行一个视频路径（或 JSON 数组）
+    python batch_runner.py videos/ --no-translate
+    python batch_runner.py videos/ --no-translate --burn   # 只烧录中文字幕
+各阶段线程数见 config.json 的 batch_workers / batch_queue_size。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import make_bisubtitle as mb
+from make_bisubtitle import CONFIG
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 共享模块 mediakit
+from mediakit.pipeline import Stage, run_pipeline
+from mediakit.stage_cache import StageCache
+from mediakit.whisper_pool import get_whisper_model
+
+VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".avi", ".flv", ".webm", ".m4v", ".ts"}
+
+
+def collect_videos(source: str):
+    """目录 -> 其中的视频文件；.json -> 路径数组；其他文本文件 -> 每行一个路径（# 开头为注释）"""
+    path = Path(source)
+    if path.is_dir():
+        return sorted(str(p) for p in path.iterdir() if p.suffix.lower() in VIDEO_EXTS)
+    if path.suffix.lower() == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            return [str(p) for p in json.load(f)]
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def dedupe_videos(videos):
+    """同一文件（按绝对路径）只保留第一次出现，避免两个 job 同时写同一组产物"""
+    seen = set()
+    unique = []
+    for video in videos:
+        key = os.path.normcase(str(Path(video).resolve()))
+        if key not in seen:
+            seen.add(key)
+            unique.append(video)
+    return unique
+
+
+def job_bases(videos) -> dict:
+    """
+    video -> 产物文件名前缀。默认为文件名（与 make_bisubtitle.py 一致，可复用已有的 manifest）；
+    不同目录下同名的视频（a/1.mp4、b/1.mp4）加上绝对路径的短哈希，互不覆盖
+    """
+    stems = {}
+    for video in videos:
+        stems.setdefault(Path(video).stem, []).append(video)
+    bases = {}
+    for stem, group in stems.items():
+        for video in group:
+            if len(group) == 1:
+                bases[video] = stem
+            else:
+                digest = hashlib.sha1(str(Path(video).resolve()).encode("utf-8")).hexdigest()[:8]
+                bases[video] = f"{stem}_{digest}"
+    return bases
+
+
+# ======================
+# 各阶段（每个视频的状态在 job dict 里传递）
+# ======================
+def new_job(video: str, out_dir: str, preset: str | None, adopt: bool = False, base: str | None = None) -> dict:
+    """base: 产物文件名前缀，默认取视频文件名（见 job_bases）"""
+    base = base or Path(video).stem
+    suffix = "_preview.mp4" if preset == "preview" else "_subtitled.mp4"
+    return {
+        "video": video,
+        "audio": f"{out_dir}/{base}_audio.wav",
+        "cn_srt": f"{out_dir}/{base}_cn.srt",
+        "en_srt": f"{out_dir}/{base}_en.srt",
+        "ass": f"{out_dir}/{base}.ass",
+        "cn_ass": f"{out_dir}/{base}_cn.ass",
+        "out": f"{out_dir}/{base}{suffix}",
+        "manifest": f"{out_dir}/{base}.manifest.json",
+        "adopt": adopt,
+    }
+
+
+def stage_extract(job: dict):
+    job["cache"] = StageCache(job["manifest"])
+    job["video_hash"] = job["cache"].source_hash(job["video"])
+    if not CONFIG.get("stream_audio", False):
+        mb.run_extract(job["cache"], job["video"], job["video_hash"], job["audio"])
+
+
+def stage_asr(job: dict):
+    mb.run_transcribe(job["cache"], job["video"], job["video_hash"], job["audio"], job["cn_srt"], job["adopt"])
+
+
+def stage_translate(job: dict):
+    mb.run_translate(job["cache"], job["cn_srt"], job["en_srt"], job["adopt"])
+    mb.run_ass(job["cache"], job["cn_srt"], job["en_srt"], job["ass"])
+
+
+def make_stage_burn(preset: str | None, translate: bool = True):
+    """translate=False（--no-translate）时只烧录中文字幕"""
+    def stage_burn(job: dict):
+        ass = job["ass"]
+        if not translate:
+            if not mb.run_single_ass(job["cache"], job["cn_srt"], job["cn_ass"], "cn"):
+                raise FileNotFoundError(job["cn_srt"])
+            ass = job["cn_ass"]
+        mb.run_burn(job["cache"], job["video"], job["video_hash"], ass, job["out"], preset)
+    return stage_burn
+
+
+def main():
+    # 设置全局代理，deep-translator/requests 会自动读取
+    os.environ["HTTP_PROXY"] = "http://127.0.0.1:1081"
+    os.environ["HTTPS_PROXY"] = "http://127.0.0.1:1081"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", help="视频目录，或清单文件（每行一个路径 / JSON 数组）")
+    parser.add_argument("--out-dir", default="outputs", help="输出目录")
+    parser.add_argument("--burn", action="store_true", help="是否烧录字幕到视频")
+    parser.add_argument("--no-translate", action="store_true", help="只生成中文字幕")
+    parser.add_argument("--preset", default=None, help="烧录编码预设: preview / balanced / archival（默认取 config）")
+    parser.add_argument("--adopt-existing", action="store_true",
+                        help="沿用旧版本生成、没有缓存记录的 cn/en.srt（仅当比视频 / cn.srt 新时）")
+    args = parser.parse_args()
+
+    videos = dedupe_videos(collect_videos(args.source))
+    if not videos:
+        print(f"⚠️ 没有找到视频: {args.source}")
+        sys.exit(1)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    workers = {"extract": 2, "asr": 1, "translate": 2, "burn": 1, **CONFIG.get("batch_workers", {})}
+    queue_size = CONFIG.get("batch_queue_size", 2)
+    stages = [
+        Stage("extract", stage_extract, workers["extract"], queue_size),
+        Stage("asr", stage_asr, workers["asr"], queue_size),
+    ]
+    if not args.no_translate:
+        stages.append(Stage("translate", stage_translate, workers["translate"], queue_size))
+    if args.burn:
+        stages.append(Stage("burn", make_stage_burn(args.preset, not args.no_translate), workers["burn"], queue_size))
+
+    # 整批共用一个常驻模型：先加载，转写阶段直接命中进程级模型池
+    print("🔄 预加载 Whisper 模型...")
+    get_whisper_model(CONFIG["model_dir"], device="cpu")
+    if not args.no_translate:
+        # 翻译引擎与记忆库在开跑前建好，翻译线程不再各自懒加载
+        mb.get_translation_memory()
+
+    print(f"📦 共 {len(videos)} 个视频，流水线: " +
+          " → ".join(f"{s.name}×{s.workers}" for s in stages))
+    t0 = time.perf_counter()
+    done = [0]
+
+    def on_done(job):
+        done[0] += 1
+        status = f"❌ {job.failed_stage} 失败" if job.error else "✅"
+        print(f"[{done[0]}/{len(videos)}] {status} {job.data['video']}")
+
+    bases = job_bases(videos)
+    jobs = run_pipeline((new_job(v, args.out_dir, args.preset, args.adopt_existing, bases[v]) for v in videos),
+                        stages, on_done=on_done)
+    wall = time.perf_counter() - t0
+    mb.get_translation_memory().evict()
+
+    # ========== 汇总 ==========
+    busy = {s.name: sum(job.timings.get(s.name, 0.0) for job in jobs) for s in stages}
+    failed = [job for job in jobs if job.error]
+    print(f"\n⏱️ 总耗时 {wall:.1f}s（各阶段累计: " +
+          ", ".join(f"{name} {seconds:.1f}s" for name, seconds in busy.items()) + "）")
+    if failed:
+        print(f"⚠️ {len(failed)} 个视频失败:")
+        for job in failed:
+            print(f"   {job.data['video']}  [{job.failed_stage}] {job.error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,11 +15,16 @@ make_subtitle.py - 自动为视频生成字幕并烧录到视频中（支持手
   2) 生成中文字幕（可选简体转换，生成后可手动修改）:
      python make_subtitle.py gen-zh <video>_audio.wav
      -> 生成 <video>_zh.srt
+     gen-zh / gen-en / gen-bi 也可以直接传入视频文件，此时通过 ffmpeg 管道解码，不生成中间 WAV
 
   3) 生成英文字幕（英文翻译）:
      python make_subtitle.py gen-en <video>_audio.wav
      -> 生成 <video>_en.srt
 
+  2+3) 或者一次生成中英两份字幕（只编码一遍，中英共用同一时间轴，CPU 上约省一半时间）:
+     python make_subtitle.py gen-bi <video>_audio.wav
+     -> 生成 <video>_zh.srt 和 <video>_en.srt
+
   4) （可选）手动打开 <video>_zh.srt 修改中文内容，但**不要改动时间轴**更稳妥
 
   5) 合并中英为双语 SRT（中文在上，英文在下）:
@@ -28,18 +33,31 @@ make_subtitle.py - 自动为视频生成字幕并烧录到视频中（支持手
 
   6) 烧录双语字幕到视频:
      python make_subtitle.py burn <video.mp4> <video>_bi.srt
-     -> 生成 <video>_subtitled.mp4
+     -> 生成 <video>_subtitled.mp4（编码参数见 config.json 的 encode_preset）
+     加 --preview 则在低分辨率代理上快速烧录 -> <video>_preview.mp4，用于检查字幕
+     改完字幕重新 merge 后加 --incremental：只重编字幕有变化的片段，拼回上次的输出
 """
 
-import re
 import subprocess
 import sys
 import json
 from pathlib import Path
-from typing import List, Tuple, Optional
-from faster_whisper import WhisperModel
 from opencc import OpenCC
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 共享模块 mediakit
+from mediakit.whisper_pool import get_whisper_model
+from mediakit.asr import transcribe, transcribe_media
+from mediakit.asr_tuning import apply_host_profile, beam_size_for
+from mediakit.audio import SAMPLE_RATE, load_audio
+from mediakit.srt_stream import SRTStreamWriter, track_progress
+from mediakit.subtitles import Cues, read_srt, write_srt
+from mediakit.align import align_intervals
+from mediakit.encoding import burn, escape_filter_path, get_preset
+from mediakit.incremental_burn import burn_incremental, record_burn
+from mediakit.dual_decode import transcribe_bilingual
+from mediakit.speech_map import SpeechMap
+from mediakit.tracing import file_size, span, traced
+
 # ======================
 # 配置加载
 # ======================
@@ -51,7 +69,11 @@ DEFAULT_CONFIG = {
     "model_dir": str(BASE_DIR.parent / "models" / "faster-whisper-small"),
     "simplified": True,         # 是否把中文字幕转为简体中文
     "fontsize": 30,             # 字幕字号（SRT 全部统一大小）
-    "fontname": "SimHei"        # 字体名称
+    "fontname": "SimHei",       # 字体名称
+    "asr_workers": 0,           # >1 时按静音切块多进程并行转写（长视频）
+    "skip_silence": False,      # True 时先做能量 VAD（缓存为 <音频>.speech.json），跳过静音只转写语音段
+    "burn_workers": 0,          # >1 时按关键帧分段并行烧录字幕（长视频）
+    "encode_preset": "balanced" # 烧录编码预设: preview / balanced / archival（可在 encode_presets 中覆盖）
 }
 
 if CONFIG_PATH.exists():
@@ -63,81 +85,14 @@ else:
         json.dump(DEFAULT_CONFIG, f, indent=4, ensure_ascii=False)
     print(f"⚠️ 未找到 config.json，已生成默认配置文件: {CONFIG_PATH}")
 
-
-# ======================
-# 时间戳工具
-# ======================
-def format_timestamp(seconds: float) -> str:
-    """转为 SRT 时间戳格式 00:00:00,000"""
-    milliseconds = int(round((seconds - int(seconds)) * 1000))
-    seconds = int(seconds)
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
-
-
-def parse_timestamp(ts: str) -> float:
-    """SRT 时间戳 00:00:00,000 -> 秒"""
-    h, m, rest = ts.split(":")
-    s, ms = rest.split(",")
-    return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0
-
-
-# ======================
-# SRT 读写
-# ======================
-class SRTEntry:
-    def __init__(self, idx: int, start: float, end: float, text: str):
-        self.idx = idx
-        self.start = start
-        self.end = end
-        self.text = text  # 允许多行
-
-
-def read_srt(path: str) -> List[SRTEntry]:
-    content = Path(path).read_text(encoding="utf-8", errors="ignore")
-    # 去掉 UTF-8 BOM
-    content = content.lstrip("\ufeff")
-    blocks = re.split(r"\n{2,}", content.strip())
-    entries: List[SRTEntry] = []
-    for b in blocks:
-        lines = [ln for ln in b.splitlines() if ln.strip() != "" or True]
-        if len(lines) < 2:
-            continue
-        # 第一行可能是序号
-        idx_line = lines[0].strip()
-        idx = None
-        if re.fullmatch(r"\d+", idx_line):
-            idx = int(idx_line)
-            time_line_i = 1
-        else:
-            # 没有序号的 SRT（少见），尝试从行0读取时间
-            time_line_i = 0
-            idx = len(entries) + 1
-
-        time_line = lines[time_line_i].strip()
-        m = re.match(r"(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})", time_line)
-        if not m:
-            continue
-        start = parse_timestamp(m.group(1))
-        end = parse_timestamp(m.group(2))
-
-        text_lines = lines[time_line_i + 1 :]
-        text = "\n".join(text_lines).strip()
-        entries.append(SRTEntry(idx, start, end, text))
-    return entries
-
-
-def write_srt(entries: List[SRTEntry], path: str):
-    with open(path, "w", encoding="utf-8") as f:
-        for i, e in enumerate(entries, 1):
-            f.write(f"{i}\n{format_timestamp(e.start)} --> {format_timestamp(e.end)}\n{e.text}\n\n")
+# 本机 faster-whisper 调优结果（tune_asr.py 生成），未调优时保持默认
+apply_host_profile(CONFIG)
 
 
 # ======================
 # 影音处理
 # ======================
+@traced()
 def extract_audio(video_path: str, audio_path: str):
     """提取单声道 16kHz 音频"""
     cmd = [
@@ -154,148 +109,153 @@ def extract_audio(video_path: str, audio_path: str):
 # ======================
 # 模型调用（独立步骤）
 # ======================
-def load_model() -> WhisperModel:
-    return WhisperModel(CONFIG["model_dir"], device="cpu")
+def _is_wav(path: str) -> bool:
+    return Path(path).suffix.lower() == ".wav"
+
+
+def _transcribe(audio_path: str, task: str, language: str):
+    """WAV 走常规/并行转写；视频等其他输入直接管道解码，边解码边转写"""
+    if not (_is_wav(audio_path) and CONFIG.get("asr_workers", 0) > 1):
+        load_model()  # 预热进程级模型池，追踪里单独记录加载耗时
+    if _is_wav(audio_path):
+        return transcribe(
+            audio_path,
+            CONFIG["model_dir"],
+            task=task,
+            language=language,
+            workers=CONFIG.get("asr_workers", 0),
+            skip_silence=CONFIG.get("skip_silence", False)
+        )
+    return transcribe_media(
+        CONFIG["ffmpeg_path"],
+        audio_path,
+        CONFIG["model_dir"],
+        task=task,
+        language=language
+    )
 
 
+def load_model():
+    """从进程级模型池获取 WhisperModel（同一进程内只加载一次）"""
+    with span("model_load"):
+        return get_whisper_model(CONFIG["model_dir"], device="cpu")
+
+
+@traced()
 def generate_zh_srt(audio_path: str, zh_srt_path: str, language: str = "zh"):
     """生成中文字幕（可按配置转简体），仅中文一行"""
-    model = load_model()
     cc = OpenCC("t2s") if CONFIG.get("simplified", False) else None
 
-    segments, _ = model.transcribe(
-        audio_path,
-        beam_size=5,
-        task="transcribe",
-        language=language
-    )
+    segments, info = _transcribe(audio_path, "transcribe", language)
 
-    entries: List[SRTEntry] = []
-    for i, seg in enumerate(segments, 1):
-        text = seg.text.strip()
-        if cc:
-            text = cc.convert(text)
-        entries.append(SRTEntry(i, seg.start, seg.end, text))
-
-    write_srt(entries, zh_srt_path)
+    with span("inference", audio_seconds=info.duration), SRTStreamWriter(zh_srt_path) as writer:
+        for seg in track_progress(segments, info.duration, "中文转写"):
+            text = seg.text.strip()
+            if cc:
+                text = cc.convert(text)
+            writer.write(seg.start, seg.end, text)
     print(f"✅ 已生成中文字幕: {zh_srt_path}")
 
 
+@traced()
 def generate_en_srt(audio_path: str, en_srt_path: str, source_language: str = "zh"):
     """生成英文字幕（Whisper 翻译），仅英文一行"""
-    model = load_model()
-    segments, _ = model.transcribe(
-        audio_path,
-        beam_size=5,
-        task="translate",
-        language=source_language
-    )
+    segments, info = _transcribe(audio_path, "translate", source_language)
+
+    with span("inference", audio_seconds=info.duration), SRTStreamWriter(en_srt_path) as writer:
+        for seg in track_progress(segments, info.duration, "英文翻译"):
+            writer.write(seg.start, seg.end, seg.text.strip())
+    print(f"✅ 已生成英文字幕: {en_srt_path}")
+
 
-    entries: List[SRTEntry] = []
-    for i, seg in enumerate(segments, 1):
-        text = seg.text.strip()
-        entries.append(SRTEntry(i, seg.start, seg.end, text))
+def _transcribe_bilingual_speech(model, audio_path: str, audio, language: str):
+    """只解码语音段（段间留短静音），时间戳映射回原始时间轴；speech map 缓存在音频旁"""
+    speech_map = SpeechMap.for_audio(audio_path, audio=audio)
+    if len(speech_map.spans) == 0:
+        return
+    for seg in transcribe_bilingual(model, speech_map.compact(audio), language=language,
+                                    beam_size=beam_size_for(CONFIG["model_dir"])):
+        start, end = speech_map.to_source([seg.start, seg.end]).tolist()
+        yield seg._replace(start=start, end=end)
 
-    write_srt(entries, en_srt_path)
+
+@traced()
+def generate_bilingual_srts(audio_path: str, zh_srt_path: str, en_srt_path: str, language: str = "zh"):
+    """单次编码同时生成中文、英文字幕，两份字幕条目一一对应"""
+    model = load_model()
+    cc = OpenCC("t2s") if CONFIG.get("simplified", False) else None
+    with span("decode", bytes_in=file_size(audio_path)):
+        audio = load_audio(CONFIG["ffmpeg_path"], audio_path)
+    if CONFIG.get("skip_silence", False):
+        segments = _transcribe_bilingual_speech(model, audio_path, audio, language)
+    else:
+        segments = transcribe_bilingual(model, audio, language=language,
+                                        beam_size=beam_size_for(CONFIG["model_dir"]))
+
+    with span("inference", audio_seconds=len(audio) / SAMPLE_RATE), \
+            SRTStreamWriter(zh_srt_path) as zh_writer, SRTStreamWriter(en_srt_path) as en_writer:
+        for seg in track_progress(segments, len(audio) / SAMPLE_RATE, "中英转写"):
+            zh_writer.write(seg.start, seg.end, cc.convert(seg.zh) if cc else seg.zh)
+            en_writer.write(seg.start, seg.end, seg.en)
+    print(f"✅ 已生成中文字幕: {zh_srt_path}")
     print(f"✅ 已生成英文字幕: {en_srt_path}")
 
 
 # ======================
 # 合并（独立步骤）
 # ======================
-def align_segments_by_time(
-    zh: List[SRTEntry],
-    en: List[SRTEntry],
-    tolerance: float = 1.0
-) -> List[Tuple[SRTEntry, Optional[SRTEntry]]]:
-    """
-    将中文段落与英文段落按起始时间近似对齐。
-    - 优先一一配对（避免重复使用英文条目）
-    - 若找不到合适英文，英文为 None（会只输出中文行）
-    提示：如果你没有改动中文字幕的时间轴，通常长度一致，此步骤只是兜底。
-    """
-    result: List[Tuple[SRTEntry, Optional[SRTEntry]]] = []
-    used = [False] * len(en)
-    j = 0
-    for z in zh:
-        best_idx = None
-        best_diff = float("inf")
-        # 限制搜索窗口提高速度
-        for k in range(j, min(j + 10, len(en))):
-            if used[k]:
-                continue
-            diff = abs(en[k].start - z.start)
-            if diff < best_diff:
-                best_diff = diff
-                best_idx = k
-                if best_diff <= tolerance:
-                    break
-        if best_idx is not None:
-            result.append((z, en[best_idx]))
-            used[best_idx] = True
-            j = best_idx + 1
-        else:
-            result.append((z, None))
-    return result
-
-
+@traced()
 def merge_bilingual_srt(zh_srt_path: str, en_srt_path: str, out_path: str):
     """
     合并为双语 SRT：中文在上，英文在下。
-    - 默认按时间对齐（更稳），如果条目数量一致且时间基本一致，其实等价于按索引对齐。
-    - 如果某条没有英文匹配，会只写中文行。
+    - 按时间区间重叠度（IoU）对齐，英文分段与中文不一致时自动合并（1:N / N:1）
+    - 以中文时间轴为准；合并组的时间取组内最早开始、最晚结束
+    - 没有英文匹配的只写中文行；没有中文匹配的英文按英文时间单独成条
     """
-    zh_entries = read_srt(zh_srt_path)
-    en_entries = read_srt(en_srt_path)
-
-    pairs = align_segments_by_time(zh_entries, en_entries, tolerance=1.0)
-
-    merged: List[SRTEntry] = []
-    for i, (zh, en) in enumerate(pairs, 1):
-        # 采用中文时间轴为准；若英文存在但更长，你也可以按需改为 max()
-        start = zh.start
-        end = zh.end
-        if en is not None:
-            text = f"{zh.text}\n{en.text}"
-        else:
-            text = zh.text
-        merged.append(SRTEntry(i, start, end, text))
+    zh_cues = read_srt(zh_srt_path)
+    en_cues = read_srt(en_srt_path)
+
+    groups = align_intervals(zh_cues.starts, zh_cues.ends, en_cues.starts, en_cues.ends, tolerance=1.0)
+
+    starts, ends, texts = [], [], []
+    merged = 0
+    for zh_idx, en_idx in groups:
+        timeline, idx = (zh_cues, zh_idx) if zh_idx else (en_cues, en_idx)
+        starts.append(int(timeline.start_ms[idx].min()))
+        ends.append(int(timeline.end_ms[idx].max()))
+        zh_text = " ".join(zh_cues.texts[i] for i in zh_idx)
+        en_text = " ".join(en_cues.texts[j] for j in en_idx)
+        texts.append("\n".join(t for t in (zh_text, en_text) if t))
+        merged += len(zh_idx) > 1 or len(en_idx) > 1
 
-    write_srt(merged, out_path)
-    print(f"🈴 已合并双语字幕: {out_path}")
+    write_srt(out_path, Cues(starts, ends, texts))
+    print(f"🈴 已合并双语字幕: {out_path}（{len(groups)} 条，其中合并分段 {merged} 条）")
 
 
 # ======================
 # 烧录（独立步骤）
 # ======================
-def _escape_for_ffmpeg_subtitles(path: str) -> str:
+@traced()
+def burn_subtitles(video_path: str, srt_path: str, output_path: str, preset: str | None = None,
+                   incremental: bool = False):
     """
-    处理 Windows 路径在 subtitles 滤镜中的转义:
-    - 反斜杠 -> 双反斜杠
-    - 盘符冒号 -> '\:'
-    - 单引号 -> '\''
+    用 ffmpeg 烧录字幕（SRT 统一样式）；preset 为空时用 config 中的 encode_preset。
+    incremental=True 时与上次烧录用的字幕对比，只重编有变化的片段
     """
-    p = path.replace("\\", "\\\\")
-    # 只替换盘符处的冒号，如 C:\  -> C\:
-    if re.match(r"^[A-Za-z]:", path):
-        p = p.replace(":", r"\:", 1)
-    p = p.replace("'", r"\'")
-    return p
-
-
-def burn_subtitles(video_path: str, srt_path: str, output_path: str):
-    """用 ffmpeg 烧录字幕（SRT 统一样式）"""
     style = f"FontName={CONFIG['fontname']},Fontsize={CONFIG['fontsize']}"
-    srt_escaped = _escape_for_ffmpeg_subtitles(str(Path(srt_path).resolve()))
-    vf = f"subtitles='{srt_escaped}':force_style='{style}'"
 
-    cmd = [
-        CONFIG["ffmpeg_path"], "-y",
-        "-i", video_path,
-        "-vf", vf,
-        output_path
-    ]
-    subprocess.run(cmd, check=True)
+    def make_filter(sub: str) -> str:
+        srt_escaped = escape_filter_path(str(Path(sub).resolve()))
+        return f"subtitles='{srt_escaped}':force_style='{style}'"
+
+    encode = get_preset(preset or CONFIG.get("encode_preset"), CONFIG.get("encode_presets"))
+    workers = CONFIG.get("burn_workers", 0)
+    if incremental:
+        burn_incremental(CONFIG["ffmpeg_path"], video_path, srt_path, output_path, make_filter, encode,
+                         workers=workers)
+    else:
+        burn(CONFIG["ffmpeg_path"], video_path, srt_path, output_path, make_filter, encode, workers=workers)
+        record_burn(video_path, srt_path, output_path, make_filter, encode)
     print(f"🎬 已输出带字幕视频: {output_path}")
 
 
@@ -336,6 +296,14 @@ def main():
         en_srt = f"{base}_en.srt"
         generate_en_srt(audio, en_srt)
 
+    elif sub == "gen-bi":
+        if len(sys.argv) < 3:
+            print("用法: python make_subtitle.py gen-bi <audio.wav>")
+            sys.exit(1)
+        audio = sys.argv[2]
+        base = Path(audio).with_suffix("")
+        generate_bilingual_srts(audio, f"{base}_zh.srt", f"{base}_en.srt")
+
     elif sub == "merge":
         if len(sys.argv) < 4:
             print("用法: python make_subtitle.py merge <zh.srt> <en.srt>")
@@ -349,16 +317,20 @@ def main():
 
     elif sub == "burn":
         if len(sys.argv) < 4:
-            print("用法: python make_subtitle.py burn <video.mp4> <bilingual.srt>")
+            print("用法: python make_subtitle.py burn <video.mp4> <bilingual.srt> [--preview] [--incremental]")
             sys.exit(1)
         video = sys.argv[2]
         srt = sys.argv[3]
         base = Path(video).with_suffix("")
-        out = f"{base}_subtitled.mp4"
-        burn_subtitles(video, srt, out)
+        incremental = "--incremental" in sys.argv[4:]
+        if "--preview" in sys.argv[4:]:
+            # 低分辨率代理上快速出片，只用于检查字幕
+            burn_subtitles(video, srt, f"{base}_preview.mp4", preset="preview", incremental=incremental)
+        else:
+            burn_subtitles(video, srt, f"{base}_subtitled.mp4", incremental=incremental)
 
     else:
-        print("未知命令。可用命令: extract | gen-zh | gen-en | merge | burn")
+        print("未知命令。可用命令: extract | gen-zh | gen-en | gen-bi | merge | burn")
         sys.exit(1)
 
 
@@ -12,6 +12,10 @@ make_subtitle.py - 自动为视频生成中英文字幕并烧录到视频中（
     python make_subtitle.py input.mp4 --mode cn
     python make_subtitle.py input.mp4 --mode en
     python make_subtitle.py input.mp4 --mode ass
+
+各阶段产物记录在 outputs/<视频名>.manifest.json，输入与配置未变的阶段直接跳过；
+手工修改 cn.srt / en.srt 后重新运行，只会重跑下游阶段。
+没有缓存记录的旧 cn.srt / en.srt 默认重新生成；确认是本视频的结果时加 --adopt-existing 沿用。
 """
 
 import os
@@ -19,10 +23,23 @@ import sys
 import json
 import argparse
 import subprocess
+import threading
 from pathlib import Path
-from faster_whisper import WhisperModel
 from opencc import OpenCC
-from deep_translator import GoogleTranslator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 共享模块 mediakit
+from mediakit.whisper_pool import get_whisper_model
+from mediakit.asr import transcribe, transcribe_media
+from mediakit.asr_tuning import apply_host_profile, beam_size_for, resolve
+from mediakit.srt_stream import SRTStreamWriter, track_progress
+from mediakit.encoding import burn, escape_filter_path, get_preset
+from mediakit.stage_cache import StageCache, dir_fingerprint
+from mediakit.align import align_intervals
+from mediakit.subtitles import ass_dialogue, ass_header, ass_style, read_srt, write_ass, write_srt
+from mediakit.translation import ERROR_TEXT, GoogleBackend, TranslationEngine
+from mediakit.translation_memory import TranslationMemory
+from mediakit.zh_text import normalize_zh
+from mediakit.tracing import span, traced
 
 
 # ======================
@@ -37,7 +54,17 @@ DEFAULT_CONFIG = {
     "simplified": True,
     "fontsize_cn": 30,
     "fontsize_en": 18,
-    "fontname": "SimHei"
+    "fontname": "SimHei",
+    "stream_audio": False,  # 直接从视频管道解码送入 Whisper，不生成中间 WAV
+    "skip_silence": False,  # True 时先做能量 VAD（缓存为 <音频>.speech.json），跳过静音只转写语音段
+    "translate_workers": 4,  # 并发翻译请求数
+    "translation_max_age_days": 0,  # 翻译记忆库条目多少天未用即淘汰，0 表示不限
+    "translation_max_entries": 0,  # 翻译记忆库最多保留条目数，0 表示不限
+    "fuzzy_threshold": 0.9,  # 近似重复句复用译文的相似度阈值（0~1），0 表示只做精确匹配
+    "burn_workers": 0,  # >1 时按关键帧分段并行烧录字幕（长视频）
+    "encode_preset": "balanced",  # 烧录编码预设: preview / balanced / archival（可在 encode_presets 中覆盖）
+    "batch_workers": {"extract": 2, "asr": 1, "translate": 2, "burn": 1},  # batch_runner 各阶段线程数
+    "batch_queue_size": 2  # batch_runner 各阶段之间最多排队的视频数
 }
 
 if CONFIG_PATH.exists():
@@ -49,145 +76,363 @@ else:
         json.dump(DEFAULT_CONFIG, f, indent=4, ensure_ascii=False)
     print(f"⚠️ 未找到 config.json，已生成默认配置文件: {CONFIG_PATH}")
 
-# 翻译缓存
-CACHE_FILE = BASE_DIR / "outputs" / "translations.json"
-if CACHE_FILE.exists():
-    with open(CACHE_FILE, "r", encoding="utf-8") as f:
-        TRANSLATION_CACHE = json.load(f)
-else:
-    TRANSLATION_CACHE = {}
-
-
-def save_cache():
-    os.makedirs("outputs", exist_ok=True)
-    with open(CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(TRANSLATION_CACHE, f, ensure_ascii=False, indent=2)
+# 本机 faster-whisper 调优结果（tune_asr.py 生成），未调优时保持默认
+apply_host_profile(CONFIG)
+
+# 翻译记忆库（SQLite）；首次运行时导入旧版 translations.json
+TM_PATH = BASE_DIR / "outputs" / "translations.db"
+LEGACY_CACHE_FILE = BASE_DIR / "outputs" / "translations.json"
+_TM = None
+# batch_runner 的多个翻译线程会同时走到懒加载；可重入：建记忆库时要取翻译引擎
+_INIT_LOCK = threading.RLock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    global _TM
+    with _INIT_LOCK:
+        if _TM is None:
+            _TM = _open_translation_memory()
+    return _TM
+
+
+def _open_translation_memory() -> TranslationMemory:
+    is_new = not TM_PATH.exists()
+    tm = TranslationMemory(
+        str(TM_PATH),
+        max_age_days=CONFIG.get("translation_max_age_days", 0) or None,
+        max_entries=CONFIG.get("translation_max_entries", 0) or None,
+        fuzzy_normalizer=normalize_zh,
+    )
+    if is_new and LEGACY_CACHE_FILE.exists():
+        backend = get_translation_engine().backend
+        count = tm.import_json(str(LEGACY_CACHE_FILE), backend.source, backend.target, backend.name,
+                               skip_values=[ERROR_TEXT])
+        print(f"📦 已导入旧翻译缓存 {count} 条: {LEGACY_CACHE_FILE}")
+    return tm
+
+
+# 翻译引擎：多行打包成批、并发请求；测试时可用 set_translation_backend(LocalBackend()) 替换
+_ENGINE = None
+
+# 流式字幕每攒够这么多条送一次翻译
+STREAM_TRANSLATE_BATCH = 200
+
+
+def set_translation_backend(backend):
+    global _ENGINE
+    with _INIT_LOCK:
+        _ENGINE = TranslationEngine(backend, workers=CONFIG.get("translate_workers", 4))
+
+
+def get_translation_engine() -> TranslationEngine:
+    with _INIT_LOCK:
+        if _ENGINE is None:
+            set_translation_backend(GoogleBackend(source="zh-CN", target="en"))
+    return _ENGINE
+
+
+def translate_many(texts_cn):
+    """批量翻译中文 → 英文，带翻译记忆；只有未命中的行会发出请求，结果立即落盘"""
+    engine = get_translation_engine()
+    backend = engine.backend
+    tm = get_translation_memory()
+    with span("tm_lookup", lines=len(texts_cn)):
+        known = tm.get_many(backend.source, backend.target, backend.name, texts_cn)
+    misses = [t for t in dict.fromkeys(texts_cn) if t not in known]
+    threshold = CONFIG.get("fuzzy_threshold", 0)
+    if misses and threshold:
+        # 只差个别字词的片头/口播句直接复用相近句的译文（不写回记忆库）
+        fuzzy = tm.fuzzy_many(backend.source, backend.target, backend.name, misses, threshold)
+        if fuzzy:
+            print(f"🔁 近似匹配复用译文 {len(fuzzy)} 条")
+            known.update((cn, en) for cn, (en, _) in fuzzy.items())
+            misses = [t for t in misses if t not in fuzzy]
+    if misses:
+        with span("translate_requests", lines=len(misses), backend=backend.name):
+            fresh = dict(zip(misses, engine.translate_many(misses)))
+        # 失败的结果不进记忆库，下次重试
+        tm.put_many(backend.source, backend.target, backend.name,
+                    {cn: en for cn, en in fresh.items() if en != ERROR_TEXT})
+        known.update(fresh)
+    return [known.get(t, ERROR_TEXT) for t in texts_cn]
 
 
 def translate(text_cn: str) -> str:
     """翻译中文 → 英文，带缓存"""
-    if text_cn in TRANSLATION_CACHE:
-        return TRANSLATION_CACHE[text_cn]
-    try:
-        text_en = GoogleTranslator(source="zh-CN", target="en").translate(text_cn)
-    except Exception as e:
-        print(f"[翻译异常] {text_cn} -> {e}")
-        text_en = "[Translation Error]"
-    TRANSLATION_CACHE[text_cn] = text_en
-    return text_en
-
-
-def format_timestamp_srt(seconds: float) -> str:
-    """SRT 时间戳"""
-    ms = int((seconds - int(seconds)) * 1000)
-    seconds = int(seconds)
-    h = seconds // 3600
-    m = (seconds % 3600) // 60
-    s = seconds % 60
-    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
-
-
-def format_timestamp_ass(seconds: float) -> str:
-    """ASS 时间戳"""
-    cs = int((seconds - int(seconds)) * 100)
-    seconds = int(seconds)
-    h = seconds // 3600
-    m = (seconds % 3600) // 60
-    s = seconds % 60
-    return f"{h:d}:{m:02d}:{s:02d}.{cs:02d}"
+    return translate_many([text_cn])[0]
+
 
+def iter_translated(cn_results, batch_size: int = STREAM_TRANSLATE_BATCH):
+    """(start, end, text_cn) 流 → (start, end, text_cn, text_en) 流，按批翻译"""
+    buf = []
 
+    def flush():
+        for (start_sec, end_sec, text_cn), text_en in zip(buf, translate_many([c[2] for c in buf])):
+            yield start_sec, end_sec, text_cn, text_en
+
+    for cue in cn_results:
+        buf.append(cue)
+        if len(buf) >= batch_size:
+            yield from flush()
+            buf = []
+    if buf:
+        yield from flush()
+
+
+@traced()
 def extract_audio(video_path: str, audio_path: str):
     """提取音频"""
     cmd = [CONFIG["ffmpeg_path"], "-y", "-i", video_path, "-ar", "16000", "-ac", "1", audio_path]
     subprocess.run(cmd, check=True)
 
 
-def generate_cn_srt(audio_path: str, srt_path: str):
-    """生成中文字幕"""
-    model = WhisperModel(CONFIG["model_dir"], device="cpu")
+def iter_cn_srt(audio_path: str, srt_path: str, stream: bool = False):
+    """
+    逐段生成中文字幕：每段解码后立即写入 cn.srt 并产出 (start_sec, end_sec, text)，
+    下游的翻译 / ASS 生成可直接消费，不必等全部转写完成。
+    stream=True 时 audio_path 为视频，直接管道解码
+    """
     cc = OpenCC("t2s") if CONFIG.get("simplified", False) else None
 
-    segments, info = model.transcribe(audio_path, beam_size=5, task="transcribe", language="zh")
+    if stream:
+        segments, info = transcribe_media(CONFIG["ffmpeg_path"], audio_path, CONFIG["model_dir"],
+                                          task="transcribe", language="zh")
+    else:
+        with span("model_load"):
+            get_whisper_model(CONFIG["model_dir"], device="cpu")
+        segments, info = transcribe(audio_path, CONFIG["model_dir"], task="transcribe", language="zh",
+                                    skip_silence=CONFIG.get("skip_silence", False))
 
-    results = []
-    with open(srt_path, "w", encoding="utf-8") as f:
-        for i, seg in enumerate(segments, 1):
-            start = format_timestamp_srt(seg.start)
-            end = format_timestamp_srt(seg.end)
+    with SRTStreamWriter(srt_path) as writer:
+        for seg in track_progress(segments, info.duration):
             text = cc.convert(seg.text.strip()) if cc else seg.text.strip()
-            f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
-            results.append((seg.start, seg.end, text))
+            writer.write(seg.start, seg.end, text)
+            yield seg.start, seg.end, text
     print(f"✅ 已生成中文字幕: {srt_path}")
-    return results
+
+
+def generate_cn_srt(audio_path: str, srt_path: str, stream: bool = False):
+    """生成中文字幕，返回 [(start_sec, end_sec, text)]"""
+    return list(iter_cn_srt(audio_path, srt_path, stream=stream))
 
 
 def generate_en_srt(cn_results, srt_path: str):
-    """生成英文字幕"""
-    print(f"🌐 开始翻译英文字幕...{cn_results}")
-    with open(srt_path, "w", encoding="utf-8") as f:
-        for i, (start_sec, end_sec, text_cn) in enumerate(cn_results, 1):
-            start = format_timestamp_srt(start_sec)
-            end = format_timestamp_srt(end_sec)
-            text_en = translate(text_cn)
-            f.write(f"{i}\n{start} --> {end}\n{text_en}\n\n")
+    """生成英文字幕（cn_results 可以是列表，也可以是 iter_cn_srt 的流）"""
+    print("🌐 开始翻译英文字幕...")
+    with SRTStreamWriter(srt_path) as writer:
+        for start_sec, end_sec, _, text_en in iter_translated(cn_results):
+            writer.write(start_sec, end_sec, text_en)
     print(f"✅ 已生成英文字幕: {srt_path}")
 
-def load_srt(srt_path: str):
-    """读取已有 SRT，返回 [(start_sec, end_sec, text)]"""
-    results = []
-    with open(srt_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    i = 0
-    while i < len(lines):
-        if lines[i].strip().isdigit():
-            # 时间轴
-            time_line = lines[i+1].strip()
-            start, end = time_line.split(" --> ")
-            text = lines[i+2].strip()
-            results.append((start, end, text))
-            i += 4
-        else:
-            i += 1
-    return results
-
 
+@traced()
 def generate_en_srt_from_cn(cn_srt_path: str, en_srt_path: str):
     """读取已有 cn.srt，翻译生成 en.srt"""
-    results = load_srt(cn_srt_path)
-    with open(en_srt_path, "w", encoding="utf-8") as f:
-        for idx, (start, end, text_cn) in enumerate(results, 1):
-            text_en = translate(text_cn)
-            f.write(f"{idx}\n{start} --> {end}\n{text_en}\n\n")
+    cues = read_srt(cn_srt_path)
+    write_srt(en_srt_path, cues.with_texts(translate_many(cues.texts)))
     print(f"✅ 已根据已有中文字幕生成英文字幕: {en_srt_path}")
 
 
+def _write_bilingual_ass_header(f):
+    f.write(ass_header([
+        ass_style("CN", CONFIG["fontname"], CONFIG["fontsize_cn"], 10),
+        ass_style("EN", CONFIG["fontname"], CONFIG["fontsize_en"], 30),
+    ]))
+
+
+def _write_bilingual_dialogue(f, start_sec: float, end_sec: float, text_cn: str, text_en: str):
+    start_ms, end_ms = int(round(start_sec * 1000)), int(round(end_sec * 1000))
+    f.write(ass_dialogue(start_ms, end_ms, "CN", 120, f"{{\\c&H00FF00&}}{text_cn}"))
+    f.write(ass_dialogue(start_ms, end_ms, "EN", 80, f"{{\\c&HFF0000&}}{text_en}"))
+
+
 def generate_ass(cn_results, ass_path: str):
     """合并生成双语字幕"""
     with open(ass_path, "w", encoding="utf-8") as f:
-        f.write("[Script Info]\nScriptType: v4.00+\nPlayResX: 1920\nPlayResY: 1080\n\n")
-        f.write("[V4+ Styles]\n")
-        f.write(f"Style: CN,{CONFIG['fontname']},{CONFIG['fontsize_cn']},&H00FFFFFF,&H000000FF,&H00000000,&H64000000,-1,0,0,0,100,100,0,0,1,2,2,2,10,10,10,1\n")
-        f.write(f"Style: EN,{CONFIG['fontname']},{CONFIG['fontsize_en']},&H00FFFFFF,&H000000FF,&H00000000,&H64000000,-1,0,0,0,100,100,0,0,1,2,2,2,10,10,30,1\n\n")
-        f.write("[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
-
-        for start_sec, end_sec, text_cn in cn_results:
-            start = format_timestamp_ass(start_sec)
-            end = format_timestamp_ass(end_sec)
-            text_en = translate(text_cn)
-            f.write(f"Dialogue: 0,{start},{end},CN,,0,0,120,,{{\\c&H00FF00&}}{text_cn}\n")
-            f.write(f"Dialogue: 0,{start},{end},EN,,0,0,80,,{{\\c&HFF0000&}}{text_en}\n")
+        _write_bilingual_ass_header(f)
+        for start_sec, end_sec, text_cn, text_en in iter_translated(cn_results):
+            _write_bilingual_dialogue(f, start_sec, end_sec, text_cn, text_en)
     print(f"✅ 已生成双语字幕: {ass_path}")
 
 
-def burn_subtitles(video_path: str, ass_path: str, output_path: str):
-    """烧录字幕"""
-    cmd = [CONFIG["ffmpeg_path"], "-y", "-i", video_path, "-vf", f"ass={ass_path}", output_path]
-    subprocess.run(cmd, check=True)
+@traced()
+def generate_en_and_ass(cn_stream, en_srt_path: str, ass_path: str):
+    """
+    流水线：消费中文字幕流，按批翻译，同时写出 en.srt 和双语 ass，
+    每批写完即 flush，长视频无需把整份字幕留在内存里。
+    """
+    with SRTStreamWriter(en_srt_path) as en_writer, open(ass_path, "w", encoding="utf-8") as f:
+        _write_bilingual_ass_header(f)
+        for start_sec, end_sec, text_cn, text_en in iter_translated(cn_stream):
+            en_writer.write(start_sec, end_sec, text_en)
+            _write_bilingual_dialogue(f, start_sec, end_sec, text_cn, text_en)
+            f.flush()
+    print(f"✅ 已生成英文字幕: {en_srt_path}")
+    print(f"✅ 已生成双语字幕: {ass_path}")
+
+
+@traced()
+def burn_subtitles(video_path: str, ass_path: str, output_path: str, preset: str | None = None):
+    """烧录字幕（preset 为空时用 config 中的 encode_preset）"""
+    encode = get_preset(preset or CONFIG.get("encode_preset"), CONFIG.get("encode_presets"))
+
+    def make_filter(sub: str) -> str:
+        return f"ass='{escape_filter_path(sub)}'"
+
+    burn(CONFIG["ffmpeg_path"], video_path, ass_path, output_path, make_filter, encode,
+         workers=CONFIG.get("burn_workers", 0))
     print(f"🎬 已输出带字幕视频: {output_path}")
 
 
+# ======================
+# 阶段缓存：各阶段键 = 上游标识 + 相关配置
+# ======================
+def _asr_params(stream: bool) -> dict:
+    params = {"model": dir_fingerprint(CONFIG["model_dir"]), "beam_size": beam_size_for(CONFIG["model_dir"]),
+              "language": "zh", "simplified": CONFIG.get("simplified", False), "stream": stream}
+    compute_type, _, _ = resolve(CONFIG["model_dir"])
+    if compute_type != "default":
+        # 调优后的量化方式会影响转写结果
+        params["compute_type"] = compute_type
+    if CONFIG.get("skip_silence", False) and not stream:
+        # 跳过静音后解码窗口不同，转写结果也可能不同
+        params["skip_silence"] = True
+    return params
+
+
+def _translate_key(cache: StageCache, cn_srt: str) -> str:
+    backend = get_translation_engine().backend
+    return cache.key("translate", [cache.content_hash(cn_srt)],
+                     {"backend": backend.name, "source": backend.source, "target": backend.target,
+                      "fuzzy_threshold": CONFIG.get("fuzzy_threshold", 0)})
+
+
+def _ass_key(cache: StageCache, stage: str, srt_paths) -> str:
+    return cache.key(stage, [cache.content_hash(p) for p in srt_paths],
+                     {"fontname": CONFIG["fontname"], "fontsize_cn": CONFIG["fontsize_cn"],
+                      "fontsize_en": CONFIG["fontsize_en"]})
+
+
+@traced()
+def generate_ass_from_srts(cn_srt_path: str, en_srt_path: str, ass_path: str):
+    """由 cn.srt + en.srt 生成双语 ass；条数不一致（手工改过）时按时间区间对齐"""
+    cn = read_srt(cn_srt_path)
+    en = read_srt(en_srt_path)
+    if len(cn) == len(en):
+        groups = [([i], [i]) for i in range(len(cn))]
+    else:
+        groups = align_intervals(cn.starts, cn.ends, en.starts, en.ends)
+
+    events = []
+    for cn_idx, en_idx in groups:
+        timeline, idx = (cn, cn_idx) if cn_idx else (en, en_idx)
+        start, end = int(timeline.start_ms[idx].min()), int(timeline.end_ms[idx].max())
+        if cn_idx:
+            events.append((start, end, "CN", 120, "{\\c&H00FF00&}" + " ".join(cn.texts[i] for i in cn_idx)))
+        if en_idx:
+            events.append((start, end, "EN", 80, "{\\c&HFF0000&}" + " ".join(en.texts[j] for j in en_idx)))
+    write_ass(ass_path, [
+        ass_style("CN", CONFIG["fontname"], CONFIG["fontsize_cn"], 10),
+        ass_style("EN", CONFIG["fontname"], CONFIG["fontsize_en"], 30),
+    ], events)
+    print(f"✅ 已生成双语字幕: {ass_path}")
+
+
+@traced()
+def generate_single_ass(srt_path: str, ass_path: str, lang: str):
+    """单语 ass（只烧中文或只烧英文时用）"""
+    cues = read_srt(srt_path)
+    if lang == "cn":
+        style = ass_style("CN", CONFIG["fontname"], CONFIG["fontsize_cn"], 40)
+        events = ((start, end, "CN", 120, f"{{\\c&H00FF00&}}{text}") for start, end, text in cues.iter_ms())
+    else:
+        style = ass_style("EN", CONFIG["fontname"], CONFIG["fontsize_en"], 20)
+        events = ((start, end, "EN", 80, f"{{\\c&HFF0000&}}{text}") for start, end, text in cues.iter_ms())
+    write_ass(ass_path, [style], events)
+
+
+# ======================
+# 各阶段（带缓存检查），main 与 batch_runner 共用
+# ======================
+def _transcribe_key(cache: StageCache, video_hash: str, stream: bool):
+    """返回 (转写的上游标识, 转写阶段键)；流式解码时上游直接是视频"""
+    extract_key = cache.key("extract", [video_hash], {"ar": 16000, "ac": 1})
+    asr_upstream = video_hash if stream else extract_key
+    return asr_upstream, cache.key("transcribe", [asr_upstream], _asr_params(stream))
+
+
+def run_extract(cache: StageCache, video_path: str, video_hash: str, audio_file: str):
+    key = cache.key("extract", [video_hash], {"ar": 16000, "ac": 1})
+    if not cache.fresh("extract", key, audio_file):
+        extract_audio(video_path, audio_file)
+        cache.record("extract", key, audio_file, upstream=[video_hash])
+
+
+@traced()
+def run_transcribe(cache: StageCache, video_path: str, video_hash: str, audio_file: str, cn_srt: str,
+                   adopt: bool = False):
+    """adopt=True 时沿用没有缓存记录、但比视频新的 cn.srt（旧版本生成的结果）"""
+    stream = CONFIG.get("stream_audio", False)
+    asr_upstream, key = _transcribe_key(cache, video_hash, stream)
+    if cache.fresh("transcribe", key, cn_srt, adopt_if_newer_than=video_path if adopt else None):
+        print(f"⏭️ 中文字幕已是最新，跳过转写: {cn_srt}")
+        return
+    if not stream:
+        run_extract(cache, video_path, video_hash, audio_file)
+    for _ in iter_cn_srt(video_path if stream else audio_file, cn_srt, stream=stream):
+        pass
+    cache.record("transcribe", key, cn_srt, upstream=[asr_upstream])
+
+
+def run_translate(cache: StageCache, cn_srt: str, en_srt: str, adopt: bool = False):
+    """adopt=True 时沿用没有缓存记录、但比 cn.srt 新的 en.srt"""
+    if not Path(cn_srt).exists():
+        print("⚠️ 未找到 cn.srt，请先生成中文字幕！")
+        return
+    key = _translate_key(cache, cn_srt)
+    if cache.fresh("translate", key, en_srt, adopt_if_newer_than=cn_srt if adopt else None):
+        print(f"⏭️ 英文字幕已是最新，跳过翻译: {en_srt}")
+    else:
+        generate_en_srt_from_cn(cn_srt, en_srt)
+        cache.record("translate", key, en_srt, upstream=[cache.content_hash(cn_srt)])
+
+
+def run_ass(cache: StageCache, cn_srt: str, en_srt: str, ass_file: str):
+    if not (Path(cn_srt).exists() and Path(en_srt).exists()):
+        print("⚠️ 未找到 cn.srt / en.srt，无法生成ass字幕！")
+        return
+    key = _ass_key(cache, "ass", [cn_srt, en_srt])
+    if cache.fresh("ass", key, ass_file):
+        print(f"⏭️ 双语字幕已是最新: {ass_file}")
+    else:
+        generate_ass_from_srts(cn_srt, en_srt, ass_file)
+        cache.record("ass", key, ass_file)
+
+
+def run_single_ass(cache: StageCache, srt_path: str, ass_path: str, lang: str) -> bool:
+    """单语 srt → ass（烧录单语字幕用）；srt 不存在时返回 False"""
+    if not Path(srt_path).exists():
+        print(f"⚠️ 未找到 {lang}.srt，无法烧录字幕！")
+        return False
+    key = _ass_key(cache, f"ass_{lang}", [srt_path])
+    if not cache.fresh(f"ass_{lang}", key, ass_path):
+        generate_single_ass(srt_path, ass_path, lang)
+        cache.record(f"ass_{lang}", key, ass_path)
+    return True
+
+
+def run_burn(cache: StageCache, video_path: str, video_hash: str, ass_path: str, out_file: str,
+             preset: str | None = None):
+    encode = get_preset(preset or CONFIG.get("encode_preset"), CONFIG.get("encode_presets"))
+    stage = f"burn:{Path(out_file).name}"
+    key = cache.key(stage, [video_hash, cache.content_hash(ass_path)], encode)
+    if cache.fresh(stage, key, out_file):
+        print(f"⏭️ 字幕与编码参数均未变化，跳过烧录: {out_file}")
+    else:
+        burn_subtitles(video_path, ass_path, out_file, preset=preset)
+        cache.record(stage, key, out_file)
+
+
 def main():
     # 设置全局代理，deep-translator/requests 会自动读取
     os.environ["HTTP_PROXY"] = "http://127.0.0.1:1081"
@@ -197,6 +442,9 @@ def main():
     parser.add_argument("--mode", choices=["all", "cn", "en", "ass"], default="all", help="生成模式")
     parser.add_argument("--burn", action="store_true", help="是否烧录字幕到视频")
     parser.add_argument("--no-translate", action="store_true", help="只生成中文字幕")
+    parser.add_argument("--preset", default=None, help="烧录编码预设: preview / balanced / archival（默认取 config）")
+    parser.add_argument("--adopt-existing", action="store_true",
+                        help="沿用旧版本生成、没有缓存记录的 cn/en.srt（仅当比视频 / cn.srt 新时）")
     args = parser.parse_args()
 
     os.makedirs("outputs", exist_ok=True)
@@ -205,159 +453,64 @@ def main():
     cn_srt = f"outputs/{base}_cn.srt"
     en_srt = f"outputs/{base}_en.srt"
     ass_file = f"outputs/{base}.ass"
-    out_file = f"outputs/{base}_subtitled.mp4"
-
-    # 优先判断是否已存在cn.srt和en.srt，若都存在则直接合并生成ass
-    cn_srt_exists = Path(cn_srt).exists()
-    en_srt_exists = Path(en_srt).exists()
-    cn_results = None
-
-    if args.mode in ("ass", "all") and cn_srt_exists and en_srt_exists:
-        # 直接读取cn.srt合并生成ass
-        def parse_time(t):
-            h,m,s_ms = t.split(":")
-            s,ms = s_ms.split(",")
-            return int(h)*3600+int(m)*60+int(s)+int(ms)/1000
-        cn_results = []
-        with open(cn_srt, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        i = 0
-        while i < len(lines):
-            if lines[i].strip().isdigit():
-                time_line = lines[i+1].strip()
-                start, end = time_line.split(" --> ")
-                text = lines[i+2].strip()
-                cn_results.append((parse_time(start), parse_time(end), text))
-                i += 4
-            else:
-                i += 1
-        generate_ass(cn_results, ass_file)
-    else:
-        # 只在需要时生成中文字幕
-        if args.mode in ("all", "cn"):
-            if not Path(cn_srt).exists():
-                extract_audio(args.video, audio_file)
-                cn_results = generate_cn_srt(audio_file, cn_srt)
-            else:
-                cn_results = None
+    out_file = f"outputs/{base}_preview.mp4" if args.preset == "preview" else f"outputs/{base}_subtitled.mp4"
+
+    # 每个阶段的产物都按 (上游内容 + 相关配置) 记在 manifest 里，未变化的阶段直接跳过；
+    # 手工修改 cn.srt / en.srt 后只有下游阶段会重跑
+    cache = StageCache(f"outputs/{base}.manifest.json")
+    video_hash = cache.source_hash(args.video)
+    stream = CONFIG.get("stream_audio", False)
+    translate_on = not args.no_translate
+
+    # ========== 抽取音频 + 转写 ==========
+    if args.mode in ("all", "cn"):
+        asr_upstream, cn_key = _transcribe_key(cache, video_hash, stream)
+        adopt_from = args.video if args.adopt_existing else None
+        if cache.fresh("transcribe", cn_key, cn_srt, adopt_if_newer_than=adopt_from):
+            print(f"⏭️ 中文字幕已是最新，跳过转写: {cn_srt}")
         else:
-            cn_results = None
-
-        if not args.no_translate:
-            if args.mode in ("all", "en"):
-                if Path(en_srt).exists():
-                    pass  # 已有英文字幕，跳过生成
-                elif Path(cn_srt).exists():
-                    generate_en_srt_from_cn(cn_srt, en_srt)
-                else:
-                    print("⚠️ 未找到 cn.srt，请先生成中文字幕！")
-            if args.mode in ("all", "ass"):
-                if Path(ass_file).exists():
-                    pass  # 已有ass，跳过生成
-                else:
-                    # 生成ass时需要cn_results，如果没有则从srt加载
-                    if cn_results is None and Path(cn_srt).exists():
-                        def parse_time(t):
-                            h,m,s_ms = t.split(":")
-                            s,ms = s_ms.split(",")
-                            return int(h)*3600+int(m)*60+int(s)+int(ms)/1000
-                        cn_results = []
-                        with open(cn_srt, "r", encoding="utf-8") as f:
-                            lines = f.readlines()
-                        i = 0
-                        while i < len(lines):
-                            if lines[i].strip().isdigit():
-                                time_line = lines[i+1].strip()
-                                start, end = time_line.split(" --> ")
-                                text = lines[i+2].strip()
-                                cn_results.append((parse_time(start), parse_time(end), text))
-                                i += 4
-                            else:
-                                i += 1
-                    if cn_results:
-                        generate_ass(cn_results, ass_file)
-                    else:
-                        print("⚠️ 未找到 cn.srt，无法生成ass字幕！")
-
-    # ========== 烧录字幕 ========== 
-    if args.burn:
-        if args.mode == "cn":
-            # 烧录中文字幕
-            if Path(cn_srt).exists():
-                # 先将cn.srt转ass
-                def parse_time(t):
-                    h,m,s_ms = t.split(":")
-                    s,ms = s_ms.split(",")
-                    return int(h)*3600+int(m)*60+int(s)+int(ms)/1000
-                cn_results = []
-                with open(cn_srt, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                i = 0
-                while i < len(lines):
-                    if lines[i].strip().isdigit():
-                        time_line = lines[i+1].strip()
-                        start, end = time_line.split(" --> ")
-                        text = lines[i+2].strip()
-                        cn_results.append((parse_time(start), parse_time(end), text))
-                        i += 4
-                    else:
-                        i += 1
-                # 只生成中文ass
-                ass_path = f"outputs/{base}_cn.ass"
-                with open(ass_path, "w", encoding="utf-8") as f:
-                    f.write("[Script Info]\nScriptType: v4.00+\nPlayResX: 1920\nPlayResY: 1080\n\n")
-                    f.write("[V4+ Styles]\n")
-                    f.write(f"Style: CN,{CONFIG['fontname']},{CONFIG['fontsize_cn']},&H00FFFFFF,&H000000FF,&H00000000,&H64000000,-1,0,0,0,100,100,0,0,1,2,2,2,10,10,40,1\n\n")
-                    f.write("[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
-                    for start_sec, end_sec, text_cn in cn_results:
-                        start = format_timestamp_ass(start_sec)
-                        end = format_timestamp_ass(end_sec)
-                        f.write(f"Dialogue: 0,{start},{end},CN,,0,0,120,,{{\\c&H00FF00&}}{text_cn}\n")
-                burn_subtitles(args.video, ass_path, out_file)
-            else:
-                print("⚠️ 未找到 cn.srt，无法烧录中文字幕！")
-        elif args.mode == "en":
-            # 烧录英文字幕
-            if Path(en_srt).exists():
-                # 先将en.srt转ass
-                def parse_time(t):
-                    h,m,s_ms = t.split(":")
-                    s,ms = s_ms.split(",")
-                    return int(h)*3600+int(m)*60+int(s)+int(ms)/1000
-                en_results = []
-                with open(en_srt, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                i = 0
-                while i < len(lines):
-                    if lines[i].strip().isdigit():
-                        time_line = lines[i+1].strip()
-                        start, end = time_line.split(" --> ")
-                        text = lines[i+2].strip()
-                        en_results.append((parse_time(start), parse_time(end), text))
-                        i += 4
-                    else:
-                        i += 1
-                # 只生成英文ass
-                ass_path = f"outputs/{base}_en.ass"
-                with open(ass_path, "w", encoding="utf-8") as f:
-                    f.write("[Script Info]\nScriptType: v4.00+\nPlayResX: 1920\nPlayResY: 1080\n\n")
-                    f.write("[V4+ Styles]\n")
-                    f.write(f"Style: EN,{CONFIG['fontname']},{CONFIG['fontsize_en']},&H00FFFFFF,&H000000FF,&H00000000,&H64000000,-1,0,0,0,100,100,0,0,1,2,2,2,10,10,20,1\n\n")
-                    f.write("[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
-                    for start_sec, end_sec, text_en in en_results:
-                        start = format_timestamp_ass(start_sec)
-                        end = format_timestamp_ass(end_sec)
-                        f.write(f"Dialogue: 0,{start},{end},EN,,0,0,80,,{{\\c&HFF0000&}}{text_en}\n")
-                burn_subtitles(args.video, ass_path, out_file)
+            if stream:
+                cn_stream = iter_cn_srt(args.video, cn_srt, stream=True)
             else:
-                print("⚠️ 未找到 en.srt，无法烧录英文字幕！")
-        elif args.mode in ("all", "ass"):
-            if Path(ass_file).exists():
-                burn_subtitles(args.video, ass_file, out_file)
+                run_extract(cache, args.video, video_hash, audio_file)
+                cn_stream = iter_cn_srt(audio_file, cn_srt)
+
+            if args.mode == "all" and translate_on:
+                # 转写 → 翻译 → en.srt / ass 边产出边消费，完成后补记下游阶段
+                generate_en_and_ass(cn_stream, en_srt, ass_file)
+                cache.record("transcribe", cn_key, cn_srt, upstream=[asr_upstream])
+                cache.record("translate", _translate_key(cache, cn_srt), en_srt)
+                cache.record("ass", _ass_key(cache, "ass", [cn_srt, en_srt]), ass_file)
             else:
-                print("⚠️ 未找到 ass 文件，无法烧录中英文字幕！")
+                for _ in cn_stream:
+                    pass
+                cache.record("transcribe", cn_key, cn_srt, upstream=[asr_upstream])
+
+    # ========== 翻译 + 双语 ASS ==========
+    # --mode ass 只有 cn.srt 时先翻译出 en.srt；已有 en.srt 则原样使用
+    if translate_on and (args.mode in ("all", "en") or (args.mode == "ass" and not Path(en_srt).exists())):
+        run_translate(cache, cn_srt, en_srt, adopt=args.adopt_existing)
+    if translate_on and args.mode in ("all", "ass"):
+        run_ass(cache, cn_srt, en_srt, ass_file)
+
+    # ========== 烧录字幕 ==========
+    if args.burn:
+        if args.mode in ("cn", "en"):
+            # 只烧录单语字幕：先由 srt 转 ass
+            srt_path = cn_srt if args.mode == "cn" else en_srt
+            burn_ass = f"outputs/{base}_{args.mode}.ass"
+            if not run_single_ass(cache, srt_path, burn_ass, args.mode):
+                burn_ass = None
+        elif Path(ass_file).exists():
+            burn_ass = ass_file
+        else:
+            print("⚠️ 未找到 ass 文件，无法烧录中英文字幕！")
+            burn_ass = None
+
+        if burn_ass is not None:
+            run_burn(cache, args.video, video_hash, burn_ass, out_file, args.preset)
 
-    save_cache()
+    get_translation_memory().evict()
 
 
 if __name__ == "__main__":
@@ -15,9 +15,16 @@ import subprocess
 import sys
 import json
 from pathlib import Path
-from faster_whisper import WhisperModel
 from opencc import OpenCC
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 共享模块 mediakit
+from mediakit.asr import transcribe, transcribe_media
+from mediakit.asr_tuning import apply_host_profile
+from mediakit.whisper_pool import get_whisper_model
+from mediakit.srt_stream import SRTStreamWriter, track_progress
+from mediakit.encoding import burn, escape_filter_path, get_preset
+from mediakit.tracing import span, traced
+
 # ======================
 # 配置加载
 # ======================
@@ -29,7 +36,12 @@ DEFAULT_CONFIG = {
     "model_dir": str(BASE_DIR.parent / "models" / "faster-whisper-small"),
     "simplified": True,         # 是否转为简体中文
     "fontsize": 30,             # 字幕字号
-    "fontname": "SimHei"        # 字体名称
+    "fontname": "SimHei",       # 字体名称
+    "asr_workers": 0,           # >1 时按静音切块多进程并行转写（长视频）
+    "skip_silence": False,      # True 时先做能量 VAD（缓存为 <音频>.speech.json），跳过静音只转写语音段
+    "stream_audio": False,      # 直接从视频管道解码送入 Whisper，不生成中间 WAV
+    "burn_workers": 0,          # >1 时按关键帧分段并行烧录字幕（长视频）
+    "encode_preset": "balanced" # 烧录编码预设: preview / balanced / archival（可在 encode_presets 中覆盖）
 }
 
 if CONFIG_PATH.exists():
@@ -41,17 +53,11 @@ else:
         json.dump(DEFAULT_CONFIG, f, indent=4, ensure_ascii=False)
     print(f"⚠️ 未找到 config.json，已生成默认配置文件: {CONFIG_PATH}")
 
-
-def format_timestamp(seconds: float) -> str:
-    """转为 SRT 时间戳格式 00:00:00,000"""
-    milliseconds = int((seconds - int(seconds)) * 1000)
-    seconds = int(seconds)
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    secs = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+# 本机 faster-whisper 调优结果（tune_asr.py 生成），未调优时保持默认
+apply_host_profile(CONFIG)
 
 
+@traced()
 def extract_audio(video_path: str, audio_path: str):
     """提取单声道 16kHz 音频"""
     cmd = [
@@ -64,41 +70,54 @@ def extract_audio(video_path: str, audio_path: str):
     subprocess.run(cmd, check=True)
 
 
-def generate_srt(audio_path: str, srt_path: str):
-    """调用 faster-whisper 生成字幕文件"""
-    model = WhisperModel(CONFIG["model_dir"], device="cpu")
-
+@traced()
+def generate_srt(audio_path: str, srt_path: str, stream: bool = False):
+    """调用 faster-whisper 生成字幕文件；stream=True 时 audio_path 为视频，直接管道解码"""
     cc = OpenCC("t2s") if CONFIG.get("simplified", False) else None
 
-    segments, info = model.transcribe(
-        audio_path,
-        beam_size=5,
-        task="transcribe",
-        language="zh"
-    )
-
-    with open(srt_path, "w", encoding="utf-8") as f:
-        for i, seg in enumerate(segments, 1):
-            start = format_timestamp(seg.start)
-            end = format_timestamp(seg.end)
+    if stream:
+        segments, info = transcribe_media(
+            CONFIG["ffmpeg_path"],
+            audio_path,
+            CONFIG["model_dir"],
+            task="transcribe",
+            language="zh"
+        )
+    else:
+        if CONFIG.get("asr_workers", 0) <= 1:
+            with span("model_load"):
+                get_whisper_model(CONFIG["model_dir"], device="cpu")
+        segments, info = transcribe(
+            audio_path,
+            CONFIG["model_dir"],
+            task="transcribe",
+            language="zh",
+            workers=CONFIG.get("asr_workers", 0),
+            skip_silence=CONFIG.get("skip_silence", False)
+        )
+
+    # 每段解码出来即写入，转写过程中即可查看已生成的字幕
+    with span("inference", audio_seconds=info.duration), SRTStreamWriter(srt_path) as writer:
+        for seg in track_progress(segments, info.duration):
             text = seg.text.strip()
             if cc:
                 text = cc.convert(text)
-            f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
+            writer.write(seg.start, seg.end, text)
 
     print(f"✅ 已生成字幕文件: {srt_path}")
 
 
-def burn_subtitles(video_path: str, srt_path: str, output_path: str):
-    """用 ffmpeg 烧录字幕"""
+@traced()
+def burn_subtitles(video_path: str, srt_path: str, output_path: str, preset: str | None = None):
+    """用 ffmpeg 烧录字幕（preset 为空时用 config 中的 encode_preset）"""
     style = f"FontName={CONFIG['fontname']},Fontsize={CONFIG['fontsize']}"
-    cmd = [
-        CONFIG["ffmpeg_path"], "-y",
-        "-i", video_path,
-        "-vf", f"subtitles={srt_path}:force_style='{style}'",
-        output_path
-    ]
-    subprocess.run(cmd, check=True)
+    encode = get_preset(preset or CONFIG.get("encode_preset"), CONFIG.get("encode_presets"))
+
+    def make_filter(sub: str) -> str:
+        return f"subtitles='{escape_filter_path(sub)}':force_style='{style}'"
+
+    burn(CONFIG["ffmpeg_path"], video_path, srt_path, output_path, make_filter, encode,
+         workers=CONFIG.get("burn_workers", 0))
     print(f"🎬 已输出带字幕视频: {output_path}")
 
 
@@ -114,8 +133,11 @@ def main():
     srt_file = f"outputs/{base}.srt"
     out_file = f"outputs/{base}_subtitled.mp4"
 
-    extract_audio(video_file, audio_file)
-    generate_srt(audio_file, srt_file)
+    if CONFIG.get("stream_audio", False):
+        generate_srt(video_file, srt_file, stream=True)
+    else:
+        extract_audio(video_file, audio_file)
+        generate_srt(audio_file, srt_file)
     burn_subtitles(video_file, srt_file, out_file)
 
 
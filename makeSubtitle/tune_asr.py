@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+tune_asr.py - 为本机自动调优 faster-whisper 的 CPU 推理参数
+
+从给定音频 / 视频中段截取校准片段，测试 compute_type（int8 / int8_float32 / float32）、
+线程数、beam_size 与 num_workers 的组合，在与基准（float32 + beam 5）字符一致率不低于 1 - tolerance
+的组合中选最快的，写入 config.json 的 asr_profiles.<主机名>.<模型目录名>。
+make_subtitle.py / bilingual.py / make_bisubtitle.py / batch_runner.py 以及 ttsVideo 的 MediaProcessor
+加载配置时会自动使用本机的调优结果。
+
+用法:
+    python tune_asr.py outputs/a_audio.wav
+    python tune_asr.py input.mp4 --clip 90 --tolerance 0.03
+    python tune_asr.py outputs/a_audio.wav --quick          # 只测 int8 / beam 1,5，几分钟出结果
+    python tune_asr.py --show                              # 查看本机当前配置
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 共享模块 mediakit
+from mediakit.asr_tuning import COMPUTE_TYPES, host_id, save_profile, tune
+from mediakit.zh_text import normalize_zh
+
+BASE_DIR = Path(__file__).resolve().parent
+CONFIG_PATH = BASE_DIR / "config.json"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("media", nargs="?", help="校准用的音频或视频（取中段）")
+    parser.add_argument("--clip", type=float, default=60, help="校准片段时长（秒）")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="允许的字符不一致率（相对基准）")
+    parser.add_argument("--language", default="zh")
+    parser.add_argument("--threads", default=None, help="逗号分隔的线程数，默认按核数取 1/4、1/2、全部")
+    parser.add_argument("--beams", default="1,2,5", help="逗号分隔的 beam_size")
+    parser.add_argument("--workers", default="1,2", help="逗号分隔的 num_workers")
+    parser.add_argument("--quick", action="store_true", help="只测 int8 与 beam 1,5")
+    parser.add_argument("--dry-run", action="store_true", help="只打印结果，不写 config.json")
+    parser.add_argument("--show", action="store_true", help="显示本机已保存的调优结果")
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    if args.show:
+        profiles = config.get("asr_profiles", {}).get(host_id(), {})
+        print(json.dumps(profiles, indent=2, ensure_ascii=False) if profiles else f"⚠️ 本机（{host_id()}）尚未调优")
+        return
+    if not args.media:
+        parser.error("需要校准用的音频或视频")
+
+    def ints(text):
+        return [int(x) for x in text.split(",") if x.strip()]
+
+    profile = tune(
+        config["ffmpeg_path"], args.media, config["model_dir"],
+        clip_seconds=args.clip,
+        language=args.language,
+        compute_types=("int8",) if args.quick else COMPUTE_TYPES,
+        threads=ints(args.threads) if args.threads else None,
+        beam_sizes=(1, 5) if args.quick else ints(args.beams),
+        workers=ints(args.workers),
+        tolerance=args.tolerance,
+        normalize=normalize_zh if args.language == "zh" else None,
+    )
+    if args.dry_run:
+        print(json.dumps(profile, indent=2, ensure_ascii=False))
+        return
+    save_profile(str(CONFIG_PATH), config["model_dir"], profile)
+    print(f"💾 已写入 {CONFIG_PATH}（asr_profiles.{host_id()}.{Path(config['model_dir']).name}）")
+
+
+if __name__ == "__main__":
+    main()
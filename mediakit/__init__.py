@@ -0,0 +1,8 @@
+"""
+mediakit - ttsVideo / makeSubtitle / cog 共用的基础模块
+
+各脚本都在自己的目录下运行，使用前需把仓库根目录加入 sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+Cog 容器里只有 cog/ 目录，predictor.py 用到的模块在 cog/mediakit/ 下另有一份拷贝。
+"""
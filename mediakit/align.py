@@ -0,0 +1,171 @@
+"""
+align.py - 两条字幕轨按时间区间对齐（支持 1:N / N:1 合并）
+
+逐条比较起始时间、只在固定窗口内搜索的做法，在英文轨分段与中文不一致（漂移超过窗口）时
+会静默丢失匹配，也无法把一条英文对应到多条中文。这里改为在区间数组上:
+  1. 按起点排序后二分 + 扫描，找出所有时间上有重叠的 (a, b) 对 —— O(n log n + k)
+  2. 每条 a 取 IoU 最高的 b，每条 b 取 IoU 最高的 a
+  3. 互为最优的 (a, b) 直接成组；单向的最优边按 IoU 从高到低尝试合并，
+     合并后两侧条目各自覆盖组时间跨度不足 min_coverage 时拒绝（防止半条错位时一路串成一个大组）
+     —— 一组里可以是 1:1、1:N、N:1
+  4. 没有任何重叠的条目按中点找 tolerance 秒内最近的另一侧分组挂靠，仍找不到则单独成组
+
+用法:
+    groups = align_intervals(zh.starts, zh.ends, en.starts, en.ends)
+    for zh_idx, en_idx in groups: ...   # 两个下标列表，其中一侧可能为空
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+def _starts_within(s_start, e_start, e_end, strict: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    起点落在 e 区间内的 s: 返回 (s 下标, e 下标)。
+    每个候选区间只由 e 自身的起止界定，耗时 O(n log n + 命中数)，不受个别超长条目影响。
+    strict=True 时起点相同不算（避免两个方向重复计数）
+    """
+    order = np.argsort(s_start, kind="stable")
+    ss = s_start[order]
+    lo = np.searchsorted(ss, e_start, side="right" if strict else "left")
+    hi = np.searchsorted(ss, e_end, side="left")
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    ej = np.repeat(np.arange(len(e_start)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return order[np.repeat(lo, counts) + offsets], ej
+
+
+def overlap_pairs(a_start, a_end, b_start, b_end) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """返回所有重叠对 (a 下标, b 下标, IoU)"""
+    a_start = np.asarray(a_start, dtype=np.float64)
+    a_end = np.asarray(a_end, dtype=np.float64)
+    b_start = np.asarray(b_start, dtype=np.float64)
+    b_end = np.asarray(b_end, dtype=np.float64)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if len(a_start) == 0 or len(b_start) == 0:
+        return empty
+
+    # 两个区间重叠 <=> 后开始的那个起点落在先开始的那个区间内
+    a_in, b_of = _starts_within(a_start, b_start, b_end, strict=False)
+    b_in, a_of = _starts_within(b_start, a_start, a_end, strict=True)
+    ai = np.concatenate((a_in, a_of))
+    bj = np.concatenate((b_of, b_in))
+
+    inter = np.minimum(a_end[ai], b_end[bj]) - np.maximum(a_start[ai], b_start[bj])
+    keep = inter > 0
+    ai, bj, inter = ai[keep], bj[keep], inter[keep]
+    union = np.maximum(a_end[ai], b_end[bj]) - np.minimum(a_start[ai], b_start[bj])
+    return ai, bj, inter / np.maximum(union, 1e-9)
+
+
+def _best(owner: np.ndarray, other: np.ndarray, score: np.ndarray, n: int) -> np.ndarray:
+    """owner 每个下标得分最高的 other（没有则为 -1）"""
+    best = np.full(n, -1, dtype=np.int64)
+    if len(owner) == 0:
+        return best
+    # 按 (owner, 得分降序) 排序，每个 owner 的第一项即最高分
+    order = np.lexsort((-score, owner))
+    owners, first = np.unique(owner[order], return_index=True)
+    best[owners] = other[order[first]]
+    return best
+
+
+def _find(parent: List[int], x: int) -> int:
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def _attach_orphans(union, orphan_mask, s, e, other_s, other_e, self_base, other_base, tolerance):
+    """无重叠的条目按中点找 tolerance 秒内最近的另一侧条目，并入其分组"""
+    orphans = np.flatnonzero(orphan_mask)
+    if len(orphans) == 0 or len(other_s) == 0 or tolerance <= 0:
+        return
+    mids = (other_s + other_e) / 2
+    order = np.argsort(mids, kind="stable")
+    sorted_mids = mids[order]
+    for i in orphans.tolist():
+        mid = (s[i] + e[i]) / 2
+        k = int(np.searchsorted(sorted_mids, mid))
+        best, best_gap = None, tolerance
+        for cand in (k - 1, k):
+            if 0 <= cand < len(order):
+                j = int(order[cand])
+                # 区间间隙（不重叠时为正）
+                gap = max(other_s[j] - e[i], s[i] - other_e[j], 0.0)
+                if gap <= best_gap:
+                    best, best_gap = j, gap
+        if best is not None:
+            union(other_base + best, self_base + i)
+
+
+def align_intervals(a_start, a_end, b_start, b_end, tolerance: float = 1.0,
+                    min_coverage: float = 0.6) -> List[Tuple[List[int], List[int]]]:
+    """
+    返回按时间排序的分组 [(a 下标列表, b 下标列表)]。
+    a、b 各自的每个下标恰好出现在一个分组里。
+    min_coverage: 单向最优边合并后，组内 a、b 条目总时长各自至少占组跨度的比例
+    """
+    a_start = np.asarray(a_start, dtype=np.float64)
+    a_end = np.asarray(a_end, dtype=np.float64)
+    b_start = np.asarray(b_start, dtype=np.float64)
+    b_end = np.asarray(b_end, dtype=np.float64)
+    na, nb = len(a_start), len(b_start)
+
+    ai, bj, score = overlap_pairs(a_start, a_end, b_start, b_end)
+    best_b = _best(ai, bj, score, na)
+    best_a = _best(bj, ai, score, nb)
+
+    # 节点编号：a 为 0..na-1，b 为 na..na+nb-1
+    parent = list(range(na + nb))
+    lengths = np.concatenate((a_end - a_start, b_end - b_start)).tolist()
+    # 各组（以根节点记）的时间跨度与两侧条目总时长
+    lo = np.concatenate((a_start, b_start)).tolist()
+    hi = np.concatenate((a_end, b_end)).tolist()
+    cover_a = lengths[:na] + [0.0] * nb
+    cover_b = [0.0] * na + lengths[na:]
+
+    def union(x: int, y: int, check: bool = False) -> bool:
+        rx, ry = _find(parent, x), _find(parent, y)
+        if rx == ry:
+            return True
+        span = max(hi[rx], hi[ry]) - min(lo[rx], lo[ry])
+        ca, cb = cover_a[rx] + cover_a[ry], cover_b[rx] + cover_b[ry]
+        if check and span > 0 and min(ca, cb) < min_coverage * span:
+            return False
+        parent[ry] = rx
+        lo[rx], hi[rx] = min(lo[rx], lo[ry]), max(hi[rx], hi[ry])
+        cover_a[rx], cover_b[rx] = ca, cb
+        return True
+
+    # 互为最优：每个节点至多一条，不会串联
+    mutual = np.flatnonzero(best_b >= 0)
+    mutual = mutual[best_a[best_b[mutual]] == mutual]
+    for i in mutual.tolist():
+        union(i, na + int(best_b[i]))
+
+    # 单向最优边：按 IoU 从高到低合并，组跨度被撑大时拒绝
+    iou = {(int(i), int(j)): float(v) for i, j, v in zip(ai, bj, score)}
+    one_sided = [(i, int(best_b[i])) for i in np.flatnonzero(best_b >= 0).tolist() if best_a[best_b[i]] != i]
+    one_sided += [(int(best_a[j]), j) for j in np.flatnonzero(best_a >= 0).tolist() if best_b[best_a[j]] != j]
+    for i, j in sorted(set(one_sided), key=lambda e: (-iou[e], e)):
+        union(i, na + j, check=True)
+
+    # 无重叠的条目：按中点挂靠到 tolerance 内最近的另一侧条目
+    _attach_orphans(union, best_b < 0, a_start, a_end, b_start, b_end, 0, na, tolerance)
+    _attach_orphans(union, best_a < 0, b_start, b_end, a_start, a_end, na, 0, tolerance)
+
+    groups: dict = {}
+    for i in range(na):
+        groups.setdefault(_find(parent, i), ([], []))[0].append(i)
+    for j in range(nb):
+        groups.setdefault(_find(parent, na + j), ([], []))[1].append(j)
+
+    def group_start(group):
+        a_idx, b_idx = group
+        return min([a_start[i] for i in a_idx] + [b_start[j] for j in b_idx])
+
+    return sorted(groups.values(), key=group_start)
@@ -0,0 +1,92 @@
+"""
+asr.py - 各脚本统一的转写入口
+
+    from mediakit.asr import transcribe
+    segments, info = transcribe(audio_path, CONFIG["model_dir"], language="zh", workers=CONFIG.get("asr_workers", 0))
+
+返回值与 WhisperModel.transcribe 相同: segments 可迭代，每项有 start / end / text。
+
+skip_silence=True 时先做语音活动分析（speech_map，缓存在 WAV 旁），只把语音段拼接后送入解码，
+时间戳再映射回原始时间轴；录屏 / 教程这类静音多的素材可省下大量解码时间。
+
+不想先落地 WAV 时用 transcribe_media，直接从视频管道解码、边解码边转写:
+    segments, info = transcribe_media(CONFIG["ffmpeg_path"], video_path, CONFIG["model_dir"], language="zh")
+"""
+
+from mediakit.asr_tuning import beam_size_for
+from mediakit.whisper_pool import get_whisper_model
+
+
+def transcribe_speech(model, audio, speech_map, duration: float | None = None, **transcribe_kwargs):
+    """只解码 speech_map 中的语音段，产出的 Segment 时间戳为原始时间轴"""
+    from mediakit.parallel_asr import Segment, TranscriptionInfo
+
+    duration = duration or speech_map.duration_ms / 1000
+    if len(speech_map.spans) == 0:
+        return iter(()), TranscriptionInfo(transcribe_kwargs.get("language"), duration)
+    segments, info = model.transcribe(speech_map.compact(audio), **transcribe_kwargs)
+
+    def remapped():
+        for seg in segments:
+            start, end = speech_map.to_source([seg.start, seg.end]).tolist()
+            yield Segment(start, end, seg.text)
+
+    return remapped(), TranscriptionInfo(info.language, duration)
+
+
+def transcribe(audio, model_dir: str, task: str = "transcribe", language: str | None = None,
+               beam_size: int | None = None, workers: int = 0, device: str = "cpu",
+               skip_silence: bool = False):
+    """
+    beam_size:    None 时用本机调优结果（默认 5）
+    skip_silence: 跳过静音段（audio 需为 16kHz 单声道 WAV 路径，或传入数组时现场分析）
+    workers <= 1: 使用进程级模型池中的 WhisperModel 直接转写
+    workers > 1:  分块并行转写（audio 需为 16kHz 单声道 WAV 路径）
+    """
+    beam_size = beam_size or beam_size_for(model_dir)
+    if workers and workers > 1 and isinstance(audio, str):
+        from mediakit.parallel_asr import transcribe_parallel
+
+        return transcribe_parallel(audio, model_dir, workers=workers, device=device,
+                                   beam_size=beam_size, task=task, language=language,
+                                   skip_silence=skip_silence)
+
+    model = get_whisper_model(model_dir, device=device)
+    if skip_silence:
+        from mediakit.parallel_asr import read_wav
+        from mediakit.speech_map import SpeechMap
+
+        # 非 16bit PCM 的 WAV 无法直接分析时抛 ValueError，退回整段转写（faster-whisper 自己能解码）
+        try:
+            if isinstance(audio, str):
+                speech_map, audio = SpeechMap.for_audio(audio), read_wav(audio)
+            else:
+                speech_map = SpeechMap.from_audio(audio)
+        except ValueError as e:
+            print(f"⚠️ 无法做语音活动分析，整段转写: {e}")
+        else:
+            return transcribe_speech(model, audio, speech_map, beam_size=beam_size, task=task, language=language)
+    return model.transcribe(audio, beam_size=beam_size, task=task, language=language)
+
+
+def transcribe_media(ffmpeg_path: str, media_path: str, model_dir: str, task: str = "transcribe",
+                     language: str | None = None, beam_size: int | None = None, device: str = "cpu",
+                     chunk_seconds: float = 300.0):
+    """
+    ffmpeg 解码出的 PCM 按块送入 WhisperModel，不生成临时 WAV。
+    segments 是惰性生成器：第一块解码完即开始转写，时间戳已加上块偏移。
+    info.duration 在流式模式下未知，为 None。
+    """
+    beam_size = beam_size or beam_size_for(model_dir)
+    from mediakit.audio import iter_audio_chunks
+    from mediakit.parallel_asr import Segment, TranscriptionInfo
+
+    model = get_whisper_model(model_dir, device=device)
+
+    def segments():
+        for offset, chunk in iter_audio_chunks(ffmpeg_path, media_path, chunk_seconds=chunk_seconds):
+            chunk_segments, _ = model.transcribe(chunk, beam_size=beam_size, task=task, language=language)
+            for seg in chunk_segments:
+                yield Segment(offset + seg.start, offset + seg.end, seg.text)
+
+    return segments(), TranscriptionInfo(language, None)
@@ -0,0 +1,232 @@
+"""
+asr_tuning.py - faster-whisper CPU 推理参数自动调优与本机配置
+
+各处创建 WhisperModel 都是 device="cpu" + 默认 compute_type / cpu_threads，beam_size 固定为 5，
+不同机器上的最优组合差别很大。tune() 从实际音频里截一段校准片段，依次测试
+compute_type（int8 / int8_float32 / float32）× 线程数 × beam_size，再对最优组合测试 num_workers，
+以 float32 + beam 5 的结果为基准，在字符一致率不低于 1 - tolerance 的组合里选最快的。
+
+结果按主机名、模型目录名存入 config.json:
+    "asr_profiles": {"<主机名>": {"faster-whisper-small": {"compute_type": "int8", "cpu_threads": 8, ...}}}
+各入口加载配置后调用 apply_host_profile(CONFIG)，之后 get_whisper_model / transcribe 在未显式指定时
+自动使用本机的调优结果。
+
+用法:
+    profile = tune(ffmpeg, "outputs/a_audio.wav", CONFIG["model_dir"])
+    save_profile("config.json", CONFIG["model_dir"], profile)
+"""
+
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BEAM_SIZE = 5
+COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+
+# 模型目录名 -> 本机调优结果
+_PROFILES: Dict[str, dict] = {}
+
+
+def host_id() -> str:
+    return socket.gethostname()
+
+
+# ======================
+# 应用本机配置
+# ======================
+def apply_host_profile(config: dict):
+    """从已加载的配置里取出本机的调优结果并启用"""
+    _PROFILES.clear()
+    _PROFILES.update(config.get("asr_profiles", {}).get(host_id(), {}))
+
+
+def apply_host_profile_file(config_path: str):
+    if Path(config_path).exists():
+        with open(config_path, "r", encoding="utf-8") as f:
+            apply_host_profile(json.load(f))
+
+
+def profile_for(model_dir: str) -> dict:
+    return _PROFILES.get(Path(str(model_dir)).name, {})
+
+
+def resolve(model_dir: str, device: str = "cpu", compute_type: str = "default",
+            cpu_threads: int = 0) -> Tuple[str, int, dict]:
+    """
+    未显式指定的参数用本机调优结果补全，返回 (compute_type, cpu_threads, 其他 WhisperModel 参数)。
+    只对 CPU 生效。
+    """
+    profile = profile_for(model_dir) if device == "cpu" else {}
+    if compute_type == "default":
+        compute_type = profile.get("compute_type", "default")
+    if not cpu_threads:
+        cpu_threads = int(profile.get("cpu_threads", 0))
+    extra = {"num_workers": int(profile["num_workers"])} if profile.get("num_workers", 1) > 1 else {}
+    return compute_type, cpu_threads, extra
+
+
+def beam_size_for(model_dir: str, default: int = DEFAULT_BEAM_SIZE) -> int:
+    return int(profile_for(model_dir).get("beam_size", default))
+
+
+def save_profile(config_path: str, model_dir: str, profile: dict):
+    """写入 config.json 的 asr_profiles.<主机名>.<模型目录名>，其余配置保持不变"""
+    path = Path(config_path)
+    config = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    config.setdefault("asr_profiles", {}).setdefault(host_id(), {})[Path(str(model_dir)).name] = profile
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(config, indent=2, ensure_ascii=False) + "\n")
+    apply_host_profile(config)
+
+
+# ======================
+# 一致率
+# ======================
+def edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def agreement(reference: str, hypothesis: str) -> float:
+    """字符一致率 = 1 - CER（以基准结果为参照），不低于 0"""
+    if not reference:
+        return 1.0 if not hypothesis else 0.0
+    return max(0.0, 1.0 - edit_distance(reference, hypothesis) / len(reference))
+
+
+# ======================
+# 调优
+# ======================
+def calibration_clip(ffmpeg_path: str, media_path: str, seconds: float = 60.0):
+    """从音频中段截取校准片段（16kHz float32 数组）"""
+    from mediakit.audio import _to_float32, pcm_command
+    from mediakit.parallel_burn import ffprobe_for, probe_duration
+
+    try:
+        duration = probe_duration(ffprobe_for(ffmpeg_path), media_path)
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        duration = 0.0
+    offset = max(0.0, duration / 2 - seconds / 2) if duration > seconds else 0.0
+    cmd = pcm_command(ffmpeg_path, media_path)
+    i = cmd.index("-i")
+    cmd[i:i] = ["-ss", f"{offset:.3f}", "-t", f"{seconds:.3f}"]
+    out = subprocess.run(cmd, stdout=subprocess.PIPE, check=True).stdout
+    return _to_float32(out, "f32le")
+
+
+def default_threads() -> List[int]:
+    cpu = os.cpu_count() or 1
+    return sorted({max(1, cpu // 4), max(1, cpu // 2), cpu})
+
+
+def _run(model, audio, beam_size: int, language: Optional[str], task: str) -> Tuple[float, str]:
+    t0 = time.perf_counter()
+    segments, _ = model.transcribe(audio, beam_size=beam_size, language=language, task=task)
+    text = "".join(seg.text.strip() for seg in segments)
+    return time.perf_counter() - t0, text
+
+
+def _throughput(model, audio, workers: int, beam_size: int, language: Optional[str], task: str) -> float:
+    """workers 个线程同时转写校准片段，返回每秒处理的音频秒数"""
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=_run, args=(model, audio, beam_size, language, task)) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return workers * len(audio) / 16000 / (time.perf_counter() - t0)
+
+
+def tune(ffmpeg_path: str, media_path: str, model_dir: str, clip_seconds: float = 60.0,
+         language: Optional[str] = "zh", task: str = "transcribe",
+         compute_types: Iterable[str] = COMPUTE_TYPES, threads: Optional[Iterable[int]] = None,
+         beam_sizes: Iterable[int] = (1, 2, 5), workers: Iterable[int] = (1, 2),
+         tolerance: float = 0.05, normalize: Optional[Callable[[str], str]] = None) -> dict:
+    """
+    返回调优后的配置 dict（可直接 save_profile）。
+    normalize: 比较前的文本规范化（如 zh_text.normalize_zh），默认只去掉空白
+    """
+    from faster_whisper import WhisperModel
+
+    normalize = normalize or (lambda s: "".join(s.split()))
+    audio = calibration_clip(ffmpeg_path, media_path, clip_seconds)
+    clip = len(audio) / 16000
+    print(f"🎯 校准片段 {clip:.1f}s，模型 {Path(model_dir).name}")
+
+    # 基准：float32 + beam 5 + 默认线程
+    base_model = WhisperModel(model_dir, device="cpu", compute_type="float32")
+    _run(base_model, audio[:16000 * 5], DEFAULT_BEAM_SIZE, language, task)  # 预热
+    base_time, base_text = _run(base_model, audio, DEFAULT_BEAM_SIZE, language, task)
+    reference = normalize(base_text)
+    del base_model
+    print(f"   基准 float32 / beam {DEFAULT_BEAM_SIZE}: {base_time:.2f}s (RTF {base_time / clip:.3f})")
+
+    results = []
+    for compute_type in compute_types:
+        for n in threads or default_threads():
+            try:
+                model = WhisperModel(model_dir, device="cpu", compute_type=compute_type, cpu_threads=n)
+            except (ValueError, RuntimeError) as e:
+                print(f"   ⚠️ 跳过 {compute_type}: {e}")
+                break
+            _run(model, audio[:16000 * 5], 1, language, task)
+            for beam in beam_sizes:
+                elapsed, text = _run(model, audio, beam, language, task)
+                score = agreement(reference, normalize(text))
+                ok = score >= 1 - tolerance
+                results.append({"compute_type": compute_type, "cpu_threads": n, "beam_size": beam,
+                                "seconds": elapsed, "agreement": score, "ok": ok})
+                print(f"   {'✅' if ok else '❌'} {compute_type:<13} threads={n:<3} beam={beam}: "
+                      f"{elapsed:.2f}s  一致率 {score:.1%}")
+            del model
+
+    candidates = [r for r in results if r["ok"]]
+    if not candidates:
+        print("⚠️ 没有组合达到一致率要求，使用基准配置")
+        best = {"compute_type": "float32", "cpu_threads": 0, "beam_size": DEFAULT_BEAM_SIZE,
+                "seconds": base_time, "agreement": 1.0}
+    else:
+        best = min(candidates, key=lambda r: r["seconds"])
+
+    # num_workers 只影响多线程同时转写（如 batch_runner 的 asr 阶段）的吞吐
+    best_workers, best_tp = 1, 0.0
+    for w in workers:
+        model = WhisperModel(model_dir, device="cpu", compute_type=best["compute_type"],
+                             cpu_threads=best["cpu_threads"], num_workers=w)
+        tp = _throughput(model, audio, w, best["beam_size"], language, task)
+        del model
+        print(f"   num_workers={w}: {tp:.1f} 音频秒/秒")
+        # 多 worker 要有明显收益才采用
+        if tp > best_tp * 1.1:
+            best_workers, best_tp = w, tp
+
+    profile = {
+        "compute_type": best["compute_type"],
+        "cpu_threads": best["cpu_threads"],
+        "num_workers": best_workers,
+        "beam_size": best["beam_size"],
+        "rtf": round(best["seconds"] / clip, 4),
+        "baseline_rtf": round(base_time / clip, 4),
+        "agreement": round(best["agreement"], 4),
+        "tolerance": tolerance,
+        "clip_seconds": round(clip, 1),
+        "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    print(f"🏁 最优: {profile['compute_type']} / threads={profile['cpu_threads']} / beam={profile['beam_size']} / "
+          f"workers={profile['num_workers']}，RTF {profile['baseline_rtf']} → {profile['rtf']}")
+    return profile
@@ -0,0 +1,101 @@
+"""
+audio.py - 通过 ffmpeg 管道直接解码音频，不落地中间 WAV
+
+ffmpeg 把 16kHz 单声道 PCM(f32le / s16le) 写到 stdout，这里直接读入 NumPy 数组，
+可一次读完（load_audio），也可边解码边分块产出（iter_audio_chunks），
+后者让转写在解码完成前就开始，适合网络盘上的大文件。
+"""
+
+import subprocess
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+_PCM_FORMATS = {
+    "f32le": (np.float32, 4),
+    "s16le": (np.int16, 2),
+}
+
+
+def pcm_command(ffmpeg_path: str, media_path: str, sample_rate: int = SAMPLE_RATE,
+                fmt: str = "f32le") -> List[str]:
+    """ffmpeg 解码为单声道原始 PCM 并输出到 stdout 的命令"""
+    return [
+        ffmpeg_path, "-nostdin", "-loglevel", "error",
+        "-i", media_path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-f", fmt,
+        "-"
+    ]
+
+
+def _to_float32(buf: bytes, fmt: str) -> np.ndarray:
+    dtype, _ = _PCM_FORMATS[fmt]
+    data = np.frombuffer(buf, dtype=dtype)
+    if dtype == np.int16:
+        return data.astype(np.float32) / 32768.0
+    return data.copy()
+
+
+def load_audio(ffmpeg_path: str, media_path: str, sample_rate: int = SAMPLE_RATE,
+               fmt: str = "f32le") -> np.ndarray:
+    """整段解码为 float32 数组，可直接传给 WhisperModel.transcribe"""
+    result = subprocess.run(pcm_command(ffmpeg_path, media_path, sample_rate, fmt),
+                            stdout=subprocess.PIPE, check=True)
+    return _to_float32(result.stdout, fmt)
+
+
+def _quietest_cut(audio: np.ndarray, search: int, frame: int) -> int:
+    """在数组末尾 search 个采样内找能量最低的帧，返回切点位置"""
+    start = max(0, len(audio) - search)
+    tail = audio[start:]
+    n = len(tail) // frame
+    if n == 0:
+        return len(audio)
+    energy = np.square(tail[:n * frame].reshape(n, frame)).mean(axis=1)
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+def iter_audio_chunks(
+    ffmpeg_path: str,
+    media_path: str,
+    chunk_seconds: float = 300.0,
+    search_seconds: float = 2.0,
+    sample_rate: int = SAMPLE_RATE,
+    fmt: str = "f32le",
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    边解码边产出 (起始秒, float32 数组)。
+    每块约 chunk_seconds 秒，切点选在块末 search_seconds 内能量最低处，避免切断语音。
+    """
+    _, width = _PCM_FORMATS[fmt]
+    chunk = int(chunk_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    frame = sample_rate // 50  # 20ms
+
+    proc = subprocess.Popen(pcm_command(ffmpeg_path, media_path, sample_rate, fmt), stdout=subprocess.PIPE)
+    pending = np.zeros(0, dtype=np.float32)
+    offset = 0
+    try:
+        while True:
+            buf = proc.stdout.read(chunk * width)
+            if not buf:
+                break
+            pending = np.concatenate([pending, _to_float32(buf[:len(buf) - len(buf) % width], fmt)])
+            if len(pending) < chunk:
+                continue
+            cut = _quietest_cut(pending, search, frame)
+            yield offset / sample_rate, pending[:cut]
+            offset += cut
+            pending = pending[cut:]
+        if len(pending):
+            yield offset / sample_rate, pending
+    finally:
+        proc.stdout.close()
+        code = proc.wait()
+    if code != 0:
+        raise subprocess.CalledProcessError(code, proc.args)
@@ -0,0 +1,222 @@
+"""
+bench.py - 基准测试工具：单阶段计时、实时率、峰值内存、CPU 利用率，结果存 JSON 并与基线对比
+
+每个阶段在 measure() 里运行，后台线程按固定间隔采样 本进程 + 子进程（ffmpeg 等）的 RSS 与 CPU 时间:
+  - wall_s          墙钟时间
+  - rtf             实时率 = wall_s / 媒体时长（< 1 表示快于实时）
+  - peak_rss_mb     峰值内存（本进程 + 子进程之和）
+  - cpu_util        CPU 利用率 = CPU 时间 / (墙钟 × 逻辑核数)，1.0 表示所有核跑满
+
+用法:
+    result = measure("extract_audio", lambda: extract_audio(video, wav), media_seconds=120.0)
+    save_results("benchmarks/results/run.json", [result], meta=run_meta())
+    regressions = compare(load_results("baseline.json"), load_results("run.json"), tolerance=0.15)
+"""
+
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import psutil
+
+# 参与回归判断的指标（均为越小越好）
+COMPARE_METRICS = ("wall_s", "peak_rss_mb")
+
+
+class ResourceSampler:
+    """后台采样本进程及其子进程的内存与 CPU 时间"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.proc = psutil.Process()
+        self.peak_rss = 0
+        self._child_cpu: Dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        rss = self.proc.memory_info().rss
+        for child in self.proc.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+                t = child.cpu_times()
+                self._child_cpu[child.pid] = t.user + t.system
+            except psutil.Error:
+                continue  # 采样间隙里退出的子进程
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        t = self.proc.cpu_times()
+        self._cpu0 = t.user + t.system
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        t = self.proc.cpu_times()
+        # 子进程的 CPU 时间取最后一次采样值；很短命的子进程可能采不到
+        self.cpu_seconds = (t.user + t.system - self._cpu0) + sum(self._child_cpu.values())
+
+
+def measure(name: str, fn: Callable[[], Any], media_seconds: Optional[float] = None,
+            interval: float = 0.05) -> Dict[str, Any]:
+    """
+    运行 fn 并返回指标；fn 返回数字且未给 media_seconds 时，把返回值当作媒体时长（如合成音频的秒数）。
+    fn 抛出异常时记录 error，不中断整轮测试。
+    """
+    result: Dict[str, Any] = {"stage": name}
+    with ResourceSampler(interval) as sampler:
+        t0 = time.perf_counter()
+        try:
+            value = fn()
+        except Exception as e:
+            value = None
+            result["error"] = f"{type(e).__name__}: {e}"
+        wall = time.perf_counter() - t0
+
+    if media_seconds is None and isinstance(value, (int, float)):
+        media_seconds = float(value)
+    result.update({
+        "wall_s": round(wall, 4),
+        "media_s": round(media_seconds, 3) if media_seconds else None,
+        "rtf": round(wall / media_seconds, 4) if media_seconds else None,
+        "peak_rss_mb": round(sampler.peak_rss / 2 ** 20, 1),
+        "cpu_seconds": round(sampler.cpu_seconds, 3),
+        "cpu_util": round(sampler.cpu_seconds / (wall * (os.cpu_count() or 1)), 3) if wall > 0 else None,
+    })
+    return result
+
+
+# ======================
+# 合成测试素材
+# ======================
+def synthetic_speech(path: str, seconds: float, sample_rate: int = 16000, seed: int = 0) -> str:
+    """
+    生成类语音的长音频（16-bit 单声道 WAV）：基频随机的谐波 "音节" + 随机长度停顿，
+    用于在没有长素材时测试转写 / 切分的吞吐，按 60 秒一块写入，内存占用与总时长无关。
+    """
+    rng = np.random.default_rng(seed)
+    block = 60 * sample_rate
+    total = int(seconds * sample_rate)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        written = 0
+        while written < total:
+            n = min(block, total - written)
+            out = np.zeros(n, dtype=np.float32)
+            pos = 0
+            while pos < n:
+                syllable = int(rng.uniform(0.12, 0.35) * sample_rate)
+                pause = int(rng.exponential(0.15) * sample_rate) if rng.random() < 0.8 else int(0.8 * sample_rate)
+                end = min(pos + syllable, n)
+                t = np.arange(end - pos) / sample_rate
+                f0 = rng.uniform(100, 250)
+                tone = sum(np.sin(2 * math.pi * f0 * k * t) / k for k in range(1, 6))
+                out[pos:end] = 0.2 * tone * np.hanning(end - pos)
+                pos = end + pause
+            out += rng.normal(0, 0.003, n).astype(np.float32)
+            w.writeframes((np.clip(out, -1, 1) * 32767).astype("<i2").tobytes())
+            written += n
+    return path
+
+
+def wav_seconds(path: str) -> float:
+    with wave.open(path, "rb") as w:
+        return w.getnframes() / w.getframerate()
+
+
+# ======================
+# 结果存取与对比
+# ======================
+def run_meta(extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "memory_gb": round(psutil.virtual_memory().total / 2 ** 30, 1),
+        "commit": commit,
+        **(extra or {}),
+    }
+
+
+def save_results(path: str, results: List[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta or run_meta(), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.15,
+            min_wall_s: float = 0.05, stages: Sequence[str] | None = None) -> List[Dict[str, Any]]:
+    """
+    逐阶段对比，返回所有指标的变化 [{stage, metric, baseline, current, change, regression}]。
+    变慢/变大超过 tolerance（比例）记为回归；基线耗时低于 min_wall_s 的阶段噪声太大，不判回归。
+    基线里正常、本次报错或缺失的阶段也记为回归（metric 为 "error" / "missing"，change 为 None）。
+    stages: 本次只跑了其中部分阶段时传入，不在其中的基线阶段不算缺失
+    """
+    base = {r["stage"]: r for r in baseline.get("results", []) if "error" not in r}
+    seen = {r["stage"] for r in current.get("results", [])}
+    rows = [{"stage": name, "metric": "missing", "baseline": "ok", "current": "-", "change": None,
+             "regression": True}
+            for name in base if name not in seen and (stages is None or name in stages)]
+    for r in current.get("results", []):
+        b = base.get(r["stage"])
+        if b is None:
+            continue
+        if "error" in r:
+            rows.append({"stage": r["stage"], "metric": "error", "baseline": "ok", "current": r["error"],
+                         "change": None, "regression": True})
+            continue
+        for metric in COMPARE_METRICS:
+            old, new = b.get(metric), r.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            noisy = metric == "wall_s" and old < min_wall_s
+            rows.append({
+                "stage": r["stage"], "metric": metric, "baseline": old, "current": new,
+                "change": round(change, 4), "regression": change > tolerance and not noisy,
+            })
+    return rows
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'stage':<22}{'wall_s':>10}{'rtf':>9}{'rss_mb':>9}{'cpu':>7}"]
+    for r in results:
+        if "error" in r:
+            lines.append(f"{r['stage']:<22}  ❌ {r['error']}")
+            continue
+        rtf = f"{r['rtf']:.4f}" if r.get("rtf") is not None else "-"
+        cpu = f"{r['cpu_util']:.0%}" if r.get("cpu_util") is not None else "-"
+        lines.append(f"{r['stage']:<22}{r['wall_s']:>10.3f}{rtf:>9}{r['peak_rss_mb']:>9.1f}{cpu:>7}")
+    return "\n".join(lines)
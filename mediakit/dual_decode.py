@@ -0,0 +1,188 @@
+"""
+dual_decode.py - 单次编码、双任务解码的中英字幕生成
+
+Whisper 的开销主要在编码器。原先 gen-zh / gen-en 分别调用 transcribe / translate，
+同一段音频要编码两遍，生成的两份字幕还要再按时间对齐。这里按 30 秒窗口只编码一次，
+在同一份 encoder_output 上依次做 transcribe 与 translate 解码:
+  - 窗口推进和分段边界以中文(transcribe)结果为准
+  - 英文(translate)结果按时间重叠归入对应的中文分段
+因此中英条目共用同一时间轴，合并时无需再对齐。
+
+说明: 为保持单次编码，这里不做温度回退(temperature fallback)，只用 beam search 解码。
+"""
+
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+
+class BilingualSegment(NamedTuple):
+    start: float
+    end: float
+    zh: str
+    en: str
+
+
+# (start, end, tokens) —— 时间为窗口内相对秒数
+_RawSegment = Tuple[float, float, List[int]]
+
+
+def _build_prompt(tokenizer, previous_tokens: List[int]) -> List[int]:
+    prompt = []
+    if previous_tokens:
+        prompt.append(tokenizer.sot_prev)
+        prompt.extend(previous_tokens[-223:])
+    prompt.extend(tokenizer.sot_sequence)
+    return prompt
+
+
+def _split_timestamped(tokens: List[int], tokenizer, time_precision: float,
+                       window_duration: float) -> Tuple[List[_RawSegment], Optional[float]]:
+    """
+    把带时间戳的 token 序列切成分段，逻辑与 faster-whisper generate_segments 一致。
+    返回 (分段列表, 窗口内最后一个完整时间戳)；后者为 None 表示整窗都已消费。
+    """
+    ts_begin = tokenizer.timestamp_begin
+    single_timestamp_ending = len(tokens) >= 2 and tokens[-2] < ts_begin <= tokens[-1]
+    consecutive = [
+        i for i in range(1, len(tokens))
+        if tokens[i] >= ts_begin and tokens[i - 1] >= ts_begin
+    ]
+
+    segments: List[_RawSegment] = []
+    if consecutive:
+        slices = list(consecutive)
+        if single_timestamp_ending:
+            slices.append(len(tokens))
+        last_slice = 0
+        for current_slice in slices:
+            sliced = tokens[last_slice:current_slice]
+            start = (sliced[0] - ts_begin) * time_precision
+            end = (sliced[-1] - ts_begin) * time_precision
+            segments.append((start, end, [t for t in sliced if t < ts_begin]))
+            last_slice = current_slice
+        if single_timestamp_ending:
+            return segments, None
+        return segments, (tokens[last_slice - 1] - ts_begin) * time_precision
+
+    duration = window_duration
+    timestamps = [t for t in tokens if t >= ts_begin]
+    if timestamps and timestamps[-1] != ts_begin:
+        duration = (timestamps[-1] - ts_begin) * time_precision
+    segments.append((0.0, duration, [t for t in tokens if t < ts_begin]))
+    return segments, None
+
+
+def _overlap(a0: float, a1: float, b0: float, b1: float) -> float:
+    return max(0.0, min(a1, b1) - max(a0, b0))
+
+
+def _assign_translations(zh_segs: List[_RawSegment], en_segs: List[_RawSegment],
+                         cut: float) -> List[List[int]]:
+    """把英文分段按时间重叠归入中文分段；起点越过窗口切点的英文留给下一个窗口"""
+    assigned: List[List[int]] = [[] for _ in zh_segs]
+    for e_start, e_end, e_tokens in en_segs:
+        if e_start >= cut or not zh_segs:
+            continue
+        scores = [_overlap(z_start, z_end, e_start, e_end) for z_start, z_end, _ in zh_segs]
+        best = max(range(len(zh_segs)), key=lambda k: scores[k])
+        if scores[best] == 0.0:
+            # 没有重叠时归入起点最近的中文分段
+            best = min(range(len(zh_segs)), key=lambda k: abs(zh_segs[k][0] - e_start))
+        assigned[best].extend(e_tokens)
+    return assigned
+
+
+def transcribe_bilingual(
+    model,
+    audio: Union[str, np.ndarray],
+    language: str = "zh",
+    beam_size: int = 5,
+    condition_on_previous_text: bool = True,
+    no_speech_threshold: float = 0.6,
+    log_prob_threshold: float = -1.0,
+) -> Iterator[BilingualSegment]:
+    """
+    对一段音频同时生成中文转写和英文翻译，逐段产出 BilingualSegment。
+    model: faster_whisper.WhisperModel（建议从 whisper_pool 获取）
+    audio: 音频文件路径，或 16kHz 单声道 float32 数组
+    """
+    from faster_whisper.audio import decode_audio, pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+
+    sampling_rate = model.feature_extractor.sampling_rate
+    if isinstance(audio, str):
+        audio = decode_audio(audio, sampling_rate=sampling_rate)
+
+    features = model.feature_extractor(audio)
+    content_frames = features.shape[-1] - 1
+    window_frames = model.feature_extractor.nb_max_frames
+    frames_per_second = model.frames_per_second
+    time_precision = model.time_precision
+    input_stride = model.input_stride
+
+    multilingual = model.model.is_multilingual
+    tok_zh = Tokenizer(model.hf_tokenizer, multilingual, task="transcribe", language=language)
+    tok_en = Tokenizer(model.hf_tokenizer, multilingual, task="translate", language=language)
+
+    def decode(encoder_output, tokenizer, previous_tokens):
+        prompt = _build_prompt(tokenizer, previous_tokens if condition_on_previous_text else [])
+        result = model.model.generate(
+            encoder_output,
+            [prompt],
+            beam_size=beam_size,
+            max_length=model.max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+            max_initial_timestamp_index=50,
+        )[0]
+        tokens = result.sequences_ids[0]
+        seq_len = max(len(tokens), 1)
+        avg_logprob = result.scores[0] * seq_len / (seq_len + 1)
+        return tokens, result.no_speech_prob, avg_logprob
+
+    seek = 0
+    prev_zh: List[int] = []
+    prev_en: List[int] = []
+    while seek < content_frames:
+        time_offset = seek / frames_per_second
+        segment_size = min(window_frames, content_frames - seek)
+        window_duration = segment_size / frames_per_second
+        window = pad_or_trim(features[:, seek:seek + segment_size])
+
+        # 每个窗口只编码一次，两种任务共用
+        encoder_output = model.encode(window)
+
+        zh_tokens, no_speech_prob, avg_logprob = decode(encoder_output, tok_zh, prev_zh)
+        if no_speech_prob > no_speech_threshold and avg_logprob < log_prob_threshold:
+            seek += segment_size
+            continue
+
+        zh_segs, last_ts = _split_timestamped(zh_tokens, tok_zh, time_precision, window_duration)
+        advance = 0 if last_ts is None else int(round(last_ts / time_precision)) * input_stride
+        if advance <= 0:
+            cut = window_duration
+            seek += segment_size
+        else:
+            cut = last_ts
+            seek += advance
+
+        en_tokens, _, _ = decode(encoder_output, tok_en, prev_en)
+        en_segs, _ = _split_timestamped(en_tokens, tok_en, time_precision, window_duration)
+        en_by_zh = _assign_translations(zh_segs, en_segs, cut)
+
+        for (start, end, z_tokens), e_tokens in zip(zh_segs, en_by_zh):
+            zh_text = tok_zh.decode(z_tokens).strip()
+            if not zh_text or start == end:
+                continue
+            yield BilingualSegment(
+                start=time_offset + start,
+                end=time_offset + end,
+                zh=zh_text,
+                en=tok_en.decode(e_tokens).strip(),
+            )
+
+        prev_zh.extend(t for _, _, toks in zh_segs for t in toks)
+        prev_en.extend(t for toks in en_by_zh for t in toks)
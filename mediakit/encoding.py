@@ -0,0 +1,117 @@
+"""
+encoding.py - 烧录字幕的编码预设
+
+原先烧录只给 ffmpeg 传 -i 和 -vf：视频用默认参数编码，音轨也被重新编码（只有画面滤镜变了）。
+这里提供命名预设，统一设置视频编码器 / preset / CRF / 线程数，音轨尽量 -c:a copy
+（输出容器装不下的编码，如 .MOV 的 PCM 音轨进 .mp4，改为转 AAC）:
+  - preview   低分辨率快速预览：先生成缩小的代理视频（缓存复用），再在代理上烧录，几秒出片
+  - balanced  日常输出
+  - archival  存档质量（x265，慢）
+预设可在 config.json 的 "encode_presets" 中按字段覆盖或新增。
+
+用法:
+    preset = get_preset("preview", CONFIG.get("encode_presets"))
+    burn(ffmpeg, "a.mp4", "a.srt", "a_preview.mp4", make_filter, preset)
+其中 make_filter(sub) 返回 -vf 滤镜字符串，路径需经 escape_filter_path 转义后放进单引号:
+    def make_filter(sub: str) -> str:
+        return f"subtitles='{escape_filter_path(sub)}'"
+"""
+
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from mediakit.parallel_burn import audio_args, burn_parallel
+
+PRESETS: Dict[str, dict] = {
+    "preview": {"codec": "libx264", "preset": "ultrafast", "crf": 30, "threads": 0, "height": 360},
+    "balanced": {"codec": "libx264", "preset": "medium", "crf": 20, "threads": 0},
+    "archival": {"codec": "libx265", "preset": "slow", "crf": 18, "threads": 0},
+}
+
+DEFAULT_PRESET = "balanced"
+
+
+def escape_filter_path(path: str) -> str:
+    """
+    字幕路径放进滤镜参数（单引号内）前的转义（各脚本的 subtitles= / ass= 滤镜共用）:
+    反斜杠加倍、盘符冒号与单引号前加反斜杠。Windows 绝对路径（F:/...）不转义时滤镜解析失败
+    """
+    p = path.replace("\\", "\\\\")
+    if re.match(r"^[A-Za-z]:", path):
+        p = p.replace(":", r"\:", 1)
+    return p.replace("'", r"\'")
+
+
+def get_preset(name: Optional[str] = None, overrides: Optional[Dict[str, dict]] = None) -> dict:
+    """按名称取预设；overrides 为 {名称: {字段: 值}}，与内置预设逐字段合并"""
+    name = name or DEFAULT_PRESET
+    overrides = overrides or {}
+    if name not in PRESETS and name not in overrides:
+        raise ValueError(f"unknown encode preset: {name} (available: {', '.join(sorted({*PRESETS, *overrides}))})")
+    preset = {**PRESETS.get(name, {}), **overrides.get(name, {})}
+    preset["name"] = name
+    return preset
+
+
+def video_args(preset: dict) -> List[str]:
+    """视频编码参数（不含滤镜和音频参数）"""
+    args = ["-c:v", preset.get("codec", "libx264")]
+    if preset.get("preset"):
+        args += ["-preset", str(preset["preset"])]
+    if preset.get("crf") is not None:
+        args += ["-crf", str(preset["crf"])]
+    if preset.get("pix_fmt"):
+        args += ["-pix_fmt", preset["pix_fmt"]]
+    if preset.get("threads"):
+        args += ["-threads", str(preset["threads"])]
+    return args
+
+
+def make_proxy(ffmpeg_path: str, video_path: str, height: int) -> str:
+    """缩小到 height 的代理视频，放在源视频旁；源文件未变时直接复用"""
+    src = Path(video_path)
+    proxy = src.with_name(f"{src.stem}_proxy{height}.mp4")
+    if proxy.exists() and proxy.stat().st_mtime >= src.stat().st_mtime:
+        return str(proxy)
+
+    print(f"🎞️ 生成 {height}p 预览代理: {proxy}")
+    tmp = proxy.with_name(f"{proxy.stem}.{os.getpid()}.tmp.mp4")
+    subprocess.run([
+        ffmpeg_path, "-y", "-loglevel", "error",
+        "-i", video_path,
+        "-vf", f"scale=-2:{height}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "23",
+        *audio_args(ffmpeg_path, video_path, str(tmp)),
+        str(tmp),
+    ], check=True)
+    os.replace(tmp, proxy)
+    return str(proxy)
+
+
+def burn(ffmpeg_path: str, video_path: str, subtitle_path: str, output_path: str,
+         make_filter: Callable[[str], str], preset: dict, workers: int = 0):
+    """
+    按预设烧录字幕：preset 带 height 时在代理视频上烧录；workers > 1 时分段并行。
+    make_filter: 字幕路径 -> -vf 滤镜字符串
+    """
+    source = video_path
+    if preset.get("height"):
+        source = make_proxy(ffmpeg_path, video_path, int(preset["height"]))
+
+    if workers > 1:
+        burn_parallel(ffmpeg_path, source, subtitle_path, output_path, make_filter,
+                      workers=workers, video_args=video_args(preset))
+        return
+
+    cmd = [
+        ffmpeg_path, "-y",
+        "-i", source,
+        "-vf", make_filter(subtitle_path),
+        *video_args(preset),
+        *audio_args(ffmpeg_path, source, output_path),
+        output_path
+    ]
+    subprocess.run(cmd, check=True)
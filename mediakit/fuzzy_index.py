@@ -0,0 +1,109 @@
+"""
+fuzzy_index.py - 字符 n-gram MinHash 近似重复索引
+
+规范化之后仍有少量字词差异的句子（"欢迎来到本期节目" / "欢迎来到这期节目"），
+用字符 n-gram 集合的 Jaccard 相似度判断是否可以复用译文:
+  - 每个字符串算 num_perm 个 MinHash 值，切成 bands 段做 LSH 分桶
+  - 查询时只和同桶的候选计算精确 Jaccard，取最高且不低于阈值的一个
+
+用法:
+    index = MinHashIndex()
+    index.add("欢迎来到本期节目", "Welcome to this episode")
+    index.query("欢迎来到这期节目", threshold=0.6)  # -> ("Welcome to this episode", 0.64)
+"""
+
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+_PRIME = (1 << 61) - 1
+
+
+def ngrams(text: str, n: int = 2) -> Set[str]:
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashIndex:
+    def __init__(self, num_perm: int = 64, bands: int = 16, ngram: int = 2, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        rng = np.random.default_rng(seed)
+        # 乘数和偏移控制在 2^31 以内，与 32 位 crc 相乘不会溢出 uint64
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        self._keys: List[str] = []
+        self._grams: List[Set[str]] = []
+        self._values: List[Any] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _signature(self, grams: Set[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        mixed = (hashes[:, None] * self._a[None, :] + self._b[None, :]) % np.uint64(_PRIME)
+        return mixed.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+
+    def band_keys(self, key: str) -> List[Tuple[int, bytes]]:
+        """key 的 LSH 分桶键 [(band, bucket)]，可持久化后在外部做候选查询"""
+        grams = ngrams(key, self.ngram)
+        return list(self._band_keys(self._signature(grams))) if grams else []
+
+    def similarity(self, a: str, b: str) -> float:
+        return jaccard(ngrams(a, self.ngram), ngrams(b, self.ngram))
+
+    def add(self, key: str, value: Any):
+        """同一个 key 重复添加时只更新 value"""
+        idx = self._ids.get(key)
+        if idx is not None:
+            self._values[idx] = value
+            return
+        grams = ngrams(key, self.ngram)
+        if not grams:
+            return
+        idx = len(self._keys)
+        self._ids[key] = idx
+        self._keys.append(key)
+        self._grams.append(grams)
+        self._values.append(value)
+        for band_key in self._band_keys(self._signature(grams)):
+            self._buckets[band_key].append(idx)
+
+    def query(self, key: str, threshold: float = 0.8) -> Optional[Tuple[Any, float]]:
+        """返回 (value, 相似度)；没有达到阈值的候选时返回 None"""
+        idx = self._ids.get(key)
+        if idx is not None:
+            return self._values[idx], 1.0
+        grams = ngrams(key, self.ngram)
+        if not grams or not self._keys:
+            return None
+
+        candidates = set()
+        for band_key in self._band_keys(self._signature(grams)):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best, best_score = None, threshold
+        for idx in candidates:
+            score = jaccard(grams, self._grams[idx])
+            if score >= best_score:
+                best, best_score = idx, score
+        return (self._values[best], best_score) if best is not None else None
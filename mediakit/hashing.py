@@ -0,0 +1,28 @@
+"""
+hashing.py - 文件内容哈希（带 stat 备忘，同一进程内未修改的文件只哈希一次）
+"""
+
+import hashlib
+import os
+import threading
+
+_MEMO: dict = {}
+_MEMO_LOCK = threading.Lock()
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _MEMO_LOCK:
+        if memo_key in _MEMO:
+            return _MEMO[memo_key]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    with _MEMO_LOCK:
+        _MEMO[memo_key] = digest
+    return digest
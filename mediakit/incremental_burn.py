@@ -0,0 +1,241 @@
+"""
+incremental_burn.py - 手工改字幕后的增量重烧
+
+改了一条字幕就整部视频重新编码太慢。每次烧录后在输出旁记下本次用的字幕快照和编码参数，
+下次 --incremental 烧录时:
+  1. 对比新旧字幕，找出有变化的字幕条（新增 / 删除 / 改时间 / 改文字）所覆盖的时间区间
+  2. 在上次输出的关键帧处把这些区间扩展为完整 GOP，合并相邻区间
+  3. 只对这些 GOP 重新编码（源视频 + 字幕切片），其余部分直接从上次输出 -c copy 截取
+  4. concat 拼接后原样复制音轨，替换上次输出
+
+源视频 / 编码预设 / 字幕滤镜有变化、样式头有变化、或需要重编的部分超过 max_ratio 时退回整片烧录。
+
+用法:
+    burn_incremental(ffmpeg, "a.mp4", "a_bi.srt", "a_subtitled.mp4",
+                     make_filter=make_filter, preset=get_preset("balanced"))   # make_filter 见 encoding.py
+"""
+
+import json
+import os
+import shutil
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from mediakit import timecode
+from mediakit.encoding import burn, make_proxy, video_args
+from mediakit.parallel_burn import ffprobe_for, probe_duration, probe_keyframes, slice_subtitles
+from mediakit.subtitles import read_srt
+
+
+def _state_path(output_path: str) -> Path:
+    return Path(output_path).with_suffix(".burn.json")
+
+
+def _snapshot_path(output_path: str, subtitle_path: str) -> Path:
+    out = Path(output_path)
+    return out.with_name(f"{out.stem}.burned{Path(subtitle_path).suffix.lower() or '.srt'}")
+
+
+def _video_ident(video_path: str) -> list:
+    st = os.stat(video_path)
+    return [os.path.abspath(video_path), st.st_size, st.st_mtime_ns]
+
+
+def _burn_params(make_filter: Callable[[str], str], preset: dict) -> dict:
+    # 滤镜里的字幕路径每次不同，用占位符生成一份模板来比较样式参数
+    return {"filter": make_filter("subtitle"), "preset": preset}
+
+
+def record_burn(video_path: str, subtitle_path: str, output_path: str,
+                make_filter: Callable[[str], str], preset: dict):
+    """烧录完成后保存字幕快照和参数，供下次增量烧录对比"""
+    snapshot = _snapshot_path(output_path, subtitle_path)
+    shutil.copyfile(subtitle_path, snapshot)
+    state = {"video": _video_ident(video_path), "subtitle": snapshot.name, **_burn_params(make_filter, preset)}
+    with open(_state_path(output_path), "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+# ======================
+# 字幕对比
+# ======================
+def _subtitle_events(path: str) -> Tuple[str, List[Tuple[int, int, str]]]:
+    """(样式头, [(start_ms, end_ms, 内容)])；SRT 没有样式头"""
+    if Path(path).suffix.lower() != ".ass":
+        return "", list(read_srt(path).iter_ms())
+
+    with open(path, "r", encoding="utf-8-sig") as f:
+        lines = f.read().splitlines()
+    header = "\n".join(line for line in lines if not line.startswith("Dialogue:"))
+    fields = [line.split(",", 9) for line in lines if line.startswith("Dialogue:")]
+    starts = timecode.parse(f[1].strip() for f in fields).tolist()
+    ends = timecode.parse(f[2].strip() for f in fields).tolist()
+    rest = [",".join([f[0]] + f[3:]) for f in fields]
+    return header, list(zip(starts, ends, rest))
+
+
+def changed_ranges(old_path: str, new_path: str) -> Optional[List[Tuple[float, float]]]:
+    """
+    新旧字幕有差异的时间区间（秒，已合并）；旧字幕的一条被删或新字幕多出一条都算变化。
+    样式头不同（整片效果都变了）时返回 None。
+    """
+    old_header, old_events = _subtitle_events(old_path)
+    new_header, new_events = _subtitle_events(new_path)
+    if old_header.strip() != new_header.strip():
+        return None
+
+    old_count, new_count = Counter(old_events), Counter(new_events)
+    diff = (old_count - new_count) + (new_count - old_count)
+    spans = sorted((start / 1000, end / 1000) for start, end, _ in diff.elements())
+    merged: List[Tuple[float, float]] = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def gop_ranges(ranges: List[Tuple[float, float]], keyframes: np.ndarray,
+               duration: float) -> List[Tuple[float, float]]:
+    """把时间区间扩展到包含它的完整 GOP（上一个关键帧 ~ 下一个关键帧），并合并相邻 GOP"""
+    out: List[Tuple[float, float]] = []
+    for start, end in ranges:
+        i = int(np.searchsorted(keyframes, start, side="right")) - 1
+        j = int(np.searchsorted(keyframes, end, side="left"))
+        gop_start = float(keyframes[i]) if i >= 0 else 0.0
+        gop_end = float(keyframes[j]) if j < len(keyframes) else duration
+        gop_start, gop_end = max(gop_start, 0.0), min(max(gop_end, gop_start), duration)
+        if out and gop_start <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], gop_end))
+        elif gop_end > gop_start:
+            out.append((gop_start, gop_end))
+    return out
+
+
+# ======================
+# 增量烧录
+# ======================
+def _splice(ffmpeg_path: str, source: str, previous: str, subtitle_path: str, output_path: str,
+            make_filter: Callable[[str], str], preset: dict, dirty: List[Tuple[float, float]],
+            duration: float, workers: int):
+    out = Path(output_path)
+    work_dir = out.parent / f"{out.stem}_parts"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    sub_suffix = Path(subtitle_path).suffix.lower() or ".srt"
+
+    # 整条时间线切成交替的 (保留, 重编) 片段
+    pieces: List[Tuple[float, float, bool]] = []
+    cursor = 0.0
+    for start, end in dirty:
+        if start > cursor:
+            pieces.append((cursor, start, False))
+        pieces.append((start, end, True))
+        cursor = end
+    if cursor < duration:
+        pieces.append((cursor, duration, False))
+
+    # 与 parallel_burn 一样按同时在跑的重编数分摊 CPU，否则每个 ffmpeg 都默认占满所有核；拷贝片段几乎不耗 CPU
+    pool_size = max(1, workers or os.cpu_count() or 1)
+    reencodes = max(1, min(pool_size, sum(reencode for _, _, reencode in pieces)))
+    threads = max(1, (os.cpu_count() or 1) // reencodes)
+
+    def make_piece(i: int) -> Path:
+        start, end, reencode = pieces[i]
+        part = work_dir / f"piece{i:03d}{out.suffix}"
+        if reencode:
+            sub_slice = (work_dir / f"piece{i:03d}{sub_suffix}").as_posix()
+            slice_subtitles(subtitle_path, sub_slice, start, end)
+            cmd = [
+                ffmpeg_path, "-y", "-loglevel", "error",
+                "-ss", f"{start:.6f}", "-i", source, "-t", f"{end - start:.6f}",
+                "-map", "0:v:0", "-an",
+                "-vf", make_filter(sub_slice),
+                *video_args(preset), "-threads", str(threads),
+                str(part),
+            ]
+        else:
+            # 起点是上次输出的关键帧，直接拷贝码流
+            cmd = [
+                ffmpeg_path, "-y", "-loglevel", "error",
+                "-ss", f"{start:.6f}", "-i", previous, "-t", f"{end - start:.6f}",
+                "-map", "0:v:0", "-an", "-c", "copy",
+                str(part),
+            ]
+        subprocess.run(cmd, check=True)
+        return part
+
+    tmp = out.with_name(f"{out.stem}.{os.getpid()}.tmp{out.suffix}")
+    try:
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            parts = list(pool.map(make_piece, range(len(pieces))))
+
+        list_file = work_dir / "concat.txt"
+        with open(list_file, "w", encoding="utf-8") as f:
+            for part in parts:
+                f.write(f"file '{part.resolve().as_posix()}'\n")
+        subprocess.run([
+            ffmpeg_path, "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", str(list_file),
+            "-i", previous,
+            "-map", "0:v:0", "-map", "1:a?",
+            "-c", "copy",
+            str(tmp),
+        ], check=True)
+        os.replace(tmp, output_path)
+    finally:
+        # 拼接失败时也清掉切片目录和半成品
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if tmp.exists():
+            tmp.unlink()
+
+
+def burn_incremental(ffmpeg_path: str, video_path: str, subtitle_path: str, output_path: str,
+                     make_filter: Callable[[str], str], preset: dict, workers: int = 0,
+                     max_ratio: float = 0.5):
+    """
+    有上次烧录记录且参数一致时只重编有变化的 GOP，否则整片烧录；完成后更新烧录记录。
+    max_ratio: 需要重编的时长超过总时长的该比例时，直接整片烧录更划算
+    """
+    state_file = _state_path(output_path)
+    state = None
+    if state_file.exists() and Path(output_path).exists():
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        snapshot = Path(output_path).with_name(state.get("subtitle", ""))
+        if (state.get("video") != _video_ident(video_path)
+                or {k: state.get(k) for k in ("filter", "preset")} != _burn_params(make_filter, preset)
+                or not snapshot.is_file()):
+            print("⚠️ 源视频或烧录参数已变化，整片重新烧录")
+            state = None
+
+    ranges = changed_ranges(str(snapshot), subtitle_path) if state else None
+    if state and ranges is None:
+        print("⚠️ 字幕样式已变化，整片重新烧录")
+
+    if ranges is not None:
+        if not ranges:
+            print(f"⏭️ 字幕未变化，保留上次输出: {output_path}")
+            return
+        ffprobe_path = ffprobe_for(ffmpeg_path)
+        duration = probe_duration(ffprobe_path, output_path)
+        dirty = gop_ranges(ranges, probe_keyframes(ffprobe_path, output_path), duration)
+        dirty_seconds = sum(end - start for start, end in dirty)
+        if dirty_seconds <= duration * max_ratio:
+            source = video_path
+            if preset.get("height"):
+                source = make_proxy(ffmpeg_path, video_path, int(preset["height"]))
+            print(f"✂️ {len(ranges)} 处字幕有变化，重编 {len(dirty)} 段共 {dirty_seconds:.1f}s / {duration:.1f}s")
+            _splice(ffmpeg_path, source, output_path, subtitle_path, output_path,
+                    make_filter, preset, dirty, duration, workers)
+            record_burn(video_path, subtitle_path, output_path, make_filter, preset)
+            return
+        print(f"⚠️ 变化部分过多（{dirty_seconds:.1f}s / {duration:.1f}s），整片重新烧录")
+
+    burn(ffmpeg_path, video_path, subtitle_path, output_path, make_filter, preset, workers=workers)
+    record_burn(video_path, subtitle_path, output_path, make_filter, preset)
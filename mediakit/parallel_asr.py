@@ -0,0 +1,201 @@
+"""
+parallel_asr.py - 多进程分块并行转写
+
+长音频整段交给一个 WhisperModel 时只能用到少数核心。这里先用 VAD 找出静音位置，
+在静音处把 16kHz 单声道 WAV 切成若干块，交给进程池并行转写:
+  - 每个工作进程持有自己的 WhisperModel（通过 whisper_pool 加载），cpu_threads 按核数均分
+  - 各块结果按块起点加上偏移，恢复为全局时间戳
+  - 块边界处重叠/重复的分段会被去重
+
+用法:
+    from mediakit.parallel_asr import transcribe_parallel
+    segments, info = transcribe_parallel("a_audio.wav", model_dir, workers=4, language="zh")
+"""
+
+import os
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from mediakit.asr_tuning import resolve
+
+SAMPLE_RATE = 16000
+
+
+class Segment(NamedTuple):
+    start: float
+    end: float
+    text: str
+
+
+class TranscriptionInfo(NamedTuple):
+    language: Optional[str]
+    duration: float
+
+
+# ======================
+# 音频读取
+# ======================
+def read_wav(path: str, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+    """读取 16kHz 单声道 16bit WAV 的 [start, end) 采样，返回 float32 数组"""
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"❌ 需要 16kHz 单声道 16bit WAV: {path}")
+        total = wf.getnframes()
+        end = total if end is None else min(end, total)
+        wf.setpos(start)
+        data = wf.readframes(max(0, end - start))
+    return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def wav_num_samples(path: str) -> int:
+    with wave.open(path, "rb") as wf:
+        return wf.getnframes()
+
+
+# ======================
+# 切块
+# ======================
+def detect_speech(audio: np.ndarray, min_silence_ms: int = 500) -> List[Tuple[int, int]]:
+    """用 faster-whisper 自带的 Silero VAD 找出语音区间（采样点）"""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    spans = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=min_silence_ms))
+    return [(s["start"], s["end"]) for s in spans]
+
+
+def plan_chunks(total_samples: int, speech: List[Tuple[int, int]], target_samples: int) -> List[Tuple[int, int]]:
+    """
+    在静音间隙中选切点，使每块长度接近 target_samples。
+    间隙取中点；某个目标位置附近没有间隙时直接硬切。
+    """
+    if total_samples <= target_samples:
+        return [(0, total_samples)]
+
+    gaps = [(speech[i][1] + speech[i + 1][0]) // 2 for i in range(len(speech) - 1)]
+    cuts = []
+    pos = 0
+    while total_samples - pos > target_samples * 1.5:
+        want = pos + target_samples
+        lo, hi = pos + target_samples // 2, pos + target_samples * 3 // 2
+        candidates = [g for g in gaps if lo <= g <= hi]
+        cut = min(candidates, key=lambda g: abs(g - want)) if candidates else want
+        cuts.append(cut)
+        pos = cut
+
+    bounds = [0] + cuts + [total_samples]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+# ======================
+# 工作进程
+# ======================
+_WORKER = {}
+
+
+def _init_worker(model_dir: str, device: str, compute_type: str, cpu_threads: int):
+    from mediakit.whisper_pool import get_whisper_model
+
+    _WORKER["model"] = get_whisper_model(model_dir, device=device, compute_type=compute_type,
+                                         cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(audio_path: str, start: int, end: int, transcribe_kwargs: dict,
+                      speech_ms: Optional[List[Tuple[int, int]]] = None) -> List[Segment]:
+    """speech_ms: 块内语音区间（相对块起点的毫秒），给出时只解码语音段"""
+    audio = read_wav(audio_path, start, end)
+    if speech_ms:
+        from mediakit.asr import transcribe_speech
+        from mediakit.speech_map import SpeechMap
+
+        speech_map = SpeechMap(speech_ms, len(audio) * 1000 // SAMPLE_RATE)
+        segments, _ = transcribe_speech(_WORKER["model"], audio, speech_map, **transcribe_kwargs)
+    else:
+        segments, _ = _WORKER["model"].transcribe(audio, **transcribe_kwargs)
+    offset = start / SAMPLE_RATE
+    return [Segment(offset + s.start, offset + s.end, s.text) for s in segments]
+
+
+# ======================
+# 合并
+# ======================
+def stitch(chunks: List[List[Segment]], tolerance: float = 0.2) -> List[Segment]:
+    """按块顺序拼接，丢掉块边界处与前一段重复的分段，并修正重叠的起点"""
+    merged: List[Segment] = []
+    for chunk in chunks:
+        for seg in chunk:
+            if merged:
+                prev = merged[-1]
+                if seg.start < prev.end - tolerance:
+                    text = seg.text.strip()
+                    if not text or text in prev.text or seg.end <= prev.end:
+                        continue
+                    seg = seg._replace(start=prev.end)
+            merged.append(seg)
+    return merged
+
+
+def transcribe_parallel(
+    audio_path: str,
+    model_dir: str,
+    workers: int = 0,
+    device: str = "cpu",
+    compute_type: str = "default",
+    chunk_seconds: Optional[float] = None,
+    skip_silence: bool = False,
+    **transcribe_kwargs,
+) -> Tuple[List[Segment], TranscriptionInfo]:
+    """
+    并行转写 16kHz 单声道 WAV。
+    workers:        进程数，0 表示按 CPU 核数自动选择
+    chunk_seconds:  目标块长，默认按 总时长 / (workers * 2) 计算并限制在 30~600 秒
+    skip_silence:   用缓存的 speech map（speech_map.py）规划切点，并跳过完全没有语音的块
+    其余参数原样传给 WhisperModel.transcribe（beam_size / task / language ...）
+    """
+    # 子进程里没有加载本机配置，compute_type 在这里补全后传过去
+    compute_type, _, _ = resolve(model_dir, device, compute_type)
+    cpu_count = os.cpu_count() or 1
+    workers = workers or max(1, cpu_count // 4)
+    cpu_threads = max(1, cpu_count // workers)
+
+    total = wav_num_samples(audio_path)
+    duration = total / SAMPLE_RATE
+    if chunk_seconds is None:
+        chunk_seconds = min(600.0, max(30.0, duration / (workers * 2)))
+
+    if skip_silence:
+        from mediakit.speech_map import SpeechMap
+
+        speech = SpeechMap.for_audio(audio_path).sample_spans()
+    else:
+        speech = detect_speech(read_wav(audio_path))
+    chunks = plan_chunks(total, speech, int(chunk_seconds * SAMPLE_RATE))
+
+    # 各块内的语音区间（相对块起点的毫秒）；完全没有语音的块直接跳过
+    chunk_speech = [None] * len(chunks)
+    if skip_silence:
+        chunk_speech = [[((max(ss, s) - s) * 1000 // SAMPLE_RATE, (min(se, e) - s) * 1000 // SAMPLE_RATE)
+                         for ss, se in speech if ss < e and se > s] for s, e in chunks]
+        keep = [i for i, spans in enumerate(chunk_speech) if spans]
+        chunks, chunk_speech = [chunks[i] for i in keep], [chunk_speech[i] for i in keep]
+        if not chunks:
+            return [], TranscriptionInfo(transcribe_kwargs.get("language"), duration)
+    print(f"⚡ 并行转写: {len(chunks)} 块 / {workers} 进程 / 每进程 {cpu_threads} 线程")
+
+    if len(chunks) == 1 or workers == 1:
+        _init_worker(model_dir, device, compute_type, cpu_threads * workers)
+        results = [_transcribe_chunk(audio_path, s, e, transcribe_kwargs, sp)
+                   for (s, e), sp in zip(chunks, chunk_speech)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(model_dir, device, compute_type, cpu_threads),
+        ) as pool:
+            futures = [pool.submit(_transcribe_chunk, audio_path, s, e, transcribe_kwargs, sp)
+                       for (s, e), sp in zip(chunks, chunk_speech)]
+            results = [f.result() for f in futures]
+
+    return stitch(results), TranscriptionInfo(transcribe_kwargs.get("language"), duration)
@@ -0,0 +1,210 @@
+"""
+parallel_burn.py - 分段并行烧录字幕
+
+单个 ffmpeg 进程带字幕滤镜重编码整部视频是流水线里最慢的一步，且 x264 的线程扩展有限。
+这里按关键帧把视频切成 N 段，并发编码后无损拼接:
+  1. ffprobe 读出视频流关键帧时间（只读包头，不解码），在靠近 N 等分点的关键帧处切分
+  2. 每段配一份平移到从 0 开始的字幕切片（SRT / ASS）
+  3. 每段一个 ffmpeg 进程（-ss 输入定位 + -t），只编码视频；各进程分摊 CPU 线程
+  4. concat demuxer 以 -c copy 拼接各段，再原样复制源视频的音轨
+
+切点都在关键帧上，每段解码起点与单遍编码一致，输出画面与单遍结果等价。
+
+用法:
+    burn_parallel(ffmpeg, "a.mp4", "a.ass", "a_subtitled.mp4", make_filter=make_filter, workers=4)
+切片路径在输出目录下（通常是绝对路径，Windows 上带盘符），make_filter 需自行转义
+（见 encoding.escape_filter_path）。
+"""
+
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from mediakit import timecode
+from mediakit.subtitles import Cues, read_srt, write_srt
+
+
+def ffprobe_for(ffmpeg_path: str) -> str:
+    """同目录下的 ffprobe（ffmpeg 在 PATH 上时返回 "ffprobe"）"""
+    path = Path(ffmpeg_path)
+    name = path.name.replace("ffmpeg", "ffprobe")
+    return str(path.with_name(name)) if path.parent != Path(".") else name
+
+
+def probe_duration(ffprobe_path: str, video_path: str) -> float:
+    out = subprocess.run(
+        [ffprobe_path, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", video_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(out.strip())
+
+
+# MP4 能直接装下的音频编码；其余（如 .MOV 常见的 pcm_s16le）复制进 .mp4 会失败，需要转 AAC
+MP4_AUDIO_CODECS = {"aac", "mp3", "alac", "ac3", "eac3", "opus"}
+
+
+def probe_audio_codec(ffprobe_path: str, video_path: str) -> str:
+    """第一条音轨的编码名；没有音轨或探测失败时返回空串"""
+    try:
+        out = subprocess.run(
+            [ffprobe_path, "-v", "error", "-select_streams", "a:0",
+             "-show_entries", "stream=codec_name", "-of", "csv=p=0", video_path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return out.strip().splitlines()[0].strip() if out.strip() else ""
+
+
+def audio_args(ffmpeg_path: str, source: str, output_path: str) -> List[str]:
+    """音轨能原样放进输出容器时 -c:a copy，否则转 AAC"""
+    container = Path(output_path).suffix.lower()
+    if container in (".mp4", ".m4v", ".mov"):
+        codec = probe_audio_codec(ffprobe_for(ffmpeg_path), source)
+        allowed = codec in MP4_AUDIO_CODECS or (container == ".mov" and codec.startswith("pcm_"))
+        if codec and not allowed:
+            print(f"🔈 音轨 {codec} 无法直接放入 {container}，转为 AAC")
+            return ["-c:a", "aac", "-b:a", "192k"]
+    return ["-c:a", "copy"]
+
+
+def probe_keyframes(ffprobe_path: str, video_path: str) -> np.ndarray:
+    """视频流关键帧的时间（秒，升序）"""
+    out = subprocess.run(
+        [ffprobe_path, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    times = []
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            times.append(float(pts))
+    return np.unique(np.array(times, dtype=np.float64))
+
+
+def plan_segments(keyframes: np.ndarray, duration: float, segments: int,
+                  min_seconds: float = 10.0) -> List[Tuple[float, float]]:
+    """在最接近 N 等分点的关键帧处切分，返回 [(start, end)]；过短的段会被合并"""
+    cuts = [0.0]
+    if len(keyframes):
+        for target in np.linspace(0, duration, segments + 1)[1:-1]:
+            k = float(keyframes[np.abs(keyframes - target).argmin()])
+            if k - cuts[-1] >= min_seconds and duration - k >= min_seconds:
+                cuts.append(k)
+    cuts.append(duration)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+# ======================
+# 字幕切片
+# ======================
+def _slice_srt(src: str, dst: str, start_ms: int, end_ms: int):
+    cues = read_srt(src)
+    keep = (cues.end_ms > start_ms) & (cues.start_ms < end_ms)
+    texts = [t for t, k in zip(cues.texts, keep.tolist()) if k]
+    sliced = Cues(cues.start_ms[keep], cues.end_ms[keep], texts).retimed(offset_ms=-start_ms)
+    write_srt(dst, sliced)
+
+
+def _slice_ass(src: str, dst: str, start_ms: int, end_ms: int):
+    """保留脚本头和样式，只平移/筛选 Dialogue 行"""
+    with open(src, "r", encoding="utf-8-sig") as f:
+        lines = f.read().splitlines()
+
+    idx = [i for i, line in enumerate(lines) if line.startswith("Dialogue:")]
+    fields = [lines[i].split(",", 9) for i in idx]
+    starts = timecode.parse(f[1].strip() for f in fields)
+    ends = timecode.parse(f[2].strip() for f in fields)
+    keep = (ends > start_ms) & (starts < end_ms)
+    new_starts = timecode.format_ass(np.maximum(starts - start_ms, 0)).tolist()
+    new_ends = timecode.format_ass(np.maximum(ends - start_ms, 0)).tolist()
+
+    dialogue = dict(zip(idx, range(len(idx))))
+    out = []
+    for i, line in enumerate(lines):
+        j = dialogue.get(i)
+        if j is None:
+            out.append(line)
+        elif keep[j]:
+            f = fields[j]
+            out.append(",".join([f[0], new_starts[j], new_ends[j]] + f[3:]))
+    with open(dst, "w", encoding="utf-8") as f:
+        f.write("\n".join(out) + "\n")
+
+
+def slice_subtitles(src: str, dst: str, start: float, end: float):
+    """截取 [start, end) 内的字幕并平移到从 0 开始"""
+    start_ms, end_ms = int(timecode.to_ms(start)), int(timecode.to_ms(end))
+    if Path(src).suffix.lower() == ".ass":
+        _slice_ass(src, dst, start_ms, end_ms)
+    else:
+        _slice_srt(src, dst, start_ms, end_ms)
+
+
+# ======================
+# 并行烧录
+# ======================
+def burn_parallel(ffmpeg_path: str, video_path: str, subtitle_path: str, output_path: str,
+                  make_filter: Callable[[str], str], workers: int = 0,
+                  video_args: Sequence[str] = (), keep_parts: bool = False) -> List[Tuple[float, float]]:
+    """
+    make_filter: 字幕切片路径 -> -vf 滤镜字符串（各脚本的转义/样式各不相同，由调用方决定）
+    video_args:  视频编码参数（如 ["-c:v", "libx264", "-crf", "20"]），为空时用 ffmpeg 默认
+    返回实际的分段 [(start, end)]
+    """
+    workers = workers or os.cpu_count() or 1
+    ffprobe_path = ffprobe_for(ffmpeg_path)
+    duration = probe_duration(ffprobe_path, video_path)
+    segments = plan_segments(probe_keyframes(ffprobe_path, video_path), duration, workers)
+    threads = max(1, (os.cpu_count() or 1) // len(segments))
+
+    out = Path(output_path)
+    # 切片放在输出目录下；路径可能是带盘符的绝对路径，由 make_filter 转义
+    work_dir = out.parent / f"{out.stem}_parts"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    sub_suffix = Path(subtitle_path).suffix.lower() or ".srt"
+
+    def encode(i: int) -> Path:
+        start, end = segments[i]
+        sub_slice = (work_dir / f"part{i:03d}{sub_suffix}").as_posix()
+        slice_subtitles(subtitle_path, sub_slice, start, end)
+        part = work_dir / f"part{i:03d}{out.suffix}"
+        cmd = [
+            ffmpeg_path, "-y", "-loglevel", "error",
+            "-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}",
+            "-map", "0:v:0", "-an",
+            "-vf", make_filter(sub_slice),
+            *video_args, "-threads", str(threads),
+            str(part),
+        ]
+        subprocess.run(cmd, check=True)
+        return part
+
+    try:
+        print(f"🎬 分 {len(segments)} 段并行烧录（每段 {threads} 线程）...")
+        with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+            parts = list(pool.map(encode, range(len(segments))))
+
+        list_file = work_dir / "concat.txt"
+        with open(list_file, "w", encoding="utf-8") as f:
+            for part in parts:
+                f.write(f"file '{part.resolve().as_posix()}'\n")
+        subprocess.run([
+            ffmpeg_path, "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", str(list_file),
+            "-i", video_path,
+            "-map", "0:v:0", "-map", "1:a?",
+            "-c", "copy", *audio_args(ffmpeg_path, video_path, output_path),
+            output_path,
+        ], check=True)
+    finally:
+        # 某段编码失败时也清掉切片目录
+        if not keep_parts:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return segments
@@ -0,0 +1,111 @@
+"""
+pipeline.py - 多任务分阶段流水线（每个阶段独立线程池 + 有界队列）
+
+批量处理视频时，逐个视频串行跑 抽音频 → 转写 → 翻译 → 烧录，总耗时是各阶段之和。
+这里把各阶段拆开: 每个阶段有自己的工作线程和输入队列，任务逐个流过各阶段，
+视频 N 在转写时，N+1 在抽音频、N-1 在翻译、N-2 在烧录，吞吐只受最慢的阶段限制。
+队列有界，快的阶段不会无限堆积中间产物（磁盘上的 WAV 等）。
+
+某个任务在某阶段出错时记录异常并跳过后续阶段，不影响其他任务。
+
+用法:
+    stages = [Stage("extract", extract, workers=2), Stage("asr", transcribe), Stage("burn", burn)]
+    jobs = run_pipeline([{"video": v} for v in videos], stages)
+    for job in jobs: print(job.data["video"], job.error, job.timings)
+"""
+
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+
+class Stage(NamedTuple):
+    name: str
+    fn: Callable[[Dict[str, Any]], None]  # 处理 job.data（原地修改）
+    workers: int = 1
+    queue_size: int = 2
+
+
+class Job:
+    def __init__(self, index: int, data: Dict[str, Any]):
+        self.index = index
+        self.data = data
+        self.error: Optional[BaseException] = None
+        self.failed_stage: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+
+_DONE = object()
+
+
+def run_pipeline(items: Iterable[Dict[str, Any]], stages: List[Stage],
+                 on_done: Optional[Callable[[Job], None]] = None) -> List[Job]:
+    """
+    items:   每个任务的初始数据（dict，各阶段在上面读写）
+    on_done: 每个任务走完（或出错）时回调，在工作线程中调用
+    返回按输入顺序排列的 Job 列表
+    """
+    queues = [queue.Queue(maxsize=max(1, stage.queue_size)) for stage in stages]
+    finished: List[Job] = []
+    finished_lock = threading.Lock()
+
+    def finish(job: Job):
+        with finished_lock:
+            finished.append(job)
+        if on_done is not None:
+            # 回调出错不能带走工作线程，否则下游收不到结束信号，run_pipeline 卡在 join
+            try:
+                on_done(job)
+            except Exception as e:
+                print(f"⚠️ on_done 回调出错（任务 {job.index}）: {e}")
+                traceback.print_exc()
+
+    def worker(i: int, alive: List[int], alive_lock: threading.Lock):
+        stage = stages[i]
+        try:
+            while True:
+                job = queues[i].get()
+                if job is _DONE:
+                    break
+                if job.error is None:
+                    t0 = time.perf_counter()
+                    try:
+                        stage.fn(job.data)
+                    except Exception as e:
+                        job.error, job.failed_stage = e, stage.name
+                        print(f"❌ [{stage.name}] 任务 {job.index} 失败: {e}")
+                        traceback.print_exc()
+                    job.timings[stage.name] = time.perf_counter() - t0
+                if i + 1 < len(stages) and job.error is None:
+                    queues[i + 1].put(job)
+                else:
+                    finish(job)
+        finally:
+            # 本阶段最后一个线程退出时（包括意外退出），通知下一阶段
+            with alive_lock:
+                alive[0] -= 1
+                last = alive[0] == 0
+            if last and i + 1 < len(stages):
+                for _ in range(max(1, stages[i + 1].workers)):
+                    queues[i + 1].put(_DONE)
+
+    threads = []
+    for i, stage in enumerate(stages):
+        n = max(1, stage.workers)
+        alive, alive_lock = [n], threading.Lock()
+        for k in range(n):
+            t = threading.Thread(target=worker, args=(i, alive, alive_lock), name=f"{stage.name}-{k}", daemon=True)
+            t.start()
+            threads.append(t)
+
+    # 有界队列：第一阶段满了这里就阻塞，按处理速度投放任务
+    for index, data in enumerate(items):
+        queues[0].put(Job(index, data))
+    for _ in range(max(1, stages[0].workers)):
+        queues[0].put(_DONE)
+
+    for t in threads:
+        t.join()
+    return sorted(finished, key=lambda job: job.index)
@@ -0,0 +1,49 @@
+"""
+speaker_prep.py - 说话人参考音频预处理（内容寻址缓存）
+
+set_speaker / predict 每次都用 ffmpeg 跑一遍 highpass/lowpass/silenceremove，
+并覆盖同一个输出文件，并发请求会互相踩文件。这里按 (输入文件内容哈希 + 滤镜参数)
+生成缓存文件名，结果已存在时直接返回；写入先落到临时文件再原子改名，互不干扰。
+"""
+
+import hashlib
+import os
+import subprocess
+import threading
+from pathlib import Path
+
+from mediakit.hashing import file_sha256
+
+SPEAKER_FILTER = "highpass=75,lowpass=8000,"
+TRIM_SILENCE = (
+    "areverse,silenceremove=start_periods=1:start_silence=0:start_threshold=0.02,"
+    "areverse,silenceremove=start_periods=1:start_silence=0:start_threshold=0.02"
+)
+
+
+def speaker_filter(cleanup_voice: bool = True) -> str:
+    return f"{SPEAKER_FILTER}{TRIM_SILENCE}" if cleanup_voice else ""
+
+
+def preprocess_speaker(ffmpeg_path: str, speaker_file: str, cleanup_voice: bool = True,
+                       cache_dir: str = "speakers/cache") -> str:
+    """返回预处理后的 WAV 路径；相同输入与参数只处理一次"""
+    af = speaker_filter(cleanup_voice)
+    key = hashlib.sha256(f"{file_sha256(speaker_file)}|{af}".encode("utf-8")).hexdigest()[:32]
+    out_path = Path(cache_dir) / f"{key}.wav"
+    if out_path.exists():
+        return str(out_path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = out_path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp.wav")
+    cmd = [ffmpeg_path, "-y", "-loglevel", "error", "-i", speaker_file]
+    if af:
+        cmd += ["-af", af]
+    cmd.append(str(tmp_path))
+    try:
+        subprocess.run(cmd, check=True)
+        os.replace(tmp_path, out_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return str(out_path)
@@ -0,0 +1,252 @@
+"""
+speech_map.py - 语音活动图（speech map）：快速能量 VAD，缓存在音频旁，供 ASR / 分块 / 字幕重定时复用
+
+录屏、教程里常有大段静音或只有背景音的片段，Whisper 照样逐窗解码。这里先对 16kHz PCM 做一遍
+向量化的分帧能量分析（每帧 20ms，一次 reshape + mean，1 小时音频不到 1 秒）:
+  1. 帧能量(dB) 高于 噪声底(10% 分位) + margin_db 的帧视为有声
+  2. 短于 min_silence_ms 的停顿并入前后语音，短于 min_speech_ms 的语音段丢弃（咔哒声等）
+  3. 每段前后各留 pad_ms，重叠的段合并
+结果（毫秒区间）存为 <音频>.speech.json，音频未变化且参数相同时直接读取。
+
+用法:
+    sm = SpeechMap.for_audio("outputs/a_audio.wav")
+    compact = sm.compact(audio)              # 只保留语音段（段间留短静音）送入 Whisper
+    start, end = sm.to_source([seg.start, seg.end])   # 紧凑时间轴 -> 原始时间轴
+    chunks = plan_chunks(total, sm.sample_spans(), target)   # parallel_asr 在静音处切块
+    cues = sm.snap(cues)                     # 字幕边界贴合语音起止
+"""
+
+import json
+import os
+import wave
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+GAP_MS = 300  # compact() 中语音段之间保留的静音，避免 Whisper 把相邻两句粘在一起
+VERSION = 2
+
+DEFAULT_PARAMS = {
+    "margin_db": 12.0,       # 高于噪声底多少 dB 视为有声
+    "floor_db": -55.0,       # 阈值下限（数字静音时噪声底很低）
+    "min_speech_ms": 200,
+    "min_silence_ms": 400,
+    "pad_ms": 150,
+}
+
+
+# ======================
+# 分帧能量
+# ======================
+def frame_db(audio: np.ndarray, frame: int) -> np.ndarray:
+    """每帧均方能量（dBFS），末尾不足一帧的采样丢弃"""
+    n = len(audio) // frame
+    x = np.asarray(audio[:n * frame], dtype=np.float32).reshape(n, frame)
+    return 10 * np.log10(np.einsum("ij,ij->i", x, x) / frame + 1e-10)
+
+
+def _wav_frame_db(path: str, frame: int, block_frames: int = 3000) -> Tuple[np.ndarray, int]:
+    """按块读取 16kHz 单声道 16bit WAV 计算帧能量，返回 (帧能量, 总采样数)；内存与时长无关"""
+    out = []
+    try:
+        wf = wave.open(path, "rb")
+    except (wave.Error, EOFError) as e:
+        # float / 24bit 等 wave 模块不支持的格式
+        raise ValueError(f"❌ 需要 16kHz 单声道 16bit WAV: {path}（{e}）") from e
+    with wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"❌ 需要 16kHz 单声道 16bit WAV: {path}")
+        total = wf.getnframes()
+        while True:
+            data = wf.readframes(block_frames * frame)
+            if not data:
+                break
+            out.append(frame_db(np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0, frame))
+    return (np.concatenate(out) if out else np.zeros(0, dtype=np.float32)), total
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """布尔数组中连续 True 段的 [start, end) 下标"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_spans(db: np.ndarray, duration_ms: int, frame_ms: int = FRAME_MS,
+                 params: Dict[str, float] | None = None) -> np.ndarray:
+    """帧能量 -> 语音区间（毫秒，int64，形状 (N, 2)）"""
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    if len(db) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    noise, loud = np.percentile(db, [10, 90])
+    if loud > p["floor_db"] and loud - noise < p["margin_db"]:
+        # 几乎没有安静的帧（通篇有声 / 持续背景音）：分不出噪声底，整段当作语音，宁可多解码也不漏
+        return np.array([[0, duration_ms]], dtype=np.int64)
+    threshold = max(float(noise) + p["margin_db"], p["floor_db"])
+    starts, ends = _runs(db > threshold)
+    if len(starts):
+        # 合并短停顿
+        keep = (starts[1:] - ends[:-1]) * frame_ms >= p["min_silence_ms"]
+        starts = np.concatenate((starts[:1], starts[1:][keep]))
+        ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+        # 丢弃过短的语音
+        long_enough = (ends - starts) * frame_ms >= p["min_speech_ms"]
+        starts, ends = starts[long_enough], ends[long_enough]
+    if len(starts) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    pad = int(p["pad_ms"])
+    s = np.maximum(starts.astype(np.int64) * frame_ms - pad, 0)
+    e = np.minimum(ends.astype(np.int64) * frame_ms + pad, duration_ms)
+    # 加边后重叠的段合并：起点超过此前所有终点的最大值时开新段
+    new_group = np.concatenate(([True], s[1:] > np.maximum.accumulate(e)[:-1]))
+    group = np.cumsum(new_group) - 1
+    merged_s = s[new_group]
+    merged_e = np.zeros(len(merged_s), dtype=np.int64)
+    np.maximum.at(merged_e, group, e)
+    return np.stack((merged_s, merged_e), axis=1)
+
+
+# ======================
+# SpeechMap
+# ======================
+class SpeechMap:
+    def __init__(self, spans_ms, duration_ms: int, params: Dict[str, float] | None = None):
+        self.spans = np.asarray(spans_ms, dtype=np.int64).reshape(-1, 2)
+        self.duration_ms = int(duration_ms)
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+
+    @classmethod
+    def from_audio(cls, audio: np.ndarray, sample_rate: int = SAMPLE_RATE, **params) -> "SpeechMap":
+        frame = sample_rate * FRAME_MS // 1000
+        duration_ms = len(audio) * 1000 // sample_rate
+        return cls(detect_spans(frame_db(audio, frame), duration_ms, FRAME_MS, params), duration_ms, params)
+
+    @classmethod
+    def from_wav(cls, path: str, **params) -> "SpeechMap":
+        db, total = _wav_frame_db(path, SAMPLE_RATE * FRAME_MS // 1000)
+        duration_ms = total * 1000 // SAMPLE_RATE
+        return cls(detect_spans(db, duration_ms, FRAME_MS, params), duration_ms, params)
+
+    @staticmethod
+    def path_for(audio_path: str) -> Path:
+        return Path(audio_path).with_suffix(".speech.json")
+
+    @classmethod
+    def for_audio(cls, audio_path: str, audio: np.ndarray | None = None, **params) -> "SpeechMap":
+        """
+        读取音频旁缓存的 speech map；音频（size/mtime）或参数变化时重新分析并写回。
+        audio: 已解码的 16kHz 数组（视频或非 16bit WAV 由调用方用 load_audio 解码），给出时分析数组而不读 WAV
+        """
+        path = cls.path_for(audio_path)
+        st = os.stat(audio_path)
+        source = [st.st_size, st.st_mtime_ns]
+        wanted = {**DEFAULT_PARAMS, **params}
+        if path.exists():
+            try:
+                sm, meta = cls.load(str(path))
+                if meta.get("source") == source and sm.params == wanted and meta.get("version") == VERSION:
+                    return sm
+            except (OSError, ValueError, KeyError):
+                pass
+        sm = cls.from_audio(audio, **params) if audio is not None else cls.from_wav(audio_path, **params)
+        sm.save(str(path), source=source)
+        print(f"🔈 语音占比 {sm.ratio:.0%}（{len(sm.spans)} 段），已保存: {path}")
+        return sm
+
+    def save(self, path: str, **meta):
+        data = {
+            "version": VERSION,
+            **meta,
+            "params": self.params,
+            "frame_ms": FRAME_MS,
+            "duration_ms": self.duration_ms,
+            # 扁平数组 [s0, e0, s1, e1, ...]，长音频也只有几 KB
+            "spans": self.spans.ravel().tolist(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["SpeechMap", dict]:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["spans"], data["duration_ms"], data["params"]), data
+
+    # -------------------------
+    # 统计
+    # -------------------------
+    @property
+    def speech_ms(self) -> int:
+        return int((self.spans[:, 1] - self.spans[:, 0]).sum())
+
+    @property
+    def ratio(self) -> float:
+        return self.speech_ms / self.duration_ms if self.duration_ms else 0.0
+
+    def sample_spans(self, sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+        """采样点区间，格式与 parallel_asr.detect_speech 相同"""
+        return [(s * sample_rate // 1000, e * sample_rate // 1000) for s, e in self.spans.tolist()]
+
+    # -------------------------
+    # 紧凑音频与时间映射
+    # -------------------------
+    def _compact_starts(self, gap_ms: int) -> np.ndarray:
+        """各语音段在紧凑时间轴上的起点（毫秒）"""
+        lengths = self.spans[:, 1] - self.spans[:, 0]
+        return np.concatenate(([0], np.cumsum(lengths + gap_ms)[:-1])) if len(lengths) else np.zeros(0, np.int64)
+
+    def compact(self, audio: np.ndarray, sample_rate: int = SAMPLE_RATE, gap_ms: int = GAP_MS) -> np.ndarray:
+        """只保留语音段，段间插入 gap_ms 静音"""
+        gap = np.zeros(gap_ms * sample_rate // 1000, dtype=np.float32)
+        parts = []
+        for s, e in self.sample_spans(sample_rate):
+            parts.append(audio[s:e])
+            parts.append(gap)
+        return np.concatenate(parts[:-1]).astype(np.float32, copy=False) if parts else np.zeros(0, np.float32)
+
+    def to_source(self, times: Sequence[float], gap_ms: int = GAP_MS) -> np.ndarray:
+        """
+        紧凑时间轴（秒）-> 原始时间轴（秒）。
+        落在段间插入静音里的时间点映射到前一段的终点。
+        """
+        t = np.asarray(times, dtype=np.float64) * 1000
+        if len(self.spans) == 0:
+            return t / 1000
+        starts = self._compact_starts(gap_ms)
+        k = np.clip(np.searchsorted(starts, t, side="right") - 1, 0, len(starts) - 1)
+        lengths = self.spans[k, 1] - self.spans[k, 0]
+        offset = np.clip(t - starts[k], 0, lengths)
+        return (self.spans[k, 0] + offset) / 1000
+
+    # -------------------------
+    # 字幕重定时
+    # -------------------------
+    def snap(self, cues, tolerance_ms: int = 400):
+        """
+        字幕边界贴合语音：起点落在静音里且距下一段语音不超过 tolerance_ms 时推到语音起点，
+        终点落在静音里且距上一段语音终点不超过 tolerance_ms 时收到语音终点。返回新的 Cues。
+        """
+        from mediakit.subtitles import Cues
+
+        if len(self.spans) == 0 or len(cues) == 0:
+            return cues
+        span_s, span_e = self.spans[:, 0], self.spans[:, 1]
+
+        start = cues.start_ms.copy()
+        i = np.searchsorted(span_e, start, side="right")  # 第一个终点在 start 之后的段
+        has = i < len(span_s)
+        nxt = np.where(has, span_s[np.minimum(i, len(span_s) - 1)], start)
+        move = has & (nxt > start) & (nxt - start <= tolerance_ms)
+        start = np.where(move, nxt, start)
+
+        end = cues.end_ms.copy()
+        j = np.searchsorted(span_s, end, side="left") - 1  # 最后一个起点在 end 之前的段
+        has = j >= 0
+        prev = np.where(has, span_e[np.maximum(j, 0)], end)
+        move = has & (prev < end) & (end - prev <= tolerance_ms)
+        end = np.maximum(np.where(move, prev, end), start)
+        return Cues(start, end, cues.texts)
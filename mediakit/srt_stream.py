@@ -0,0 +1,77 @@
+"""
+srt_stream.py - 流式字幕输出与转写进度
+
+faster-whisper 的 segments 是惰性迭代器，这里让每一段解码出来就立刻写入并 flush，
+长视频转写过程中即可打开 SRT 查看；下游（翻译、ASS 生成）也直接消费同一个流，
+不必等整份字幕进内存。
+
+用法:
+    segments, info = model.transcribe(...)
+    with SRTStreamWriter(srt_path) as writer:
+        for seg in track_progress(segments, info.duration):
+            writer.write(seg.start, seg.end, seg.text.strip())
+"""
+
+import sys
+import time
+from typing import Iterable, Iterator, Optional, TypeVar
+
+from mediakit.timecode import srt_timestamp
+
+T = TypeVar("T")
+
+
+class SRTStreamWriter:
+    """逐条写入 SRT，每条写完立即 flush"""
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self._f = open(path, "w", encoding=encoding)
+        self.count = 0
+
+    def write(self, start: float, end: float, text: str):
+        self.count += 1
+        self._f.write(f"{self.count}\n{srt_timestamp(start)} --> {srt_timestamp(end)}\n{text}\n\n")
+        self._f.flush()
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def track_progress(segments: Iterable[T], duration: Optional[float], label: str = "转写",
+                   min_interval: float = 0.5) -> Iterator[T]:
+    """
+    透传 segments，同时在终端刷新进度：已处理音频占 duration 的比例与实时率(RTF)。
+    duration 未知（如流式解码）时只显示已处理秒数。
+    """
+    t0 = time.perf_counter()
+    last_print = 0.0
+    position = 0.0
+    for seg in segments:
+        position = max(position, getattr(seg, "end", position))
+        now = time.perf_counter()
+        if now - last_print >= min_interval:
+            last_print = now
+            _print_progress(label, position, duration, now - t0)
+        yield seg
+    _print_progress(label, duration or position, duration, time.perf_counter() - t0)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def _print_progress(label: str, position: float, duration: Optional[float], elapsed: float):
+    rtf = elapsed / position if position > 0 else 0.0
+    if duration:
+        pct = min(position / duration, 1.0) * 100
+        msg = f"⏳ {label}: {pct:5.1f}% ({position:.1f}s / {duration:.1f}s) RTF {rtf:.2f}"
+    else:
+        msg = f"⏳ {label}: {position:.1f}s RTF {rtf:.2f}"
+    sys.stdout.write("\r" + msg)
+    sys.stdout.flush()
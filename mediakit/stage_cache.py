@@ -0,0 +1,124 @@
+"""
+stage_cache.py - 流水线各阶段产物缓存（manifest 记录依赖链）
+
+仅凭 "文件是否存在" 判断要不要重新生成，会把同名的别的视频的 _cn.srt 当成结果，
+改了字号也不会重建 ASS。这里每个阶段的产物都有一个键:
+    key = sha256(阶段名 + 上游标识 + 相关配置/模型标识)
+并写进 <输出目录>/<视频名>.manifest.json。再次运行时键一致且产物存在就跳过。
+
+上游标识的取法:
+  - 源视频：内容哈希（按 size/mtime 记在 manifest 里，未变化时不重复哈希）
+  - 可能被手工修改的产物（字幕、ASS）：当前文件的内容哈希 —— 改了 cn.srt，
+    只有翻译 / ASS / 烧录会重跑，转写不会重跑（也不会覆盖手工修改）
+  - 确定性的中间产物（抽取的 WAV）：直接用其阶段键
+
+用法:
+    cache = StageCache("outputs/a.manifest.json")
+    key = cache.key("ass", [cache.content_hash(cn), cache.content_hash(en)], {"fontsize_cn": 30})
+    if not cache.fresh("ass", key, ass_path):
+        build_ass(...)
+        cache.record("ass", key, ass_path)
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Sequence
+
+from mediakit.hashing import file_sha256
+
+
+def dir_fingerprint(path: str) -> str:
+    """目录（如模型目录）的轻量标识：各文件的名称、大小、修改时间"""
+    p = Path(path)
+    if not p.exists():
+        return f"missing:{p.name}"
+    if p.is_file():
+        st = p.stat()
+        entries = [(p.name, st.st_size, st.st_mtime_ns)]
+    else:
+        entries = sorted((f.name, f.stat().st_size, f.stat().st_mtime_ns) for f in p.iterdir() if f.is_file())
+    return hashlib.sha256(json.dumps(entries).encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    def __init__(self, manifest_path: str):
+        self.manifest_path = Path(manifest_path)
+        self.manifest: Dict[str, Any] = {"stages": {}, "sources": {}}
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest.update(json.load(f))
+            except (OSError, ValueError):
+                print(f"⚠️ manifest 无法读取，将重建: {self.manifest_path}")
+
+    def _save(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    # -------------------------
+    # 键
+    # -------------------------
+    @staticmethod
+    def key(stage: str, upstream: Sequence[str], params: Dict[str, Any] | None = None) -> str:
+        payload = json.dumps({"stage": stage, "upstream": list(upstream), "params": params or {}},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_hash(path: str) -> str:
+        return file_sha256(path)
+
+    def source_hash(self, path: str) -> str:
+        """源文件内容哈希；size/mtime 未变时直接用 manifest 里记录的值"""
+        st = os.stat(path)
+        ident = [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+        entry = self.manifest["sources"].get(os.path.abspath(path))
+        if entry and entry.get("ident") == ident:
+            return entry["sha256"]
+        digest = file_sha256(path)
+        self.manifest["sources"][os.path.abspath(path)] = {"ident": ident, "sha256": digest}
+        self._save()
+        return digest
+
+    # -------------------------
+    # 阶段
+    # -------------------------
+    def fresh(self, stage: str, key: str, output: str, adopt_if_newer_than: str | None = None) -> bool:
+        """
+        键一致且产物存在时返回 True。
+        adopt_if_newer_than：产物存在但 manifest 里没有该阶段记录（旧版本生成、可能手工改过的文件），
+        且产物比给定的上游文件新时沿用并补记。默认不沿用 —— 同名的别的视频留下的产物会被重新生成，
+        只在调用方明确要求（如 --adopt-existing）时才传入。
+        """
+        entry = self.manifest["stages"].get(stage)
+        if not Path(output).exists():
+            return False
+        if entry is None and adopt_if_newer_than:
+            if os.path.getmtime(output) <= os.path.getmtime(adopt_if_newer_than):
+                print(f"⚠️ 已有文件早于 {adopt_if_newer_than}，不沿用: {output}")
+                return False
+            print(f"⚠️ 沿用已有文件（无缓存记录，按修改时间判断）: {output}")
+            self.record(stage, key, output)
+            return True
+        return entry is not None and entry.get("key") == key and entry.get("output") == str(output)
+
+    def record(self, stage: str, key: str, output: str, **info):
+        self.manifest["stages"][stage] = {
+            "key": key,
+            "output": str(output),
+            "output_sha256": file_sha256(output) if Path(output).is_file() else None,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **info,
+        }
+        self._save()
+
+    def invalidate(self, *stages: str):
+        for stage in stages:
+            self.manifest["stages"].pop(stage, None)
+        self._save()
@@ -0,0 +1,200 @@
+"""
+subtitles.py - 字幕读写（SRT 解析，SRT / VTT / ASS 输出）
+
+原先各脚本各有一份解析器，且假设每条字幕只有一行文本。这里统一为:
+  - 单遍流式解析：支持多行字幕、UTF-8 BOM、CRLF、缺失序号、"." 作毫秒分隔符
+  - Cues 紧凑存储：起止时间为 int64 毫秒 numpy 数组，文本为 list
+  - 写出时先在内存里拼好整份文本，一次 write 落盘
+
+用法:
+    cues = read_srt("outputs/a_cn.srt")
+    for start_sec, end_sec, text in cues: ...
+    write_srt("outputs/a_en.srt", cues.with_texts(texts_en))
+    write_ass("outputs/a_cn.ass", [ass_style("CN", "SimHei", 30, 40)],
+              ((s, e, "CN", 120, f"{{\\c&H00FF00&}}{t}") for s, e, t in cues.iter_ms()))
+"""
+
+import itertools
+import re
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from mediakit import timecode
+
+_TS = r"\d+:\d{1,2}:\d{1,2}[,.]\d{1,3}"
+_TIMING_RE = re.compile(rf"^\s*({_TS})\s*-->\s*({_TS})")
+
+
+class Cues:
+    """一组字幕：start_ms / end_ms 为 int64 毫秒数组，texts 为文本（可含换行）"""
+
+    def __init__(self, start_ms, end_ms, texts: List[str]):
+        self.start_ms = np.asarray(start_ms, dtype=np.int64)
+        self.end_ms = np.asarray(end_ms, dtype=np.int64)
+        self.texts = list(texts)
+        if not (len(self.start_ms) == len(self.end_ms) == len(self.texts)):
+            raise ValueError("start_ms, end_ms and texts must have the same length")
+
+    @classmethod
+    def from_seconds(cls, items: Iterable[Tuple[float, float, str]]) -> "Cues":
+        """[(start_sec, end_sec, text)] -> Cues"""
+        items = list(items)
+        starts = [s for s, _, _ in items]
+        ends = [e for _, e, _ in items]
+        return cls(timecode.to_ms(starts), timecode.to_ms(ends), [t for _, _, t in items])
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Tuple[float, float, str]]:
+        """按 (start_sec, end_sec, text) 迭代，与转写结果的元组格式一致"""
+        return zip((self.start_ms / 1000).tolist(), (self.end_ms / 1000).tolist(), self.texts)
+
+    def iter_ms(self) -> Iterator[Tuple[int, int, str]]:
+        return zip(self.start_ms.tolist(), self.end_ms.tolist(), self.texts)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self.start_ms / 1000
+
+    @property
+    def ends(self) -> np.ndarray:
+        return self.end_ms / 1000
+
+    def with_texts(self, texts: Sequence[str]) -> "Cues":
+        """同一时间轴，换一组文本（如译文）"""
+        return Cues(self.start_ms, self.end_ms, texts)
+
+    def retimed(self, offset_ms: int = 0, scale: float = 1.0) -> "Cues":
+        """整体平移 / 缩放时间轴（t * scale + offset），负值截到 0"""
+        start = np.maximum(np.rint(self.start_ms * scale).astype(np.int64) + offset_ms, 0)
+        end = np.maximum(np.rint(self.end_ms * scale).astype(np.int64) + offset_ms, 0)
+        return Cues(start, end, self.texts)
+
+
+# ======================
+# 解析
+# ======================
+def _iter_raw(lines: Iterable[str]) -> Iterator[Tuple[str, str, str]]:
+    """
+    逐行解析 SRT，产出 (起始时间戳, 结束时间戳, 文本)。
+    以时间轴行作为字幕起点，不依赖序号；文本直到空行为止，可跨多行。
+    缺少空行分隔时，紧挨下一条时间轴的纯数字行视为序号。
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    match = _TIMING_RE.match
+    start = end = None
+    text_lines: List[str] = []
+    for line in itertools.chain((first.lstrip("\ufeff"),), lines):
+        line = line.rstrip("\r\n")
+
+        if "-->" in line:
+            m = match(line)
+            if m is not None:
+                if start is not None:
+                    if text_lines and text_lines[-1].strip().isdigit():
+                        text_lines.pop()
+                    yield start, end, "\n".join(text_lines).strip()
+                start, end = m.groups()
+                text_lines = []
+                continue
+
+        if start is None:
+            continue  # 序号或文件头
+        if line.strip():
+            text_lines.append(line)
+        elif text_lines:
+            yield start, end, "\n".join(text_lines).strip()
+            start = end = None
+            text_lines = []
+
+    if start is not None:
+        yield start, end, "\n".join(text_lines).strip()
+
+
+def iter_srt_lines(lines: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+    """逐条产出 (start_ms, end_ms, text)"""
+    for start, end, text in _iter_raw(lines):
+        yield timecode.parse_timestamp(start), timecode.parse_timestamp(end), text
+
+
+def iter_srt(path: str, encoding: str = "utf-8") -> Iterator[Tuple[int, int, str]]:
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        yield from iter_srt_lines(f)
+
+
+def read_srt(path: str, encoding: str = "utf-8") -> Cues:
+    """整份读入；时间戳最后一次性批量解析"""
+    starts: List[str] = []
+    ends: List[str] = []
+    texts: List[str] = []
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        for start, end, text in _iter_raw(f):
+            starts.append(start)
+            ends.append(end)
+            texts.append(text)
+    return Cues(timecode.parse(starts), timecode.parse(ends), texts)
+
+
+# ======================
+# 输出
+# ======================
+def _write_text(path: str, text: str, encoding: str = "utf-8"):
+    with open(path, "w", encoding=encoding) as f:
+        f.write(text)
+
+
+def write_srt(path: str, cues: Cues, encoding: str = "utf-8"):
+    timings = np.char.add(np.char.add(timecode.format_srt(cues.start_ms), " --> "), timecode.format_srt(cues.end_ms))
+    parts = [
+        f"{i}\n{timing}\n{text}\n\n"
+        for i, (timing, text) in enumerate(zip(timings.tolist(), cues.texts), 1)
+    ]
+    _write_text(path, "".join(parts), encoding)
+
+
+def write_vtt(path: str, cues: Cues, encoding: str = "utf-8"):
+    timings = np.char.add(np.char.add(timecode.format_vtt(cues.start_ms), " --> "), timecode.format_vtt(cues.end_ms))
+    parts = ["WEBVTT\n\n"]
+    parts.extend(f"{timing}\n{text}\n\n" for timing, text in zip(timings.tolist(), cues.texts))
+    _write_text(path, "".join(parts), encoding)
+
+
+ASS_SCRIPT_INFO = "[Script Info]\nScriptType: v4.00+\nPlayResX: 1920\nPlayResY: 1080\n\n"
+ASS_EVENTS_FORMAT = "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+
+
+def ass_style(name: str, fontname: str, fontsize: int, margin_v: int) -> str:
+    """白字黑边、底部居中的样式行（各脚本共用的那一套参数）"""
+    return (f"Style: {name},{fontname},{fontsize},&H00FFFFFF,&H000000FF,&H00000000,&H64000000,"
+            f"-1,0,0,0,100,100,0,0,1,2,2,2,10,10,{margin_v},1\n")
+
+
+def ass_header(styles: Sequence[str]) -> str:
+    return ASS_SCRIPT_INFO + "[V4+ Styles]\n" + "".join(styles) + "\n" + ASS_EVENTS_FORMAT
+
+
+def _dialogue(start: str, end: str, style: str, margin_v: int, text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\n", "\\N")
+    return f"Dialogue: 0,{start},{end},{style},,0,0,{margin_v},,{text}\n"
+
+
+def ass_dialogue(start_ms: int, end_ms: int, style: str, margin_v: int, text: str) -> str:
+    """单条 Dialogue 行（流式写入用）"""
+    return _dialogue(timecode.ass_timestamp(start_ms / 1000), timecode.ass_timestamp(end_ms / 1000),
+                     style, margin_v, text)
+
+
+def write_ass(path: str, styles: Sequence[str], events: Iterable[Tuple[int, int, str, int, str]],
+              encoding: str = "utf-8"):
+    """events: (start_ms, end_ms, style, margin_v, text)"""
+    events = list(events)
+    starts = timecode.format_ass([e[0] for e in events]).tolist()
+    ends = timecode.format_ass([e[1] for e in events]).tolist()
+    parts = [ass_header(styles)]
+    parts.extend(_dialogue(start, end, *event[2:]) for start, end, event in zip(starts, ends, events))
+    _write_text(path, "".join(parts), encoding)
@@ -0,0 +1,132 @@
+"""
+timecode.py - 字幕时间戳的批量格式化与解析
+
+各脚本原先各有一份 format_timestamp，有的 int() 截断、有的 round() 只对毫秒部分取整
+（0.9996 秒会得到 "00:00:00,1000"）。这里统一为:
+  - 先把秒四舍五入成整数毫秒（ASS 为厘秒），再用整除拆成时/分/秒，进位天然正确
+  - 批量接口直接处理 numpy 数组，一次向量化运算得到整列字符串
+  - 标量接口（srt_timestamp 等）供逐条流式写入使用
+
+用法:
+    ms = to_ms(np.array([0.9996, 61.5]))        # -> [1000, 61500]
+    format_srt(ms)                              # -> ["00:00:01,000", "00:01:01,500"]
+    parse(["00:00:01,000", "0:01:01.50"])       # -> [1000, 61500]
+    srt_timestamp(0.9996)                       # -> "00:00:01,000"（流式逐条写入）
+"""
+
+import re
+from typing import Iterable, Tuple
+
+import numpy as np
+
+_TIMESTAMP_RE = re.compile(r"(\d+):(\d+):(\d+)[,.](\d+)")
+
+
+def to_ms(seconds) -> np.ndarray:
+    """秒（标量或数组）-> int64 毫秒，四舍五入，负数截到 0"""
+    return np.maximum(np.rint(np.asarray(seconds, dtype=np.float64) * 1000), 0).astype(np.int64)
+
+
+def _fields(ms, unit: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """毫秒 -> (时, 分, 秒, 秒以下)；unit=10 时先四舍五入到厘秒"""
+    ms = np.maximum(np.asarray(ms, dtype=np.int64), 0)
+    if unit > 1:
+        ms = (ms + unit // 2) // unit * unit
+    h, rem = np.divmod(ms, 3_600_000)
+    m, rem = np.divmod(rem, 60_000)
+    s, frac = np.divmod(rem, 1000)
+    return h, m, s, frac // unit
+
+
+def _pad(values: np.ndarray, width: int) -> np.ndarray:
+    if values.size == 0:
+        return values.astype(str)
+    return np.char.zfill(values.astype(str), width)
+
+
+def _join(*parts) -> np.ndarray:
+    out = parts[0]
+    for part in parts[1:]:
+        out = np.char.add(out, part)
+    return out
+
+
+def format_srt(ms) -> np.ndarray:
+    """毫秒数组 -> "HH:MM:SS,mmm" 字符串数组"""
+    h, m, s, f = _fields(ms)
+    return _join(_pad(h, 2), ":", _pad(m, 2), ":", _pad(s, 2), ",", _pad(f, 3))
+
+
+def format_vtt(ms) -> np.ndarray:
+    """毫秒数组 -> "HH:MM:SS.mmm" 字符串数组"""
+    h, m, s, f = _fields(ms)
+    return _join(_pad(h, 2), ":", _pad(m, 2), ":", _pad(s, 2), ".", _pad(f, 3))
+
+
+def format_ass(ms) -> np.ndarray:
+    """毫秒数组 -> "H:MM:SS.cc" 字符串数组（四舍五入到厘秒）"""
+    h, m, s, cs = _fields(ms, unit=10)
+    return _join(h.astype(str), ":", _pad(m, 2), ":", _pad(s, 2), ".", _pad(cs, 2))
+
+
+_DIGITS = np.array([0, 1, 3, 4, 6, 7, 9, 10, 11])
+_WEIGHTS = np.array([36_000_000, 3_600_000, 600_000, 60_000, 10_000, 1000, 100, 10, 1], dtype=np.int64)
+
+
+def _parse_fixed(joined: str):
+    """全部是标准 "HH:MM:SS,mmm" 时直接按字节位置解析；格式不一致返回 None"""
+    if not joined or not joined.isascii() or (len(joined) + 1) % 13:
+        return None
+    raw = np.frombuffer((joined + "\n").encode("ascii"), dtype=np.uint8).reshape(-1, 13)
+    digits = raw[:, _DIGITS].astype(np.int64) - ord("0")
+    if ((digits < 0) | (digits > 9)).any() or (raw[:, [2, 5]] != ord(":")).any() \
+            or not np.isin(raw[:, 8], (ord(","), ord("."))).all():
+        return None
+    return digits @ _WEIGHTS
+
+
+def parse(timestamps: Iterable[str]) -> np.ndarray:
+    """SRT / VTT / ASS 时间戳 -> int64 毫秒数组；秒以下位数不足 3 位按小数处理"""
+    joined = "\n".join(timestamps)
+    fast = _parse_fixed(joined)
+    if fast is not None:
+        return fast
+    fields = _TIMESTAMP_RE.findall(joined)
+    if not fields:
+        return np.empty(0, dtype=np.int64)
+    h, m, s, frac = np.array(fields).T
+    digits = np.char.str_len(frac)
+    frac_ms = frac.astype(np.int64) * 10 ** np.maximum(3 - digits, 0) // 10 ** np.maximum(digits - 3, 0)
+    return (h.astype(np.int64) * 3600 + m.astype(np.int64) * 60 + s.astype(np.int64)) * 1000 + frac_ms
+
+
+# ======================
+# 标量接口（逐条流式写入用）
+# ======================
+def _scalar_fields(seconds: float, unit: int = 1) -> Tuple[int, int, int, int]:
+    ms = max(int(round(seconds * 1000)), 0)
+    if unit > 1:
+        ms = (ms + unit // 2) // unit * unit
+    h, rem = divmod(ms, 3_600_000)
+    m, rem = divmod(rem, 60_000)
+    s, frac = divmod(rem, 1000)
+    return h, m, s, frac // unit
+
+
+def srt_timestamp(seconds: float) -> str:
+    h, m, s, ms = _scalar_fields(seconds)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def ass_timestamp(seconds: float) -> str:
+    h, m, s, cs = _scalar_fields(seconds, unit=10)
+    return f"{h:d}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+def parse_timestamp(ts: str) -> int:
+    """单个时间戳 -> 毫秒"""
+    m = _TIMESTAMP_RE.search(ts)
+    if m is None:
+        raise ValueError(f"invalid timestamp: {ts!r}")
+    h, mi, s, frac = m.groups()
+    return ((int(h) * 60 + int(mi)) * 60 + int(s)) * 1000 + int(frac[:3].ljust(3, "0"))
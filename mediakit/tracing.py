@@ -0,0 +1,265 @@
+"""
+tracing.py - 轻量分阶段追踪（span），导出 JSON Lines / Chrome trace，可选采样分析
+
+各处只有 emoji print，线上无法知道时间花在模型加载、解码、ffmpeg 还是磁盘上。
+这里提供 span 上下文管理器 / 装饰器，记录每段的耗时、嵌套关系和自定义指标
+（bytes_in / bytes_out / audio_seconds 等）:
+
+    with span("generate_srt", audio=path) as s:
+        with span("model_load"):
+            model = ...
+        with span("inference"):
+            ...
+        s.set(audio_seconds=info.duration, bytes_out=file_size(srt_path))
+
+    @traced("speak")
+    def speak(...): ...
+
+默认关闭，此时 span() 返回共享的空对象，开销只有一次全局变量判断。开启方式:
+  - 环境变量 MEDIAKIT_TRACE=trace.jsonl（每个 span 结束时追加一行）
+             MEDIAKIT_TRACE_CHROME=trace.json（Chrome trace 的 JSON 数组格式，同样边跑边追加，
+                                            可在 chrome://tracing / Perfetto 打开）
+             MEDIAKIT_PROFILE=1（采样分析：每个 span 附带最常出现的栈顶函数）
+  - 或代码里 enable(jsonl_path=..., chrome_path=..., profile=True)
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, key: str, value: float):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "id", "parent", "tid", "start", "samples")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = 0
+        self.parent = None
+        self.tid = 0
+        self.start = 0.0
+        self.samples: Optional[Counter] = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, value: float):
+        """累加计数型指标（如分批写出的字节数）"""
+        self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def __enter__(self):
+        self.tracer._push(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer._pop(self, end)
+        return False
+
+
+class Tracer:
+    def __init__(self, jsonl_path: Optional[str] = None, chrome_path: Optional[str] = None,
+                 profile: bool = False, profile_interval: float = 0.01, profile_top: int = 10):
+        self.jsonl_path = jsonl_path
+        self.chrome_path = chrome_path
+        self.profile_top = profile_top
+        self.pid = os.getpid()
+        # perf_counter 与墙钟的换算，导出的时间戳为 Unix 微秒
+        self._epoch = time.time() - time.perf_counter()
+        self._lock = threading.Lock()
+        self._ids = 0
+        self._stacks: Dict[int, List[Span]] = {}
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+        # Chrome trace 不在内存里攒事件（服务常驻时会无限增长），逐条写入数组，关闭时补上 "]"
+        self._chrome = open(chrome_path, "w", encoding="utf-8") if chrome_path else None
+        self._chrome_count = 0
+        if self._chrome is not None:
+            self._chrome.write("[\n")
+        self._sampler = None
+        if profile:
+            self._sampler = threading.Thread(target=self._sample_loop, args=(profile_interval,),
+                                             name="trace-sampler", daemon=True)
+            self._stop = threading.Event()
+            self._sampler.start()
+
+    # -------------------------
+    # span 栈（按线程）
+    # -------------------------
+    def _push(self, s: Span):
+        tid = threading.get_ident()
+        with self._lock:
+            self._ids += 1
+            s.id = self._ids
+            stack = self._stacks.setdefault(tid, [])
+            s.parent = stack[-1].id if stack else None
+            s.tid = tid
+            if self._sampler is not None:
+                s.samples = Counter()
+            stack.append(s)
+
+    def _pop(self, s: Span, end: float):
+        with self._lock:
+            stack = self._stacks.get(s.tid, [])
+            if stack and stack[-1] is s:
+                stack.pop()
+            elif s in stack:
+                stack.remove(s)
+        record = {
+            "name": s.name,
+            "id": s.id,
+            "parent": s.parent,
+            "pid": self.pid,
+            "tid": s.tid,
+            "ts": round((self._epoch + s.start) * 1e6),
+            "dur_ms": round((end - s.start) * 1000, 3),
+            "attrs": s.attrs,
+        }
+        if s.samples:
+            record["profile"] = dict(s.samples.most_common(self.profile_top))
+        self._emit(record)
+
+    def _emit(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.write(line + "\n")
+                self._jsonl.flush()
+            if self._chrome is not None:
+                event = json.dumps(_chrome_event(record), ensure_ascii=False, default=str)
+                self._chrome.write((",\n" if self._chrome_count else "") + event)
+                self._chrome.flush()
+                self._chrome_count += 1
+
+    # -------------------------
+    # 采样分析：定期抓各线程当前栈顶，计入该线程最内层的 span
+    # -------------------------
+    def _sample_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            frames = sys._current_frames()
+            with self._lock:
+                active = [(tid, stack[-1]) for tid, stack in self._stacks.items() if stack]
+            for tid, s in active:
+                frame = frames.get(tid)
+                if frame is None or s.samples is None:
+                    continue
+                code = frame.f_code
+                s.samples[f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"] += 1
+
+    # -------------------------
+    # 关闭
+    # -------------------------
+    def close(self):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+            if self._chrome is not None:
+                # 进程被强杀时缺少结尾的 "]"，chrome://tracing / Perfetto 也能读
+                self._chrome.write("\n]\n")
+                self._chrome.close()
+                self._chrome = None
+
+
+def _chrome_event(record: dict) -> dict:
+    """span 记录 → Chrome Trace Event（完整事件 "X"）"""
+    return {
+        "name": record["name"], "ph": "X", "ts": record["ts"], "dur": round(record["dur_ms"] * 1000),
+        "pid": record["pid"], "tid": record["tid"],
+        "args": {**record["attrs"], **({"profile": record["profile"]} if "profile" in record else {})},
+    }
+
+
+_TRACER: Optional[Tracer] = None
+
+
+def enable(jsonl_path: Optional[str] = None, chrome_path: Optional[str] = None, profile: bool = False,
+           profile_interval: float = 0.01) -> Tracer:
+    """开启追踪（重复调用会先关闭旧的 tracer）；进程退出时自动关闭并补全 Chrome trace"""
+    global _TRACER
+    disable()
+    _TRACER = Tracer(jsonl_path, chrome_path, profile=profile, profile_interval=profile_interval)
+    return _TRACER
+
+
+def disable():
+    global _TRACER
+    if _TRACER is not None:
+        tracer, _TRACER = _TRACER, None
+        tracer.close()
+
+
+def enabled() -> bool:
+    return _TRACER is not None
+
+
+def span(name: str, **attrs):
+    if _TRACER is None:
+        return _NOOP
+    return Span(_TRACER, name, attrs)
+
+
+def traced(name: Optional[str] = None, **attrs):
+    """装饰器：整个函数调用记为一个 span，名称默认为函数的限定名"""
+    def decorator(fn: Callable):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _TRACER is None:
+                return fn(*args, **kwargs)
+            with Span(_TRACER, span_name, dict(attrs)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def file_size(path) -> int:
+    """文件字节数（不存在时为 0），用于 bytes_in / bytes_out"""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def _init_from_env():
+    jsonl_path = os.environ.get("MEDIAKIT_TRACE")
+    chrome_path = os.environ.get("MEDIAKIT_TRACE_CHROME")
+    if jsonl_path or chrome_path:
+        enable(jsonl_path or None, chrome_path or None, profile=os.environ.get("MEDIAKIT_PROFILE") == "1")
+
+
+atexit.register(disable)
+_init_from_env()
@@ -0,0 +1,152 @@
+"""
+translation.py - 批量、并发的字幕翻译引擎
+
+逐行调用 GoogleTranslator 时，600 行字幕就是 600 次串行 HTTP 请求。这里:
+  - 把多行用分隔符拼成不超过 max_chars 的批次，一次请求翻译一批，再按分隔符拆回
+    （拆回的行数对不上时，该批退回逐行翻译）
+  - 各批次在有界线程池中并发执行，失败按指数退避重试
+  - 后端可替换：GoogleBackend 为线上翻译，LocalBackend 用于测试/离线
+
+用法:
+    engine = TranslationEngine(GoogleBackend("zh-CN", "en"))
+    engine.translate_many(["你好", "世界"])  # -> ["Hello", "World"]
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+ERROR_TEXT = "[Translation Error]"
+
+
+class TranslationBackend:
+    """后端只需实现 translate_text：输入一段（可能含多行的）文本，返回译文"""
+
+    name = "base"
+    source = "zh-CN"
+    target = "en"
+
+    def translate_text(self, text: str) -> str:
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+    """deep-translator 的 GoogleTranslator；实例内部会改写请求参数，因此每个线程各持有一个"""
+
+    name = "google"
+
+    def __init__(self, source: str = "zh-CN", target: str = "en", proxies: Optional[dict] = None):
+        self.source = source
+        self.target = target
+        self.proxies = proxies
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            from deep_translator import GoogleTranslator
+
+            client = GoogleTranslator(source=self.source, target=self.target, proxies=self.proxies)
+            self._local.client = client
+        return client
+
+    def translate_text(self, text: str) -> str:
+        return self._client().translate(text)
+
+
+class LocalBackend(TranslationBackend):
+    """本地替身：按给定函数逐行翻译（默认原样返回），用于测试和离线调试"""
+
+    name = "local"
+
+    def __init__(self, fn: Optional[Callable[[str], str]] = None, source: str = "zh-CN", target: str = "en"):
+        self.fn = fn or (lambda line: line)
+        self.source = source
+        self.target = target
+        self.calls = 0
+
+    def translate_text(self, text: str) -> str:
+        self.calls += 1
+        return "\n".join(self.fn(line) for line in text.split("\n"))
+
+
+class TranslationEngine:
+    def __init__(self, backend: TranslationBackend, max_chars: int = 4500, delimiter: str = "\n",
+                 workers: int = 4, retries: int = 3, backoff: float = 1.0):
+        self.backend = backend
+        self.max_chars = max_chars
+        self.delimiter = delimiter
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+
+    def _pack(self, texts: List[str]) -> List[List[str]]:
+        batches: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        for text in texts:
+            extra = len(text) + (len(self.delimiter) if current else 0)
+            if current and size + extra > self.max_chars:
+                batches.append(current)
+                current, size = [], 0
+                extra = len(text)
+            current.append(text)
+            size += extra
+        if current:
+            batches.append(current)
+        return batches
+
+    def _call(self, text: str) -> str:
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                result = self.backend.translate_text(text)
+                if result is None:
+                    raise ValueError("empty translation")
+                return result
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                print(f"[翻译重试 {attempt + 1}/{self.retries}] {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    def _translate_batch(self, batch: List[str]) -> List[str]:
+        if len(batch) > 1:
+            try:
+                parts = self._call(self.delimiter.join(batch)).split(self.delimiter)
+                if len(parts) == len(batch):
+                    return [p.strip() for p in parts]
+                print(f"[翻译] 批次拆分行数不一致({len(parts)}/{len(batch)})，改为逐行翻译")
+            except Exception as e:
+                print(f"[翻译异常] 批次({len(batch)} 行) -> {e}，改为逐行翻译")
+
+        results = []
+        for line in batch:
+            try:
+                results.append(self._call(line).strip())
+            except Exception as e:
+                print(f"[翻译异常] {line} -> {e}")
+                results.append(ERROR_TEXT)
+        return results
+
+    def translate_many(self, texts: List[str]) -> List[str]:
+        """按输入顺序返回译文；重复行只翻译一次，空行原样返回"""
+        # 分隔符是换行，行内换行先替换为空格
+        unique: Dict[str, None] = {}
+        for text in texts:
+            line = text.replace(self.delimiter, " ").strip()
+            if line:
+                unique.setdefault(line, None)
+
+        batches = self._pack(list(unique))
+        translated: Dict[str, str] = {}
+        for batch, result in zip(batches, self._executor.map(self._translate_batch, batches)):
+            translated.update(zip(batch, result))
+
+        return [translated.get(text.replace(self.delimiter, " ").strip(), "") for text in texts]
+
+    def translate(self, text: str) -> str:
+        return self.translate_many([text])[0]
@@ -0,0 +1,250 @@
+"""
+translation_memory.py - SQLite 翻译记忆库
+
+原先的 translations.json 启动时整份读入、结束时整份重写：中途崩溃丢掉本次所有翻译，
+文件无限增长，启动耗时也随之增长。这里改为 SQLite:
+  - 键为 (源语言, 目标语言, 后端, 规范化文本)，同一句话换后端/语言互不干扰
+  - WAL 模式，逐批写入即提交，多个进程可同时读写
+  - 按批次批量查询；支持按年龄和条目数淘汰（按最近使用时间）
+  - 可选近似匹配（见 fuzzy_many）：fuzzy_normalizer 规范化后的文本算 MinHash，LSH 分桶存在
+    fuzzy_bands 表里，查询只读同桶候选，启动耗时与库大小无关
+精确匹配的键始终是 normalize_key；标点、语气词不同的句子（"他来了？" / "他来了。"）各占一行，
+只能经近似匹配按阈值复用。
+
+用法:
+    tm = TranslationMemory("outputs/translations.db")
+    hits = tm.get_many("zh-CN", "en", "google", ["你好", "世界"])  # {原文: 译文}
+    tm.put_many("zh-CN", "en", "google", {"你好": "Hello"})
+
+    tm = TranslationMemory("outputs/translations.db", fuzzy_normalizer=normalize_zh)  # 中文近似匹配
+    tm.fuzzy_many("zh-CN", "en", "google", ["你好呀！"], threshold=0.8)  # {原文: (译文, 相似度)}
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from mediakit.fuzzy_index import MinHashIndex
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    src_lang  TEXT NOT NULL,
+    tgt_lang  TEXT NOT NULL,
+    backend   TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    source    TEXT NOT NULL,
+    target    TEXT NOT NULL,
+    created   REAL NOT NULL,
+    used      REAL NOT NULL,
+    PRIMARY KEY (src_lang, tgt_lang, backend, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_translations_used ON translations (used);
+CREATE TABLE IF NOT EXISTS fuzzy_bands (
+    src_lang  TEXT NOT NULL,
+    tgt_lang  TEXT NOT NULL,
+    backend   TEXT NOT NULL,
+    band      INTEGER NOT NULL,
+    bucket    BLOB NOT NULL,
+    key       TEXT NOT NULL,
+    PRIMARY KEY (src_lang, tgt_lang, backend, band, bucket, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fuzzy_meta (
+    src_lang    TEXT NOT NULL,
+    tgt_lang    TEXT NOT NULL,
+    backend     TEXT NOT NULL,
+    normalizer  TEXT NOT NULL,
+    PRIMARY KEY (src_lang, tgt_lang, backend)
+) WITHOUT ROWID;
+"""
+
+# SQLite 单条语句的参数个数有上限，批量查询按此分片
+_CHUNK = 500
+
+
+def normalize_key(text: str) -> str:
+    """精确匹配用的键：NFKC 归一 + 去首尾空白 + 合并连续空白"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TranslationMemory:
+    def __init__(self, path: str, max_age_days: Optional[float] = None, max_entries: Optional[int] = None,
+                 timeout: float = 30.0, fuzzy_normalizer: Callable[[str], str] = normalize_key):
+        """fuzzy_normalizer 只用于近似匹配；换用别的函数时分桶在下次近似查询时重建"""
+        self.path = str(path)
+        self.fuzzy_normalizer = fuzzy_normalizer
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = threading.local()
+        self._hasher = MinHashIndex()
+        self._banded = set()  # 本进程内已确认分桶完整的 (源语言, 目标语言, 后端)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    @property
+    def _normalizer_name(self) -> str:
+        fn = self.fuzzy_normalizer
+        return f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, src_lang: str, tgt_lang: str, backend: str, texts: Iterable[str]) -> Dict[str, str]:
+        """批量查询，返回 {原文: 译文}（只包含命中的）"""
+        by_key: Dict[str, list] = {}
+        for text in texts:
+            by_key.setdefault(normalize_key(text), []).append(text)
+        keys = list(by_key)
+
+        result: Dict[str, str] = {}
+        conn = self._conn()
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i:i + _CHUNK]
+            rows = conn.execute(
+                f"SELECT key, target FROM translations WHERE src_lang=? AND tgt_lang=? AND backend=? "
+                f"AND key IN ({','.join('?' * len(chunk))})",
+                (src_lang, tgt_lang, backend, *chunk),
+            ).fetchall()
+            for key, target in rows:
+                for text in by_key[key]:
+                    result[text] = target
+            if rows:
+                with conn:
+                    conn.execute(
+                        f"UPDATE translations SET used=? WHERE src_lang=? AND tgt_lang=? AND backend=? "
+                        f"AND key IN ({','.join('?' * len(rows))})",
+                        (time.time(), src_lang, tgt_lang, backend, *(key for key, _ in rows)),
+                    )
+        return result
+
+    def put_many(self, src_lang: str, tgt_lang: str, backend: str, pairs: Mapping[str, str]):
+        """写入并立即提交（一个事务）；分桶已建好时同时写入分桶"""
+        if not pairs:
+            return
+        now = time.time()
+        rows = [(src_lang, tgt_lang, backend, normalize_key(s), s, t, now, now) for s, t in pairs.items()]
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (src_lang, tgt_lang, backend, key, source, target, created, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if self._bands_ready(conn, (src_lang, tgt_lang, backend)):
+                self._insert_bands(conn, (src_lang, tgt_lang, backend), [(row[3], row[4]) for row in rows])
+
+    def _insert_bands(self, conn: sqlite3.Connection, scope: Tuple[str, str, str], items: Iterable[Tuple[str, str]]):
+        """items: (键, 原文)"""
+        conn.executemany(
+            "INSERT OR IGNORE INTO fuzzy_bands (src_lang, tgt_lang, backend, band, bucket, key) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((*scope, band, bucket, key)
+             for key, source in items
+             for band, bucket in self._hasher.band_keys(self.fuzzy_normalizer(source))),
+        )
+
+    def _bands_ready(self, conn: sqlite3.Connection, scope: Tuple[str, str, str]) -> bool:
+        row = conn.execute("SELECT normalizer FROM fuzzy_meta WHERE src_lang=? AND tgt_lang=? AND backend=?",
+                           scope).fetchone()
+        return row is not None and row[0] == self._normalizer_name
+
+    def _ensure_bands(self, scope: Tuple[str, str, str]):
+        """
+        分桶持久化在库里，之后随 put_many 增量更新；只有该范围第一次做近似查询
+        （或换了 fuzzy_normalizer）时补建一次
+        """
+        if scope in self._banded:
+            return
+        conn = self._conn()
+        if not self._bands_ready(conn, scope):
+            with conn:
+                conn.execute("DELETE FROM fuzzy_bands WHERE src_lang=? AND tgt_lang=? AND backend=?", scope)
+                rows = conn.execute("SELECT key, source FROM translations WHERE src_lang=? AND tgt_lang=? AND backend=?",
+                                    scope).fetchall()
+                self._insert_bands(conn, scope, rows)
+                conn.execute("INSERT OR REPLACE INTO fuzzy_meta (src_lang, tgt_lang, backend, normalizer) "
+                             "VALUES (?, ?, ?, ?)", (*scope, self._normalizer_name))
+            print(f"🧮 已为 {len(rows)} 条翻译建立近似匹配分桶")
+        self._banded.add(scope)
+
+    def fuzzy_many(self, src_lang: str, tgt_lang: str, backend: str, texts: Iterable[str],
+                   threshold: float = 0.8) -> Dict[str, Tuple[str, float]]:
+        """近似查询，返回 {原文: (译文, 相似度)}（只包含相似度不低于 threshold 的）"""
+        scope = (src_lang, tgt_lang, backend)
+        self._ensure_bands(scope)
+        conn = self._conn()
+        result: Dict[str, Tuple[str, float]] = {}
+        for text in dict.fromkeys(texts):
+            folded = self.fuzzy_normalizer(text)
+            bands = self._hasher.band_keys(folded)
+            if not bands:
+                continue
+            # 从分桶键出发逐个走主键查找，只读同桶候选
+            rows = conn.execute(
+                f"WITH q(band, bucket) AS (VALUES {','.join(['(?, ?)'] * len(bands))}) "
+                "SELECT t.source, t.target FROM translations t WHERE t.src_lang=? AND t.tgt_lang=? AND t.backend=? "
+                "AND t.key IN (SELECT f.key FROM q JOIN fuzzy_bands f ON f.src_lang=? AND f.tgt_lang=? "
+                "AND f.backend=? AND f.band=q.band AND f.bucket=q.bucket)",
+                (*(v for band in bands for v in band), *scope, *scope),
+            ).fetchall()
+            best, best_score = None, threshold
+            for source, target in rows:
+                score = self._hasher.similarity(folded, self.fuzzy_normalizer(source))
+                if score >= best_score:
+                    best, best_score = target, score
+            if best is not None:
+                result[text] = (best, best_score)
+        return result
+
+    def evict(self) -> int:
+        """按 max_age_days / max_entries 淘汰，返回删除条数"""
+        deleted = 0
+        with self._conn() as conn:
+            if self.max_age_days:
+                cur = conn.execute("DELETE FROM translations WHERE used < ?",
+                                   (time.time() - self.max_age_days * 86400,))
+                deleted += cur.rowcount
+            if self.max_entries:
+                # WITHOUT ROWID 表没有 rowid，按主键删除最久未用的条目
+                cur = conn.execute(
+                    "DELETE FROM translations WHERE (src_lang, tgt_lang, backend, key) IN ("
+                    "SELECT src_lang, tgt_lang, backend, key FROM translations ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                deleted += cur.rowcount
+            if deleted:
+                conn.execute(
+                    "DELETE FROM fuzzy_bands WHERE NOT EXISTS (SELECT 1 FROM translations t WHERE "
+                    "t.src_lang=fuzzy_bands.src_lang AND t.tgt_lang=fuzzy_bands.tgt_lang AND "
+                    "t.backend=fuzzy_bands.backend AND t.key=fuzzy_bands.key)"
+                )
+        return deleted
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def import_json(self, json_path: str, src_lang: str, tgt_lang: str, backend: str,
+                    skip_values: Iterable[str] = ()) -> int:
+        """导入旧版 {原文: 译文} JSON 缓存，返回导入条数"""
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        skip = set(skip_values)
+        pairs = {s: t for s, t in data.items() if isinstance(t, str) and t not in skip}
+        self.put_many(src_lang, tgt_lang, backend, pairs)
+        return len(pairs)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
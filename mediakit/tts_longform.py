@@ -0,0 +1,165 @@
+"""
+tts_longform.py - 长文本分句、分批合成
+
+整篇文本一次交给 tts_to_file 时，XTTS 要把全部音频留在内存里才能写文件，
+长稿件又慢又占内存。这里先按中英文标点分句，把句子拼成不超过 max_chars 的批次逐批合成，
+每批之间插入静音或交叉淡化，结果边合成边写入 WAV，峰值内存只和单批长度有关。
+
+用法:
+    synth = lambda s: model.tts(text=s, speaker_wav=wav, language="zh", split_sentences=False)
+    synthesize_long(synth, text, "outputs/result.wav", sample_rate=24000)
+"""
+
+import re
+import time
+import wave
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+# 句末标点（后面可跟引号/括号），以及长句内可断开的位置
+_SENTENCE_END = re.compile(r"(.+?(?:[。！？；!?;]+|……|\.{3}|\.(?=\s)|\n+)[”’」』）)\"']*)", re.S)
+_CLAUSE_BREAK = re.compile(r"(?<=[，、,：:])")
+
+
+def split_sentences(text: str, max_chars: int = 120) -> List[str]:
+    """中文友好的分句；超长句子再按逗号、顿号等断开，仍超长则硬切"""
+    text = text.strip()
+    sentences = []
+    pos = 0
+    for m in _SENTENCE_END.finditer(text):
+        sentences.append(m.group(1))
+        pos = m.end()
+    if pos < len(text):
+        sentences.append(text[pos:])
+
+    result = []
+    for sent in (s.strip() for s in sentences):
+        if not sent:
+            continue
+        if len(sent) <= max_chars:
+            result.append(sent)
+            continue
+        piece = ""
+        for clause in _CLAUSE_BREAK.split(sent):
+            if piece and len(piece) + len(clause) > max_chars:
+                result.append(piece)
+                piece = ""
+            piece += clause
+            while len(piece) > max_chars:
+                result.append(piece[:max_chars])
+                piece = piece[max_chars:]
+        if piece:
+            result.append(piece)
+    return result
+
+
+def _join(prev: str, sent: str) -> str:
+    if not prev:
+        return sent
+    # 没有句末标点的行（如按换行切出的标题）补一个句号，保证停顿
+    if not re.search(r"[。！？；!?;.…，,：:”’」』）)\"']$", prev):
+        prev += "." if prev[-1].isascii() else "。"
+    if prev[-1].isascii() and sent[0].isascii():
+        return prev + " " + sent
+    return prev + sent
+
+
+def batch_sentences(sentences: Sequence[str], max_chars: int = 120) -> List[str]:
+    """把相邻短句拼成不超过 max_chars 的批次，减少合成调用次数"""
+    batches = []
+    current = ""
+    for sent in sentences:
+        if current and len(current) + len(sent) > max_chars:
+            batches.append(current)
+            current = ""
+        current = _join(current, sent)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class _IncrementalWavWriter:
+    """单声道 16bit WAV，按块写入；支持与上一块交叉淡化"""
+
+    def __init__(self, path: str, sample_rate: int, crossfade: int):
+        self._wf = wave.open(path, "wb")
+        self._wf.setnchannels(1)
+        self._wf.setsampwidth(2)
+        self._wf.setframerate(sample_rate)
+        self._crossfade = crossfade
+        self._tail = np.zeros(0, dtype=np.float32)
+        self.samples = 0
+
+    def _emit(self, audio: np.ndarray):
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        self._wf.writeframes(pcm.tobytes())
+        self.samples += len(pcm)
+
+    def write(self, audio: np.ndarray):
+        audio = np.asarray(audio, dtype=np.float32)
+        n = min(self._crossfade, len(self._tail), len(audio))
+        if n:
+            ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+            head = self._tail[-n:] * (1.0 - ramp) + audio[:n] * ramp
+            self._emit(np.concatenate([self._tail[:-n], head]))
+            audio = audio[n:]
+        else:
+            self._emit(self._tail)
+        keep = min(self._crossfade, len(audio))
+        self._emit(audio[:len(audio) - keep])
+        self._tail = audio[len(audio) - keep:]
+
+    def write_silence(self, n: int):
+        if n > 0:
+            self.write(np.zeros(n, dtype=np.float32))
+
+    def close(self):
+        self._emit(self._tail)
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._wf.close()
+
+
+def synthesize_long(
+    synth_fn: Callable[[str], Sequence[float]],
+    text: str,
+    output_path: str,
+    sample_rate: int,
+    max_chars: int = 120,
+    gap_ms: int = 150,
+    crossfade_ms: int = 0,
+) -> List[dict]:
+    """
+    分句分批合成并逐批写入 output_path。
+    synth_fn:     输入一段文本，返回波形（float，-1~1）
+    gap_ms:       批次之间插入的静音长度
+    crossfade_ms: 批次之间的交叉淡化长度（> 0 时不再插入静音）
+    返回每批的统计信息（字数、耗时、音频时长、RTF），便于评估吞吐
+    """
+    batches = batch_sentences(split_sentences(text, max_chars), max_chars)
+    crossfade = int(sample_rate * crossfade_ms / 1000)
+    gap = 0 if crossfade else int(sample_rate * gap_ms / 1000)
+
+    stats = []
+    writer = _IncrementalWavWriter(output_path, sample_rate, crossfade)
+    try:
+        for i, batch in enumerate(batches, 1):
+            t0 = time.perf_counter()
+            wav = synth_fn(batch)
+            elapsed = time.perf_counter() - t0
+            if i > 1:
+                writer.write_silence(gap)
+            writer.write(wav)
+
+            audio_sec = len(wav) / sample_rate
+            stats.append({
+                "chars": len(batch),
+                "seconds": elapsed,
+                "audio_seconds": audio_sec,
+                "rtf": elapsed / audio_sec if audio_sec else 0.0,
+            })
+            print(f"🗣️ [{i}/{len(batches)}] {len(batch)} 字, {elapsed:.1f}s, "
+                  f"{len(batch) / elapsed if elapsed else 0:.1f} 字/秒, RTF {stats[-1]['rtf']:.2f}")
+    finally:
+        writer.close()
+    return stats
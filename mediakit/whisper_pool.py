@@ -0,0 +1,131 @@
+"""
+whisper_pool.py - 进程级 WhisperModel 池
+
+同一进程内按 (model_dir, device, compute_type, cpu_threads) 缓存已加载的模型，
+首次使用时才加载；超过容量按 LRU 淘汰，空闲超过 TTL 的模型在下次访问池时释放。
+
+用法:
+    from mediakit.whisper_pool import get_whisper_model
+    model = get_whisper_model(CONFIG["model_dir"], device="cpu")
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from mediakit.asr_tuning import resolve
+
+
+class ModelKey(NamedTuple):
+    model_dir: str
+    device: str
+    compute_type: str
+    cpu_threads: int
+
+
+class WhisperModelPool:
+    def __init__(self, max_models: int = 2, idle_ttl: float = 1800.0):
+        """
+        max_models: 同时保留的模型数量上限（LRU 淘汰）
+        idle_ttl:   模型空闲超过该秒数后被释放；<= 0 表示永不过期
+        """
+        self.max_models = max_models
+        self.idle_ttl = idle_ttl
+        self._models: "OrderedDict[ModelKey, object]" = OrderedDict()
+        self._last_used: dict = {}
+        self._lock = threading.Lock()
+        self._loading: dict = {}
+
+    @staticmethod
+    def make_key(model_dir: str, device: str = "cpu", compute_type: str = "default",
+                 cpu_threads: int = 0) -> ModelKey:
+        return ModelKey(os.path.abspath(str(model_dir)), device, compute_type, int(cpu_threads))
+
+    def get(self, model_dir: str, device: str = "cpu", compute_type: str = "default",
+            cpu_threads: int = 0, **model_kwargs):
+        """取出（必要时加载）模型；同一 key 的并发加载只会执行一次"""
+        key = self.make_key(model_dir, device, compute_type, cpu_threads)
+
+        with self._lock:
+            self._evict_idle()
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._last_used[key] = time.monotonic()
+                return self._models[key]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self._last_used[key] = time.monotonic()
+                    return self._models[key]
+
+            from faster_whisper import WhisperModel
+
+            print(f"🔄 Loading Whisper model: {key.model_dir} ({key.device}, {key.compute_type})")
+            t0 = time.perf_counter()
+            model = WhisperModel(
+                key.model_dir,
+                device=key.device,
+                compute_type=key.compute_type,
+                cpu_threads=key.cpu_threads,
+                **model_kwargs
+            )
+            print(f"✅ Whisper model loaded in {time.perf_counter() - t0:.1f}s")
+
+            with self._lock:
+                self._models[key] = model
+                self._last_used[key] = time.monotonic()
+                self._loading.pop(key, None)
+                while len(self._models) > self.max_models:
+                    old_key, _ = self._models.popitem(last=False)
+                    self._last_used.pop(old_key, None)
+            return model
+
+    def _evict_idle(self):
+        """释放空闲超时的模型（调用方需持有 self._lock）"""
+        if self.idle_ttl <= 0:
+            return
+        now = time.monotonic()
+        for key in [k for k, t in self._last_used.items() if now - t > self.idle_ttl]:
+            self._models.pop(key, None)
+            self._last_used.pop(key, None)
+
+    def evict(self, model_dir: str | None = None):
+        """手动释放模型；不传参数时清空整个池"""
+        with self._lock:
+            if model_dir is None:
+                self._models.clear()
+                self._last_used.clear()
+                return
+            target = os.path.abspath(str(model_dir))
+            for key in [k for k in self._models if k.model_dir == target]:
+                self._models.pop(key, None)
+                self._last_used.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._models)
+
+
+# 进程级默认池
+_POOL = WhisperModelPool(
+    max_models=int(os.environ.get("WHISPER_POOL_SIZE", "2")),
+    idle_ttl=float(os.environ.get("WHISPER_POOL_TTL", "1800")),
+)
+
+
+def get_whisper_model(model_dir: str, device: str = "cpu", compute_type: str = "default",
+                      cpu_threads: int = 0, **model_kwargs):
+    """从进程级池中获取 WhisperModel；未指定的 compute_type / cpu_threads 用本机调优结果（asr_tuning）"""
+    compute_type, cpu_threads, tuned = resolve(model_dir, device, compute_type, cpu_threads)
+    model_kwargs = {**tuned, **model_kwargs}
+    return _POOL.get(model_dir, device=device, compute_type=compute_type,
+                     cpu_threads=cpu_threads, **model_kwargs)
+
+
+def get_pool() -> WhisperModelPool:
+    return _POOL
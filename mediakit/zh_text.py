@@ -0,0 +1,43 @@
+"""
+zh_text.py - 中文字幕文本规范化（翻译记忆近似匹配的键）
+
+同一段片头/口播在不同集里识别出来，常常只差标点、句尾语气词或繁简写法，
+精确匹配全部落空。规范化步骤:
+  - NFKC：全角字母数字/标点转半角
+  - OpenCC t2s：繁体转简体（未安装 opencc 时跳过）
+  - 去掉所有标点和空白
+  - 去掉句尾语气词（啊/呀/吧/呢/嘛/啦/哦 …）
+
+用法:
+    normalize_zh("大家好，歡迎收看！")  # -> "大家好欢迎收看"
+"""
+
+import re
+import unicodedata
+
+# 句尾语气词；"了""的"会改变语义，不在此列
+TRAILING_PARTICLES = "啊呀吧呢嘛啦哦噢喔哈呐诶欸嘞咯哟"
+
+_PUNCT_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+_TRAILING_RE = re.compile(f"[{TRAILING_PARTICLES}]+$")
+
+_T2S = None
+
+
+def _t2s(text: str) -> str:
+    global _T2S
+    if _T2S is None:
+        try:
+            from opencc import OpenCC
+
+            _T2S = OpenCC("t2s").convert
+        except ImportError:
+            _T2S = lambda s: s
+    return _T2S(text)
+
+
+def normalize_zh(text: str) -> str:
+    """全角转半角 + 繁转简 + 去标点 + 去句尾语气词；规范化后为空时退回去空白的原文"""
+    folded = _t2s(unicodedata.normalize("NFKC", text)).lower()
+    stripped = _TRAILING_RE.sub("", _PUNCT_RE.sub("", folded))
+    return stripped or "".join(folded.split())
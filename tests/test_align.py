@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # 共享模块 mediakit
+from mediakit.align import align_intervals, overlap_pairs
+
+
+def test_offset_tracks_do_not_chain():
+    """两条轨整体错开半条：不能串成覆盖全片的一个大组"""
+    n = 10
+    a = np.arange(n) * 2.0
+    b = a + 1
+    groups = align_intervals(a, a + 2, b, b + 2)
+
+    assert sorted(i for g in groups for i in g[0]) == list(range(n))
+    assert sorted(j for g in groups for j in g[1]) == list(range(n))
+    assert all(len(a_idx) <= 2 and len(b_idx) <= 2 for a_idx, b_idx in groups)
+    assert len(groups) >= n
+
+
+def test_one_to_many_merge():
+    assert align_intervals([0], [10], [0, 5], [5, 10]) == [([0], [0, 1])]
+    assert align_intervals([0, 2.5], [2, 4], [0], [4]) == [([0, 1], [0])]
+
+
+def test_overlap_pairs_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        na, nb = rng.integers(0, 15, 2)
+        a_start = rng.uniform(0, 20, na).round(1)
+        a_end = a_start + rng.uniform(0, 5, na).round(1)
+        b_start = rng.uniform(0, 20, nb).round(1)
+        b_end = b_start + rng.uniform(0, 5, nb).round(1)
+        ai, bj, _ = overlap_pairs(a_start, a_end, b_start, b_end)
+        expected = sorted((i, j) for i in range(na) for j in range(nb)
+                          if min(a_end[i], b_end[j]) - max(a_start[i], b_start[j]) > 0)
+        assert sorted(zip(ai.tolist(), bj.tolist())) == expected
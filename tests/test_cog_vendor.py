@@ -0,0 +1,11 @@
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_cog_vendored_modules_match():
+    """cog/mediakit 是根目录 mediakit 的拷贝，两边不能改出分叉"""
+    vendored = sorted(p for p in (ROOT / "cog" / "mediakit").glob("*.py") if p.name != "__init__.py")
+    assert vendored
+    for path in vendored:
+        assert path.read_bytes() == (ROOT / "mediakit" / path.name).read_bytes(), path.name
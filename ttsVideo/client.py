@@ -0,0 +1,103 @@
+"""
+client.py - service.py 的轻量客户端，接口与 MediaProcessor 保持一致
+
+    client = MediaClient("http://127.0.0.1:8765")
+    client.set_speaker("sample/4.MOV")
+    client.speak("你好", "outputs/result1.wav")
+
+set_speaker 的结果（服务端预处理后的参考音频）记在客户端，speak 每次随请求带上，
+多个客户端共用服务时互不影响。
+默认等待任务完成后返回；wait=False 时立即返回 job_id，之后用 client.wait(job_id) 取结果。
+路径由服务端进程解析，建议传绝对路径。
+"""
+
+import os
+import time
+
+import requests
+
+
+class JobFailed(RuntimeError):
+    pass
+
+
+class MediaClient:
+    def __init__(self, base_url: str = "http://127.0.0.1:8765", poll_interval: float = 0.5,
+                 timeout: float | None = None):
+        self.base_url = base_url.rstrip("/")
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.speaker: str | None = None
+
+    def available(self) -> bool:
+        try:
+            return self.session.get(f"{self.base_url}/health", timeout=2).ok
+        except requests.RequestException:
+            return False
+
+    def submit(self, op: str, **args) -> str:
+        """提交任务；队列满(429)时按 Retry-After 退避重试"""
+        delay = 0.5
+        while True:
+            resp = self.session.post(f"{self.base_url}/jobs/{op}", json=args, timeout=30)
+            if resp.status_code == 429:
+                time.sleep(float(resp.headers.get("Retry-After", delay)))
+                delay = min(delay * 2, 10.0)
+                continue
+            resp.raise_for_status()
+            return resp.json()["job_id"]
+
+    def status(self, job_id: str) -> dict:
+        resp = self.session.get(f"{self.base_url}/jobs/{job_id}", timeout=30)
+        resp.raise_for_status()
+        return resp.json()
+
+    def wait(self, job_id: str):
+        start = time.monotonic()
+        while True:
+            job = self.status(job_id)
+            if job["status"] == "done":
+                return job.get("result")
+            if job["status"] == "error":
+                raise JobFailed(f"❌ {job['op']} 失败: {job.get('error')}")
+            if self.timeout is not None and time.monotonic() - start > self.timeout:
+                raise TimeoutError(f"任务超时: {job_id}")
+            time.sleep(self.poll_interval)
+
+    def _call(self, op: str, wait: bool, **args):
+        job_id = self.submit(op, **args)
+        return self.wait(job_id) if wait else job_id
+
+    # -------------------------
+    # 与 MediaProcessor 同名的方法
+    # -------------------------
+    def set_speaker(self, speaker_file: str, cleanup_voice: bool = True):
+        """总是等待完成：之后的 speak 需要服务端返回的参考音频路径"""
+        self.speaker = self._call("set_speaker", True, speaker_file=os.path.abspath(speaker_file),
+                                  cleanup_voice=cleanup_voice)
+        return self.speaker
+
+    def speak(self, text: str, output_path: str, language: str = "zh", speaker: str | None = None,
+              wait: bool = True):
+        speaker = speaker or self.speaker
+        if not speaker:
+            raise ValueError("❌ 请先调用 set_speaker() 设置说话人")
+        if os.path.isfile(text):
+            text = os.path.abspath(text)
+        return self._call("speak", wait, text=text, output_path=os.path.abspath(output_path), language=language,
+                          speaker=speaker)
+
+    def extract_audio(self, video_path: str, audio_path: str, wait: bool = True):
+        return self._call("extract_audio", wait, video_path=os.path.abspath(video_path),
+                          audio_path=os.path.abspath(audio_path))
+
+    def generate_srt(self, audio_path: str, srt_path: str, beam_size: int | None = None, wait: bool = True):
+        return self._call("generate_srt", wait, audio=os.path.abspath(audio_path),
+                          srt_path=os.path.abspath(srt_path), beam_size=beam_size)
+
+    def burn_subtitles(self, video_path: str, srt_path: str, output_path: str, workers: int = 0,
+                       preset: str | None = None, wait: bool = True):
+        return self._call("burn_subtitles", wait, video_path=os.path.abspath(video_path),
+                          srt_path=os.path.abspath(srt_path), output_path=os.path.abspath(output_path),
+                          workers=workers, preset=preset)
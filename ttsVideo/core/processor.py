@@ -1,7 +1,10 @@
 import collections
 import os
+import shutil
 import subprocess
+import sys
 import tempfile
+import wave
 from pathlib import Path
 
 import torch
@@ -10,17 +13,52 @@ from TTS.config.shared_configs import BaseDatasetConfig
 from TTS.tts.configs.xtts_config import XttsConfig
 from TTS.tts.models.xtts import XttsArgs, XttsAudioConfig
 from TTS.utils.radam import RAdam
-from faster_whisper import WhisperModel
+
+# 仓库根目录，共享模块 mediakit
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from mediakit.asr import transcribe_speech
+from mediakit.asr_tuning import apply_host_profile_file, beam_size_for
+from mediakit.audio import load_audio
+from mediakit.encoding import burn, escape_filter_path, get_preset
+from mediakit.srt_stream import SRTStreamWriter, track_progress
+from mediakit.timecode import srt_timestamp
+from mediakit.speaker_cache import SpeakerLatentCache, xtts_synthesize
+from mediakit.speaker_prep import preprocess_speaker
+from mediakit.speech_map import SpeechMap
+from mediakit.tts_longform import synthesize_long
+from mediakit.tracing import file_size, span
+from mediakit.whisper_pool import get_whisper_model
+
+# 超过该字数的文本自动走分句分批合成
+LONG_TEXT_CHARS = 200
+
+
+def _wav_seconds(path: str) -> float | None:
+    try:
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / w.getframerate()
+    except (OSError, wave.Error, EOFError):
+        return None
 
 
 class MediaProcessor:
-    def __init__(self, ffmpeg_path: str, tts_model_dir: str, asr_model_dir: str, device: str = "cuda"):
+    def __init__(self, ffmpeg_path: str, tts_model_dir: str, asr_model_dir: str, device: str = "cuda",
+                 encode_preset: str = "balanced", encode_presets: dict | None = None,
+                 asr_config: str | None = str(Path(__file__).resolve().parents[2] / "makeSubtitle" / "config.json")):
+        """asr_config: 读取其中本机的 faster-whisper 调优结果（tune_asr.py 写入），None 表示不用"""
         self.ffmpeg_path = ffmpeg_path
+        # 烧录字幕的编码预设（preview / balanced / archival），encode_presets 可按字段覆盖
+        self.encode_preset = encode_preset
+        self.encode_presets = encode_presets
         self.tts_model_dir = tts_model_dir
         self.asr_model_dir = Path(asr_model_dir)
         self.device = device
         self.model = None
         self.clean_speaker = None
+        # 说话人条件向量缓存：同一参考音频只计算一次，持久化到 speakers/latents/
+        self.speaker_cache = SpeakerLatentCache("speakers/latents")
+        if asr_config:
+            apply_host_profile_file(asr_config)
 
         # 注册 Coqui TTS 必要的安全 globals
         os.environ["COQUI_TOS_AGREED"] = "1"
@@ -37,44 +75,48 @@ class MediaProcessor:
     # -------------------------
     def load_model(self, force_reload: bool = False):
         if self.model is None or force_reload:
-            print("🔄 Loading XTTS model...")
-            self.model = TTS(
-                model_path=self.tts_model_dir,
-                config_path=os.path.join(self.tts_model_dir, "config.json"),
-                progress_bar=False
-            ).to(self.device)
-            print("✅ Model loaded.")
+            with span("load_model", model="xtts", device=self.device):
+                print("🔄 Loading XTTS model...")
+                self.model = TTS(
+                    model_path=self.tts_model_dir,
+                    config_path=os.path.join(self.tts_model_dir, "config.json"),
+                    progress_bar=False
+                ).to(self.device)
+                print("✅ Model loaded.")
         return self.model
 
     # -------------------------
     # 设置说话人
     # -------------------------
     def set_speaker(self, speaker_file: str, cleanup_voice: bool = True, save_path: str | None = None):
-        if save_path is None:
-            save_path = "speakers/clean_speaker.wav"
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-        filter_ = "highpass=75,lowpass=8000,"
-        trim_silence = (
-            "areverse,silenceremove=start_periods=1:start_silence=0:start_threshold=0.02,"
-            "areverse,silenceremove=start_periods=1:start_silence=0:start_threshold=0.02"
-        )
-
-        if cleanup_voice:
-            cmd = f"{self.ffmpeg_path} -i \"{speaker_file}\" -af {filter_}{trim_silence} -y \"{save_path}\""
-        else:
-            cmd = f"{self.ffmpeg_path} -i \"{speaker_file}\" -y \"{save_path}\""
-        os.system(cmd)
-
-        self.clean_speaker = save_path
+        """
+        预处理结果按 (输入内容 + 滤镜参数) 缓存在 speakers/cache/，重复调用直接命中；
+        指定 save_path 时额外复制一份到该路径
+        """
+        with span("set_speaker", speaker=speaker_file, bytes_in=file_size(speaker_file)) as s:
+            clean_path = preprocess_speaker(self.ffmpeg_path, speaker_file, cleanup_voice, cache_dir="speakers/cache")
+            if save_path is not None:
+                os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+                shutil.copyfile(clean_path, save_path)
+                clean_path = save_path
+            s.set(bytes_out=file_size(clean_path))
+
+        self.clean_speaker = clean_path
         print(f"🎙️ Speaker set and preprocessed: {self.clean_speaker}")
         return self.clean_speaker
 
     # -------------------------
     # 语音合成（支持 txt 文件）
     # -------------------------
-    def speak(self, text: str, output_path: str, language: str = "zh"):
-        if not self.clean_speaker:
+    def speak(self, text: str, output_path: str, language: str = "zh", long_form: bool | None = None,
+              max_chars: int = 120, gap_ms: int = 150, crossfade_ms: int = 0, speaker: str | None = None):
+        """
+        long_form: True 时按句分批合成并逐批写入 WAV（限制长文本的峰值内存）；
+                   None 时文本超过 LONG_TEXT_CHARS 字自动启用
+        speaker:   预处理后的参考音频（set_speaker 的返回值）；为空时用当前 set_speaker 的结果
+        """
+        speaker = speaker or self.clean_speaker
+        if not speaker:
             raise ValueError("❌ 请先调用 set_speaker() 设置说话人")
 
         # 如果 text 是一个 txt 文件路径，读取内容
@@ -83,15 +125,31 @@ class MediaProcessor:
                 text = f.read().strip()
 
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        model = self.load_model()
-
-        print("🗣️ Synthesizing speech...")
-        model.tts_to_file(
-            text=text,
-            file_path=output_path,
-            speaker_wav=self.clean_speaker,
-            language=language
-        )
+        with span("speak", chars=len(text), language=language) as sp:
+            model = self.load_model()
+            if long_form is None:
+                long_form = len(text) > LONG_TEXT_CHARS
+            sp.set(long_form=long_form)
+
+            with span("speaker_latents"):
+                latents = self.speaker_cache.get(model, speaker)
+
+            print("🗣️ Synthesizing speech...")
+            with span("inference"):
+                if long_form:
+                    synthesize_long(
+                        lambda s: xtts_synthesize(model, s, language, latents),
+                        text,
+                        output_path,
+                        sample_rate=model.synthesizer.output_sample_rate,
+                        max_chars=max_chars,
+                        gap_ms=gap_ms,
+                        crossfade_ms=crossfade_ms
+                    )
+                else:
+                    wav = xtts_synthesize(model, text, language, latents)
+                    model.synthesizer.save_wav(wav=wav, path=output_path)
+            sp.set(bytes_out=file_size(output_path), audio_seconds=_wav_seconds(output_path))
         print(f"✅ Speech synthesized successfully: {output_path}")
 
     # -------------------------
@@ -99,39 +157,63 @@ class MediaProcessor:
     # -------------------------
     @staticmethod
     def format_timestamp(seconds: float) -> str:
-        milliseconds = int((seconds - int(seconds)) * 1000)
-        seconds = int(seconds)
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        secs = seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+        return srt_timestamp(seconds)
 
     # -------------------------
     # 工具: 提取音频
     # -------------------------
-    def extract_audio(self, video_path: str, audio_path: str):
-        cmd = [
-            self.ffmpeg_path, "-y",
-            "-i", video_path,
-            "-ar", "16000",  # 采样率
-            "-ac", "1",      # 单声道
-            audio_path
-        ]
-        subprocess.run(cmd, check=True)
+    def extract_audio(self, video_path: str, audio_path: str | None = None):
+        """
+        audio_path 为 None 时不写 WAV，直接通过管道解码并返回 16kHz float32 数组，
+        可直接传给 generate_srt
+        """
+        with span("extract_audio", video=video_path, bytes_in=file_size(video_path)) as s:
+            if audio_path is None:
+                audio = load_audio(self.ffmpeg_path, video_path)
+                s.set(bytes_out=audio.nbytes, audio_seconds=len(audio) / 16000)
+                return audio
+
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-i", video_path,
+                "-ar", "16000",  # 采样率
+                "-ac", "1",      # 单声道
+                audio_path
+            ]
+            subprocess.run(cmd, check=True)
+            s.set(bytes_out=file_size(audio_path), audio_seconds=_wav_seconds(audio_path))
+        return audio_path
 
     # -------------------------
     # ASR: 生成字幕文件
     # -------------------------
-    def generate_srt(self, audio_path: str, srt_path: str, beam_size: int = 5):
-        model = WhisperModel(str(self.asr_model_dir.resolve()), device="cpu")
-        segments, info = model.transcribe(audio_path, beam_size=beam_size)
-
-        with open(srt_path, "w", encoding="utf-8") as f:
-            for i, seg in enumerate(segments, 1):
-                start = self.format_timestamp(seg.start)
-                end = self.format_timestamp(seg.end)
-                text = seg.text.strip()
-                f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
+    def generate_srt(self, audio, srt_path: str, beam_size: int | None = None, skip_silence: bool = False):
+        """
+        audio 可以是音频文件路径，也可以是 extract_audio 返回的数组；
+        beam_size 为 None 时用本机调优结果（默认 5）；
+        skip_silence=True 时只解码语音段，时间戳映射回原始时间轴
+        """
+        beam_size = beam_size or beam_size_for(str(self.asr_model_dir))
+        with span("generate_srt", beam_size=beam_size,
+                  bytes_in=file_size(audio) if isinstance(audio, str) else audio.nbytes) as s:
+            with span("model_load"):
+                model = get_whisper_model(str(self.asr_model_dir.resolve()), device="cpu")
+            # segments 是惰性的，解码在遍历时进行
+            with span("inference"):
+                if skip_silence:
+                    if isinstance(audio, str):
+                        # 文件输入时 speech map 缓存在文件旁，下次直接复用
+                        path, audio = audio, load_audio(self.ffmpeg_path, audio)
+                        speech_map = SpeechMap.for_audio(path, audio=audio)
+                    else:
+                        speech_map = SpeechMap.from_audio(audio)
+                    segments, info = transcribe_speech(model, audio, speech_map, beam_size=beam_size)
+                else:
+                    segments, info = model.transcribe(audio, beam_size=beam_size)
+                with SRTStreamWriter(srt_path) as writer:
+                    for seg in track_progress(segments, info.duration):
+                        writer.write(seg.start, seg.end, seg.text.strip())
+            s.set(audio_seconds=info.duration, bytes_out=file_size(srt_path))
 
         print(f"✅ 已生成字幕文件: {srt_path}")
         return srt_path
@@ -139,12 +221,16 @@ class MediaProcessor:
     # -------------------------
     # 烧录字幕
     # -------------------------
-    def burn_subtitles(self, video_path: str, srt_path: str, output_path: str):
-        cmd = [
-            self.ffmpeg_path, "-y",
-            "-i", video_path,
-            "-vf", f"subtitles={srt_path}:force_style='Fontsize=24'",
-            output_path
-        ]
-        subprocess.run(cmd, check=True)
+    def burn_subtitles(self, video_path: str, srt_path: str, output_path: str, workers: int = 0,
+                       preset: str | None = None):
+        """workers > 1 时按关键帧分段并行烧录；preset 为空时用 self.encode_preset"""
+        encode = get_preset(preset or self.encode_preset, self.encode_presets)
+
+        def make_filter(sub: str) -> str:
+            return f"subtitles='{escape_filter_path(sub)}':force_style='Fontsize=24'"
+
+        with span("burn_subtitles", preset=encode["name"], workers=workers,
+                  bytes_in=file_size(video_path) + file_size(srt_path)) as s:
+            burn(self.ffmpeg_path, video_path, srt_path, output_path, make_filter, encode, workers=workers)
+            s.set(bytes_out=file_size(output_path))
         print(f"🎬 已输出带字幕视频: {output_path}")
\ No newline at end of file
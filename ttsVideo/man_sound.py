@@ -1,14 +1,27 @@
-from core.processor import MediaProcessor
+import os
 
+from client import MediaClient
 
-if __name__ == "__main__":
-    processor = MediaProcessor(
+
+def get_processor():
+    """service.py 在运行时直接提交任务（模型已常驻），否则本地加载模型"""
+    client = MediaClient(os.environ.get("MEDIA_SERVICE_URL", "http://127.0.0.1:8765"))
+    if client.available():
+        print("🔗 使用常驻服务")
+        return client
+
+    from core.processor import MediaProcessor
+    return MediaProcessor(
         ffmpeg_path=r"F:\media\external_libs\ffmpeg\bin\ffmpeg.exe",
         tts_model_dir=r"F:\media\models\XTTS-v2",
         asr_model_dir=r"F:\media\models\faster-whisper-small",
         device="cuda"
     )
 
+
+if __name__ == "__main__":
+    processor = get_processor()
+
     # 设置说话人
     processor.set_speaker("sample/4.MOV")
 
@@ -0,0 +1,156 @@
+"""
+service.py - 常驻本地服务：模型只加载一次，脚本通过 HTTP 提交任务
+
+每次运行 man_sound.py 之类的脚本都要重新加载 XTTS / Whisper、初始化 CUDA。
+这个服务常驻一个 MediaProcessor（启动时预加载模型），把 set_speaker / speak /
+generate_srt / extract_audio / burn_subtitles 作为任务接口:
+  - POST /jobs/<op>   JSON 参数与 MediaProcessor 对应方法一致，返回 202 和 job_id
+                      排队任务数达到上限时返回 429（客户端稍后重试）
+  - GET  /jobs/<id>   查询任务状态: queued / running / done / error
+  - GET  /health      队列长度等信息
+任务在单个模型线程里按顺序执行。客户端见 client.py。
+服务由多个客户端共用：set_speaker 返回预处理后的参考音频路径，speak 必须带上 speaker 参数，
+不依赖服务端"当前说话人"，别的客户端换说话人不会影响已排队的任务。
+
+用法:
+    python service.py --port 8765
+"""
+
+import argparse
+import asyncio
+import time
+import traceback
+import uuid
+
+from aiohttp import web
+
+from core.processor import MediaProcessor
+from mediakit import tracing
+from mediakit.batch_worker import BatchWorker
+from mediakit.whisper_pool import get_whisper_model
+
+OPS = ("set_speaker", "speak", "generate_srt", "extract_audio", "burn_subtitles")
+
+
+class MediaService:
+    def __init__(self, processor: MediaProcessor, max_queue: int = 32, max_jobs_kept: int = 1000):
+        self.processor = processor
+        self.max_queue = max_queue
+        self.max_jobs_kept = max_jobs_kept
+        self.jobs: dict = {}
+        self._tasks: set = set()
+        self.worker = BatchWorker(self._run_jobs, max_batch=1)
+
+    def preload(self):
+        print("🔄 Preloading models...")
+        self.processor.load_model()
+        get_whisper_model(str(self.processor.asr_model_dir.resolve()), device="cpu")
+        print("✅ Models ready.")
+
+    # -------------------------
+    # 模型线程
+    # -------------------------
+    def _run_jobs(self, job_ids):
+        for job_id in job_ids:
+            job = self.jobs[job_id]
+            job["status"] = "running"
+            job["started"] = time.time()
+            try:
+                result = getattr(self.processor, job["op"])(**job["args"])
+                # extract_audio 不带 audio_path 时返回数组，不适合放进 JSON
+                job["result"] = result if isinstance(result, (str, int, float, type(None))) else None
+                job["status"] = "done"
+            except Exception as e:
+                job["status"] = "error"
+                job["error"] = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+            job["finished"] = time.time()
+        return [None] * len(job_ids)
+
+    # -------------------------
+    # HTTP 接口
+    # -------------------------
+    def _queued(self) -> int:
+        return sum(1 for job in self.jobs.values() if job["status"] == "queued")
+
+    def _forget_old_jobs(self):
+        finished = [k for k, job in self.jobs.items() if job["status"] in ("done", "error")]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_jobs_kept)]:
+            del self.jobs[job_id]
+
+    async def submit(self, request: web.Request) -> web.Response:
+        op = request.match_info["op"]
+        if op not in OPS:
+            return web.json_response({"error": f"unknown op: {op}"}, status=400)
+        if self._queued() >= self.max_queue:
+            return web.json_response({"error": "queue full"}, status=429, headers={"Retry-After": "1"})
+        try:
+            args = await request.json()
+        except Exception:
+            return web.json_response({"error": "invalid json"}, status=400)
+        if op == "extract_audio" and not args.get("audio_path"):
+            return web.json_response({"error": "audio_path is required"}, status=400)
+        if op == "speak" and not args.get("speaker"):
+            return web.json_response({"error": "speaker is required (result of set_speaker)"}, status=400)
+
+        self._forget_old_jobs()
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {"id": job_id, "op": op, "args": args, "status": "queued",
+                             "submitted": time.time()}
+        task = asyncio.create_task(self.worker.submit(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.json_response({"job_id": job_id, "status": "queued"}, status=202)
+
+    async def status(self, request: web.Request) -> web.Response:
+        job = self.jobs.get(request.match_info["job_id"])
+        if job is None:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response(job)
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"ok": True, "queued": self._queued(), "max_queue": self.max_queue})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.post("/jobs/{op}", self.submit),
+            web.get("/jobs/{job_id}", self.status),
+            web.get("/health", self.health),
+        ])
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-queue", type=int, default=32, help="排队任务上限，超过返回 429")
+    parser.add_argument("--ffmpeg", default=r"F:\media\external_libs\ffmpeg\bin\ffmpeg.exe")
+    parser.add_argument("--tts-model", default=r"F:\media\models\XTTS-v2")
+    parser.add_argument("--asr-model", default=r"F:\media\models\faster-whisper-small")
+    parser.add_argument("--device", default="cuda")
+    parser.add_argument("--encode-preset", default="balanced", help="烧录编码预设: preview / balanced / archival")
+    parser.add_argument("--trace", default=None, help="各阶段 span 追加写入该 JSON Lines 文件")
+    parser.add_argument("--trace-chrome", default=None, help="各阶段 span 追加写入该 Chrome trace 文件（chrome://tracing / Perfetto）")
+    parser.add_argument("--profile", action="store_true", help="追踪时附带采样分析（栈顶函数计数）")
+    args = parser.parse_args()
+
+    if args.trace or args.trace_chrome:
+        tracing.enable(args.trace, args.trace_chrome, profile=args.profile)
+
+    processor = MediaProcessor(
+        ffmpeg_path=args.ffmpeg,
+        tts_model_dir=args.tts_model,
+        asr_model_dir=args.asr_model,
+        device=args.device,
+        encode_preset=args.encode_preset
+    )
+    service = MediaService(processor, max_queue=args.max_queue)
+    service.preload()
+    print(f"🚀 Media service on http://{args.host}:{args.port}")
+    web.run_app(service.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()